@@ -0,0 +1,108 @@
+"""
+Benchmark do índice ANN (modules/ann_index.py) contra a varredura exata.
+
+Gera vetores sintéticos normalizados e agrupados (como descrições parecidas de
+lotes), constrói o IVF(+PQ) e mede, para cada `nprobe`, o recall@k em relação
+ao top-k exato e a latência por consulta.
+
+Uso:
+    python benchmarks/bench_ann.py [--linhas 10000 100000 1000000] [--dim 384]
+                                   [--nprobe 1 4 16 64] [--pq 48] [--k 10] [--saida r.json]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from modules.ann_index import construir_indice, IndiceANN, listas_padrao
+
+
+def gerar_vetores(linhas, dim, rng, grupos=None, bloco=100000):
+    """Vetores em torno de `grupos` centros aleatórios, normalizados, em float32."""
+    grupos = grupos or max(10, linhas // 200)
+    centros = rng.standard_normal((grupos, dim)).astype(np.float32)
+    matriz = np.empty((linhas, dim), dtype=np.float32)
+    for inicio in range(0, linhas, bloco):
+        n = min(bloco, linhas - inicio)
+        ruido = rng.standard_normal((n, dim)).astype(np.float32) * 0.9
+        matriz[inicio:inicio + n] = centros[rng.integers(0, grupos, n)] + ruido
+    matriz /= np.linalg.norm(matriz, axis=1, keepdims=True)
+    return matriz
+
+
+def gerar_consultas(matriz, quantidade, rng):
+    """Consultas = linhas existentes com perturbação (não são cópias exatas)."""
+    base = matriz[rng.integers(0, len(matriz), quantidade)]
+    consultas = base + rng.standard_normal(base.shape).astype(np.float32) * 0.3 / np.sqrt(matriz.shape[1])
+    return consultas / np.linalg.norm(consultas, axis=1, keepdims=True)
+
+
+def top_k_exato(matriz, consulta, k):
+    scores = matriz @ consulta
+    melhores = np.argpartition(-scores, k - 1)[:k]
+    return melhores[np.argsort(-scores[melhores])]
+
+
+def medir(linhas, args, rng):
+    print(f"\n=== {linhas:,} linhas x {args.dim} dims ===")
+    matriz = gerar_vetores(linhas, args.dim, rng)
+    consultas = gerar_consultas(matriz, args.consultas, rng)
+
+    inicio = time.perf_counter()
+    exatos = [set(top_k_exato(matriz, q, args.k)) for q in consultas]
+    lat_exata = (time.perf_counter() - inicio) / len(consultas) * 1000
+
+    inicio = time.perf_counter()
+    arrays = construir_indice(matriz, subespacos=args.pq)
+    construcao = time.perf_counter() - inicio
+    arrays["meta"] = np.frombuffer(b'{"versao": 1, "impressao": ""}', dtype=np.uint8)
+    indice = IndiceANN(arrays)
+
+    pq = f", PQ {args.pq} bytes/vetor" if args.pq else ""
+    print(f"Construção: {construcao:.1f}s ({len(indice.centroides)} listas{pq})")
+    print(f"Varredura exata: {lat_exata:.2f} ms/consulta")
+    print(f"{'nprobe':>7} | {'recall@' + str(args.k):>9} | {'ms/consulta':>11} | {'vs exata':>8}")
+
+    resultado = {"linhas": linhas, "construcao_s": construcao, "exata_ms": lat_exata, "nprobe": {}}
+    for nprobe in args.nprobe:
+        acertos = 0
+        inicio = time.perf_counter()
+        encontrados = [indice.buscar(matriz, q, args.k, nprobe=nprobe)[0] for q in consultas]
+        lat = (time.perf_counter() - inicio) / len(consultas) * 1000
+        for achados, exato in zip(encontrados, exatos):
+            acertos += len(exato.intersection(achados.tolist()))
+        recall = acertos / (args.k * len(consultas))
+        print(f"{nprobe:>7} | {recall:>9.3f} | {lat:>11.2f} | {lat_exata / lat:>7.1f}x")
+        resultado["nprobe"][nprobe] = {"recall": recall, "ms": lat}
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recall e latência do índice ANN vs varredura exata.")
+    parser.add_argument("--linhas", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--pq", type=int, default=0, help="Subespaços do PQ (0 = sem PQ)")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--consultas", type=int, default=100)
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--saida", help="Grava os resultados em JSON neste arquivo")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.semente)
+    resultados = []
+    for linhas in args.linhas:
+        print(f"(listas padrão para {linhas:,} linhas: {listas_padrao(linhas)})")
+        resultados.append(medir(linhas, args, rng))
+
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            json.dump(resultados, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
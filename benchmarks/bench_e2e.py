@@ -0,0 +1,304 @@
+"""
+Benchmark de ponta a ponta, sem internet: acervo sintético + site fictício local.
+
+Para cada tamanho de acervo (--itens), mede três cenários, cada um num
+processo novo com a pasta de dados apontada para uma pasta temporária
+(LEILAO_DATA_DIR), então os dados reais em data/ nunca são tocados:
+
+    scraping       scraper.executar_scraping contra o site fictício
+                   (operação = um lote baixado; precisa do Playwright para a listagem)
+    processamento  ai_processor.gerar_inteligencia sobre o acervo, do zero,
+                   --repeticoes vezes, e uma rodada incremental sem mudanças
+                   (operação = uma rodada completa; precisa do sentence-transformers)
+    busca          searcher.realizar_busca com consultas sintéticas (operação = uma
+                   busca; a primeira, que carrega índice e modelo, sai à parte)
+
+Cada cenário reporta vazão, latência p50/p99 e pico de memória (RSS) em JSON,
+junto com o commit, para comparar execuções (--comparar resultado_anterior.json).
+
+Uso:
+    python benchmarks/bench_e2e.py [--itens 10000 100000 1000000] [--cenarios scraping processamento busca]
+                                   [--latencia-ms 20] [--consultas 200] [--saida r.json] [--comparar antigo.json]
+"""
+import argparse
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(RAIZ)
+
+import numpy as np
+
+CENARIOS = ["scraping", "processamento", "busca"]
+CATEGORIAS_TUDO = "1%2C15%2C14%2C23"
+DEPENDENCIAS = {"scraping": "playwright", "processamento": "sentence_transformers"}
+
+
+def resumir(latencias, operacoes, duracao, itens):
+    """Métricas comuns a todos os cenários (latências em segundos)."""
+    latencias = np.asarray(latencias, dtype=np.float64) * 1000
+    return {
+        "itens": itens,
+        "operacoes": operacoes,
+        "duracao_s": round(duracao, 3),
+        "vazao_por_s": round(operacoes / duracao, 2) if duracao > 0 else None,
+        "latencia_ms": {
+            "p50": round(float(np.percentile(latencias, 50)), 2),
+            "p99": round(float(np.percentile(latencias, 99)), 2),
+            "media": round(float(latencias.mean()), 2),
+            "max": round(float(latencias.max()), 2),
+        } if len(latencias) else None,
+    }
+
+
+def pico_memoria_mb():
+    # ru_maxrss vem em KB no Linux
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+# --- CENÁRIOS (rodam no processo filho, com config já apontando para a pasta temporária) ---
+
+def cenario_scraping(parametros):
+    import config
+    from modules import scraper
+
+    # O site fictício é local: o teto de ritmo do site real não faz sentido aqui
+    config.SCRAP_MAX_REQ_POR_SEG = config.SCRAP_TAXA_INICIAL = parametros["taxa"]
+
+    inicio = time.perf_counter()
+    stats = scraper.executar_scraping(parametros["url"] + "index.php?categoria_pesquisa=" + CATEGORIAS_TUDO,
+                                      concorrencia=parametros["concorrencia"], incremental=False)
+    duracao = time.perf_counter() - inicio
+
+    resultado = resumir(stats["latencias"], stats["sucessos"], duracao, parametros["itens"])
+    resultado.update({"falhas": stats["falhas"], "retentativas": stats["retentativas"],
+                      "taxa_efetiva": round(stats["taxa_efetiva"], 2)})
+    return resultado
+
+
+def cenario_processamento(parametros):
+    import config
+    from modules import ai_processor, lot_store
+
+    lot_store.importar_json(parametros["corpus"])
+    saidas = (config.EMBEDDINGS_FILE, config.ANN_FILE, config.BM25_FILE, config.FACETS_FILE)
+
+    tempos = []
+    for _ in range(parametros["repeticoes"]):
+        for caminho in saidas:
+            if os.path.exists(caminho):
+                os.remove(caminho)
+        inicio = time.perf_counter()
+        ai_processor.gerar_inteligencia()
+        tempos.append(time.perf_counter() - inicio)
+
+    # Rodada sem nenhuma mudança: mede o custo fixo do caminho incremental
+    inicio = time.perf_counter()
+    ai_processor.gerar_inteligencia()
+    incremental = time.perf_counter() - inicio
+
+    ativos = sum(1 for _ in lot_store.LotStore().iterar(incluir_expirados=False))
+    resultado = resumir(tempos, len(tempos), sum(tempos), parametros["itens"])
+    resultado.update({"lotes_ativos": ativos, "lotes_por_s": round(ativos / float(np.median(tempos)), 1),
+                      "incremental_s": round(incremental, 3)})
+    return resultado
+
+
+def cenario_busca(parametros):
+    from modules import searcher
+    from corpus_sintetico import consultas_sinteticas
+
+    consultas = consultas_sinteticas(parametros["consultas"], parametros["semente"])
+    # realizar_busca pergunta se quer exportar o CSV: a resposta é sempre "N"
+    sys.stdin = io.StringIO("N\n" * len(consultas))
+
+    latencias = []
+    for consulta in consultas:
+        inicio = time.perf_counter()
+        searcher.realizar_busca(consulta)
+        latencias.append(time.perf_counter() - inicio)
+
+    resultado = resumir(latencias[1:], len(latencias) - 1, sum(latencias[1:]), parametros["itens"])
+    resultado.update({"primeira_busca_ms": round(latencias[0] * 1000, 2),
+                      "semantica": searcher.AI_AVAILABLE and searcher.config.BUSCA_SEMANTICA})
+    return resultado
+
+
+def executar_filho(cenario, arquivo_parametros, arquivo_resultado):
+    with open(arquivo_parametros, 'r', encoding='utf-8') as f:
+        parametros = json.load(f)
+    funcao = {"scraping": cenario_scraping, "processamento": cenario_processamento, "busca": cenario_busca}[cenario]
+    # Os prints do sistema (um por lote/resultado) não entram na medição do terminal
+    with open(os.devnull, 'w', encoding='utf-8') as nulo, contextlib.redirect_stdout(nulo):
+        resultado = funcao(parametros)
+    resultado["pico_memoria_mb"] = pico_memoria_mb()
+    with open(arquivo_resultado, 'w', encoding='utf-8') as f:
+        json.dump(resultado, f)
+
+
+# --- ORQUESTRAÇÃO (processo principal) ---
+
+def motivo_para_pular(cenario, pasta_dados):
+    dependencia = DEPENDENCIAS.get(cenario)
+    if dependencia and importlib.util.find_spec(dependencia) is None:
+        return f"{dependencia} não instalado"
+    if cenario == "busca" and not os.path.exists(os.path.join(pasta_dados, "lotes", "estado.json.gz")):
+        return "sem dados processados (o processamento não rodou)"
+    return None
+
+
+def rodar_cenario(cenario, pasta_dados, parametros, pasta_trabalho):
+    """Roda um cenário num processo novo; devolve o dicionário de métricas."""
+    motivo = motivo_para_pular(cenario, pasta_dados)
+    if motivo:
+        return {"pulado": motivo}
+
+    os.makedirs(pasta_dados, exist_ok=True)
+    arquivo_parametros = os.path.join(pasta_trabalho, f"{cenario}_parametros.json")
+    arquivo_resultado = os.path.join(pasta_trabalho, f"{cenario}_resultado.json")
+    with open(arquivo_parametros, 'w', encoding='utf-8') as f:
+        json.dump(parametros, f)
+
+    ambiente = {**os.environ, "LEILAO_DATA_DIR": pasta_dados}
+    processo = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--filho", cenario, arquivo_parametros, arquivo_resultado],
+        env=ambiente, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    if processo.returncode != 0 or not os.path.exists(arquivo_resultado):
+        return {"erro": (processo.stderr or "").strip().splitlines()[-5:]}
+    with open(arquivo_resultado, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def medir_tamanho(itens, args, pasta):
+    from corpus_sintetico import gravar_corpus
+    from site_ficticio import SiteFicticio, criar_servidor
+
+    corpus = os.path.join(pasta, "corpus.json")
+    inicio = time.perf_counter()
+    gravar_corpus(corpus, itens, args.semente)
+    print(f"\n=== {itens:,} lotes (acervo gerado em {time.perf_counter() - inicio:.1f}s) ===", file=sys.stderr)
+
+    parametros = {"itens": itens, "corpus": corpus, "semente": args.semente, "repeticoes": args.repeticoes,
+                  "consultas": args.consultas, "taxa": args.taxa, "concorrencia": args.concorrencia}
+    pasta_processados = os.path.join(pasta, "processamento")
+    resultados = {}
+
+    for cenario in args.cenarios:
+        if cenario == "scraping" and motivo_para_pular(cenario, pasta):
+            resultados[cenario] = {"pulado": motivo_para_pular(cenario, pasta)}
+        elif cenario == "scraping":
+            site = SiteFicticio.do_corpus(corpus, latencia_ms=args.latencia_ms, variacao_ms=args.variacao_ms,
+                                          taxa_erro=args.taxa_erro)
+            servidor, parametros["url"] = criar_servidor(site)
+            resultados[cenario] = rodar_cenario(cenario, os.path.join(pasta, "scraping"), parametros, pasta)
+            resultados[cenario]["site"] = dict(site.stats)
+            servidor.shutdown()
+            del site
+        else:
+            if cenario == "busca" and "processamento" not in args.cenarios:
+                # A busca precisa dos arquivos do processamento (não medido aqui)
+                rodar_cenario("processamento", pasta_processados, {**parametros, "repeticoes": 1}, pasta)
+            resultados[cenario] = rodar_cenario(cenario, pasta_processados, parametros, pasta)
+        imprimir_resultado(cenario, resultados[cenario])
+    return resultados
+
+
+def imprimir_resultado(cenario, r):
+    if "pulado" in r or "erro" in r:
+        print(f"   {cenario:<14} {r.get('pulado') or 'erro: ' + ' | '.join(r['erro'])}", file=sys.stderr)
+        return
+    latencia = r["latencia_ms"] or {"p50": 0, "p99": 0}
+    print(f"   {cenario:<14} {r['vazao_por_s']:>10.2f} op/s | p50 {latencia['p50']:>9.2f} ms | "
+          f"p99 {latencia['p99']:>9.2f} ms | pico {r['pico_memoria_mb']:>7.1f} MB", file=sys.stderr)
+
+
+def commit_atual():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=RAIZ, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def comparar(atual, anterior):
+    """Variação percentual das métricas principais em relação a um relatório anterior."""
+    print(f"\nComparação com {anterior.get('commit')} ({anterior.get('gerado_em')}):", file=sys.stderr)
+    for itens, cenarios in atual["resultados"].items():
+        for cenario, r in cenarios.items():
+            antigo = anterior.get("resultados", {}).get(itens, {}).get(cenario)
+            if not antigo or "vazao_por_s" not in antigo or "vazao_por_s" not in r:
+                continue
+            pares = [("vazão", r["vazao_por_s"], antigo["vazao_por_s"]),
+                     ("p50", r["latencia_ms"]["p50"], antigo["latencia_ms"]["p50"]),
+                     ("p99", r["latencia_ms"]["p99"], antigo["latencia_ms"]["p99"]),
+                     ("memória", r["pico_memoria_mb"], antigo["pico_memoria_mb"])]
+            variacoes = " | ".join(f"{nome} {(novo - velho) / velho:+.0%}" for nome, novo, velho in pares if velho)
+            print(f"   {itens:>8} {cenario:<14} {variacoes}", file=sys.stderr)
+
+
+def main():
+    if len(sys.argv) == 5 and sys.argv[1] == "--filho":
+        sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+        executar_filho(*sys.argv[2:])
+        return
+
+    parser = argparse.ArgumentParser(description="Benchmark offline: coleta, processamento e busca.")
+    parser.add_argument("--itens", type=int, nargs="+", default=[10000])
+    parser.add_argument("--cenarios", nargs="+", choices=CENARIOS, default=CENARIOS)
+    parser.add_argument("--latencia-ms", type=float, default=20, help="Latência de cada página do site fictício")
+    parser.add_argument("--variacao-ms", type=float, default=10)
+    parser.add_argument("--taxa-erro", type=float, default=0.0, help="Fração de respostas 503 do site fictício")
+    parser.add_argument("--taxa", type=float, default=500, help="Teto de acessos/s do scraper ao site fictício")
+    parser.add_argument("--concorrencia", type=int, default=8)
+    parser.add_argument("--repeticoes", type=int, default=3, help="Rodadas completas do processamento")
+    parser.add_argument("--consultas", type=int, default=200)
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--saida", help="Grava o relatório JSON neste arquivo")
+    parser.add_argument("--comparar", help="Relatório JSON anterior para comparar")
+    parser.add_argument("--manter", action="store_true", help="Não apaga a pasta temporária no final")
+    args = parser.parse_args()
+
+    relatorio = {
+        "gerado_em": datetime.now().isoformat(timespec="seconds"),
+        "commit": commit_atual(),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "parametros": {chave: valor for chave, valor in vars(args).items() if chave not in ("saida", "comparar", "manter")},
+        "resultados": {},
+    }
+
+    sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+    pasta_raiz = tempfile.mkdtemp(prefix="bench_e2e_")
+    try:
+        for itens in args.itens:
+            pasta = os.path.join(pasta_raiz, str(itens))
+            os.makedirs(pasta)
+            relatorio["resultados"][str(itens)] = medir_tamanho(itens, args, pasta)
+    finally:
+        if args.manter:
+            print(f"\n📂 Arquivos mantidos em {pasta_raiz}", file=sys.stderr)
+        else:
+            shutil.rmtree(pasta_raiz, ignore_errors=True)
+
+    print(json.dumps(relatorio, indent=2, ensure_ascii=False))
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            json.dump(relatorio, f, indent=2, ensure_ascii=False)
+    if args.comparar:
+        with open(args.comparar, 'r', encoding='utf-8') as f:
+            comparar(relatorio, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Benchmark de inicialização: quanto tempo e memória até o menu aparecer.
+
+Cada cenário roda num processo novo (imports a frio, como o usuário vê):
+    menu          python main.py, escolhe "4" (Sair) assim que o menu aparece
+    busca_lexica  python buscar.py --lexica furadeira (busca sem carregar o modelo)
+
+Mede o tempo total do processo e o pico de memória (RSS) de cada execução e
+reporta a mediana. Com --comparar REV, roda os mesmos cenários numa cópia da
+revisão REV (git worktree temporário) para comparar antes x depois.
+
+Uso:
+    python benchmarks/bench_startup.py [--repeticoes 5] [--cenarios menu busca_lexica]
+                                       [--comparar HEAD~1] [--saida r.json]
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CENARIOS = {
+    "menu": (["main.py"], "4\n"),
+    "busca_lexica": (["buscar.py", "--lexica", "furadeira"], ""),
+}
+
+
+def executar(raiz, argumentos, entrada):
+    """Um processo: (segundos até sair, pico de RSS em MB, código de saída)."""
+    ambiente = {**os.environ, "TERM": "dumb", "PYTHONDONTWRITEBYTECODE": "1"}
+    inicio = time.perf_counter()
+    processo = subprocess.Popen([sys.executable] + argumentos, cwd=raiz, env=ambiente,
+                                stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    processo.stdin.write(entrada.encode('utf-8'))
+    processo.stdin.close()
+    # wait4 devolve o uso de recursos só deste filho (ru_maxrss em KB no Linux)
+    _, status, uso = os.wait4(processo.pid, 0)
+    duracao = time.perf_counter() - inicio
+    processo.returncode = os.waitstatus_to_exitcode(status)
+    return duracao, uso.ru_maxrss / 1024, processo.returncode
+
+
+def medir(raiz, cenarios, repeticoes):
+    resultados = {}
+    for nome in cenarios:
+        argumentos, entrada = CENARIOS[nome]
+        executar(raiz, argumentos, entrada)  # Aquece o cache de disco do SO
+        tempos, memorias, codigos = [], [], set()
+        for _ in range(repeticoes):
+            duracao, rss, codigo = executar(raiz, argumentos, entrada)
+            tempos.append(duracao)
+            memorias.append(rss)
+            codigos.add(codigo)
+        resultados[nome] = {
+            "tempo_s": round(statistics.median(tempos), 3),
+            "pico_rss_mb": round(statistics.median(memorias), 1),
+            "ok": codigos == {0},
+        }
+        print(f"   {nome:<14} {resultados[nome]['tempo_s']:>7.3f}s  {resultados[nome]['pico_rss_mb']:>8.1f} MB"
+              + ("" if resultados[nome]["ok"] else "  (saiu com erro)"), file=sys.stderr)
+    return resultados
+
+
+def medir_revisao(revisao, cenarios, repeticoes):
+    """Mesmos cenários numa cópia da revisão; a pasta data/ atual é copiada junto."""
+    pasta = tempfile.mkdtemp(prefix="bench_startup_")
+    copia = os.path.join(pasta, "arvore")
+    subprocess.run(["git", "worktree", "add", "--detach", copia, revisao], cwd=RAIZ, check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        dados = os.path.join(RAIZ, "data")
+        if os.path.isdir(dados):
+            shutil.copytree(dados, os.path.join(copia, "data"), dirs_exist_ok=True)
+        return medir(copia, cenarios, repeticoes)
+    finally:
+        subprocess.run(["git", "worktree", "remove", "--force", copia], cwd=RAIZ,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        shutil.rmtree(pasta, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tempo até o menu e pico de memória na inicialização.")
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--cenarios", nargs="+", choices=list(CENARIOS), default=list(CENARIOS))
+    parser.add_argument("--comparar", metavar="REV", help="Revisão git para comparar (ex: HEAD~1)")
+    parser.add_argument("--saida", help="Grava os resultados em JSON neste arquivo")
+    args = parser.parse_args()
+
+    print("Árvore atual:", file=sys.stderr)
+    resultados = {"atual": medir(RAIZ, args.cenarios, args.repeticoes)}
+    if args.comparar:
+        print(f"Revisão {args.comparar}:", file=sys.stderr)
+        resultados[args.comparar] = medir_revisao(args.comparar, args.cenarios, args.repeticoes)
+
+    print(json.dumps(resultados, indent=2))
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            json.dump(resultados, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""
+Gerador de acervos sintéticos no formato de 'dados_brutos.json'.
+
+Os lotes imitam o site: veículos ("COLISÃO / IPVA PAGO: 2025.") e materiais
+("APROXIMADAMENTE 25 ITENS: 01 KIT FURADEIRA ..."), com leilão/data/local no
+mesmo texto livre, descrições repetidas entre lotes e alguns expirados. As
+palavras seguem uma distribuição de Zipf (poucas muito comuns, muitas raras),
+como num acervo real. A mesma semente gera sempre o mesmo acervo.
+
+Uso:
+    python benchmarks/corpus_sintetico.py --itens 100000 --saida /tmp/dados_brutos.json [--semente 42]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+
+CL_INICIAL = 1400000
+LEILAO_INICIAL = 8100
+DATA_INICIAL = datetime(2025, 12, 1)
+
+LOCAIS = [
+    ("Br-262, Km 375 Juatuba-MG", "Br 262 Km375 S/N Zona Rural Juatuba-MG"),
+    ("Av. Amazonas, 1200 Contagem-MG", "Galpão 3 Contagem-MG"),
+    ("Rua Padre Eustáquio, 45 Belo Horizonte-MG", "Pátio Central Belo Horizonte-MG"),
+    ("Rod. Fernão Dias, Km 490 Betim-MG", "Pátio Betim-MG"),
+    ("Av. Brasil, 3000 Rio de Janeiro-RJ", "Depósito Rio de Janeiro-RJ"),
+    ("Rod. Anhanguera, Km 20 Osasco-SP", "Pátio Osasco-SP"),
+    ("Rua XV de Novembro, 88 Curitiba-PR", "Armazém Curitiba-PR"),
+    ("Av. Goiás, 500 Goiânia-GO", "Pátio Goiânia-GO"),
+    ("BR-040, Km 688 Sete Lagoas-MG", "Pátio Sete Lagoas-MG"),
+    ("Rua das Indústrias, 10 Uberlândia-MG", "Galpão Uberlândia-MG"),
+]
+
+MARCAS = ["FIAT", "VW", "CHEVROLET", "FORD", "HONDA", "YAMAHA", "TOYOTA", "RENAULT", "HYUNDAI", "NISSAN"]
+MODELOS = ["UNO", "GOL", "ONIX", "KA", "CG 160", "FAZER 250", "COROLLA", "SANDERO", "HB20", "KICKS",
+           "PALIO", "CELTA", "FIESTA", "BIZ 125", "CIVIC", "HILUX", "STRADA", "SAVEIRO", "S10", "TITAN 150"]
+CONDICOES = ["COLISÃO", "SINISTRO", "FURTO/ROUBO RECUPERADO", "ALAGAMENTO", "SUCATA", "CONSERVADO"]
+OBSERVACOES = ["IPVA PAGO: 2025.", "** Obrigatório credenciamento da Pessoa Jurídica junto ao Detran, chassi cortado",
+               "MOTOR NÃO FUNCIONA", "SEM CHAVE", "DOCUMENTO EM ORDEM", "DÉBITOS POR CONTA DO ARREMATANTE"]
+
+ITENS = [
+    "FURADEIRA", "MESA", "CADEIRA", "ARMÁRIO", "NOTEBOOK", "MONITOR", "IMPRESSORA", "GELADEIRA", "FOGÃO",
+    "MICROONDAS", "AR CONDICIONADO", "VENTILADOR", "BICICLETA", "ESTANTE", "GAVETEIRO", "SOFÁ", "TELEVISÃO",
+    "ESMERILHADEIRA", "PARAFUSADEIRA", "POLITRIZ", "SERRA CIRCULAR", "COMPRESSOR", "LAVADORA", "BEBEDOURO",
+    "ROTEADOR", "TECLADO", "MOUSE", "NOBREAK", "CAIXA DE SOM", "FREEZER", "BALCÃO", "ARQUIVO DE AÇO",
+    "CARRINHO DE MÃO", "ESCADA", "BETONEIRA", "GERADOR", "MOTOSSERRA", "ROÇADEIRA", "LIXADEIRA", "TORNO",
+    "PRENSA", "MACACO HIDRÁULICO", "CHAVE DE IMPACTO", "MARTELETE", "TUPIA", "PLAINA", "SOLDA", "ANDAIME",
+    "PALETE", "LONA", "CABO ELÉTRICO", "LUMINÁRIA", "TELHA", "PORTA", "JANELA", "PIA", "VASO SANITÁRIO",
+    "COLCHÃO", "CAMA", "BERÇO", "CÔMODA", "RACK", "PAINEL", "QUADRO BRANCO", "PROJETOR", "TABLET", "CELULAR",
+]
+ADJETIVOS = ["DE IMPACTO", "DE ESCRITÓRIO", "GIRATÓRIA", "110V", "220V", "INDUSTRIAL", "PROFISSIONAL", "DE AÇO",
+             "DE MADEIRA", "ELÉTRICA", "PORTÁTIL", "USADO", "COM AVARIA", "PEQUENO", "GRANDE", "DUPLO"]
+MARCAS_ITENS = ["BOSCH", "MAKITA", "DEWALT", "BLACK+DECKER", "POWAPAL", "TRAMONTINA", "DELL", "HP", "LG",
+                "SAMSUNG", "BRASTEMP", "CONSUL", "ELECTROLUX", "PHILCO", "MONDIAL", "VONDER"]
+RESSALVAS = ["(PODENDO ESTAR EM BOM ESTADO, COM AVARIA OU SUCATA)", "(NO ESTADO EM QUE SE ENCONTRA)",
+             "(SEM GARANTIA DE FUNCIONAMENTO)"]
+
+# Códigos de 'categoria_pesquisa' do site
+CATEGORIA_VEICULOS = "1"
+CATEGORIAS_MATERIAIS = ["15", "14", "23"]
+
+
+def _pesos_zipf(quantidade, expoente=1.1):
+    return [1 / (posicao + 1) ** expoente for posicao in range(quantidade)]
+
+
+class GeradorLotes:
+    """Gera lotes um a um (cabe 1 milhão sem montar a lista na memória)."""
+
+    def __init__(self, semente=42, base_url=config.URL_ALVO, taxa_duplicadas=0.15, taxa_expirados=0.02):
+        self.rng = random.Random(semente)
+        self.base_url = base_url
+        self.taxa_duplicadas = taxa_duplicadas
+        self.taxa_expirados = taxa_expirados
+        self._pesos_itens = _pesos_zipf(len(ITENS))
+        self._recentes = []  # Descrições já usadas, para repetir algumas (como no site)
+
+    def _descricao_veiculo(self):
+        rng = self.rng
+        partes = [f"{rng.choice(CONDICOES)} / {rng.choice(OBSERVACOES)}"]
+        if rng.random() < 0.6:
+            partes.append(f"{rng.choice(MARCAS)} {rng.choice(MODELOS)} {rng.randint(1998, 2024)}")
+        return partes
+
+    def _descricao_materiais(self):
+        rng = self.rng
+        quantidade = rng.randint(1, 8)
+        itens = rng.choices(ITENS, weights=self._pesos_itens, k=quantidade)
+        descricoes = []
+        for item in itens:
+            texto = f"{rng.randint(1, 20):02d} {item}"
+            if rng.random() < 0.5:
+                texto += " " + rng.choice(ADJETIVOS)
+            if rng.random() < 0.4:
+                texto += " " + rng.choice(MARCAS_ITENS)
+            descricoes.append(texto)
+        partes = []
+        if quantidade > 3:
+            partes.append(f"APROXIMADAMENTE {rng.randint(quantidade, 80)} ITENS: " + " ".join(descricoes))
+        else:
+            partes.append(" ".join(descricoes))
+        partes.append(rng.choice(RESSALVAS))
+        partes.append(f"(VOL:{rng.randint(1, 400)}/{rng.randint(1, 12):02d}{rng.randint(20, 25)})")
+        return partes
+
+    def lote(self, posicao):
+        rng = self.rng
+        cl = CL_INICIAL + posicao
+        leilao = LEILAO_INICIAL + rng.randint(0, 60)
+        dia = DATA_INICIAL + timedelta(days=leilao - LEILAO_INICIAL)
+        local, nome_lote = rng.choice(LOCAIS)
+        veiculo = rng.random() < 0.35
+
+        if self._recentes and rng.random() < self.taxa_duplicadas:
+            bruto = rng.choice(self._recentes)
+        else:
+            bruto = "\n".join(self._descricao_veiculo() if veiculo else self._descricao_materiais())
+            self._recentes.append(bruto)
+            if len(self._recentes) > 1000:
+                self._recentes.pop(rng.randrange(len(self._recentes)))
+
+        coletado = (DATA_INICIAL + timedelta(minutes=posicao % 10000)).isoformat(timespec="seconds")
+        return {
+            "url": f"{self.base_url.rstrip('/')}/lotem.php?cl={cl}",
+            "lote": nome_lote if rng.random() < 0.8 else "-",
+            "data": f"{leilao} - {dia:%d/%m/%y}",
+            "local": local,
+            "texto_completo": " ".join(bruto.split()),
+            "texto_bruto_com_quebras": bruto,
+            "cl": cl,
+            "coletado_em": coletado,
+            "expirado": rng.random() < self.taxa_expirados,
+            "visto_em": coletado,
+            "categorias": [CATEGORIA_VEICULOS] if veiculo else [rng.choice(CATEGORIAS_MATERIAIS)],
+        }
+
+    def lotes(self, quantidade):
+        for posicao in range(quantidade):
+            yield self.lote(posicao)
+
+
+def gravar_corpus(caminho, quantidade, semente=42, base_url=config.URL_ALVO):
+    """Grava o acervo em streaming (mesmo formato e indentação do arquivo real)."""
+    gerador = GeradorLotes(semente, base_url)
+    with open(caminho, 'w', encoding='utf-8') as f:
+        f.write("[\n")
+        for posicao, item in enumerate(gerador.lotes(quantidade)):
+            if posicao:
+                f.write(",\n")
+            f.write("    " + json.dumps(item, ensure_ascii=False, indent=4).replace("\n", "\n    "))
+        f.write("\n]\n")
+    return caminho
+
+
+def consultas_sinteticas(quantidade, semente=42):
+    """Consultas parecidas com as do menu: itens, marcas e alguns filtros em linha."""
+    rng = random.Random(semente)
+    pesos = _pesos_zipf(len(ITENS))
+    consultas = []
+    for _ in range(quantidade):
+        sorteio = rng.random()
+        if sorteio < 0.5:
+            consulta = rng.choices(ITENS, weights=pesos)[0].lower()
+        elif sorteio < 0.7:
+            consulta = f"{rng.choices(ITENS, weights=pesos)[0]} {rng.choice(ADJETIVOS)}".lower()
+        elif sorteio < 0.85:
+            consulta = f"{rng.choice(MARCAS)} {rng.choice(MODELOS)}".lower()
+        else:
+            cidade = rng.choice(LOCAIS)[0].rsplit(" ", 1)[-1].split("-")[0].lower()
+            consulta = f"{rng.choices(ITENS, weights=pesos)[0].lower()} cidade:{cidade}"
+        consultas.append(consulta)
+    return consultas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera um acervo sintético no formato de dados_brutos.json.")
+    parser.add_argument("--itens", type=int, default=10000)
+    parser.add_argument("--saida", required=True)
+    parser.add_argument("--semente", type=int, default=42)
+    args = parser.parse_args()
+
+    gravar_corpus(args.saida, args.itens, args.semente)
+    print(f"✅ {args.itens} lotes gravados em {args.saida} ({os.path.getsize(args.saida) / 1024 / 1024:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Regressão do passe léxico: compara o bônus textual do índice invertido
+(modules/lexical.py) com o laço original da busca híbrida, lote a lote.
+
+Uso:
+    python benchmarks/regressao_lexical.py [--consultas N] [--dados pasta_do_acervo_ou_arquivo.json]
+
+Sem --dados usa o acervo (data/lotes) ou, se ele ainda não foi criado, o
+dados_brutos.json antigo.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+from modules.lexical import normalizar_texto, IndiceInvertido
+from modules.lot_store import LotStore
+
+CONSULTAS_FIXAS = [
+    "", "furadeira", "Mesa", "mesas de escritorio", "moto", "colisão", "IPVA pago",
+    "bicicleta spinning", "sucata", "ar condicionado", "cadeira", "notebook dell",
+    "lote", "br 262", "a", "pc", "Geladeira Brastemp", "ferramentas", "tv 50",
+]
+
+
+def bonus_referencia(dados, termo):
+    """O laço original de realizar_busca (ESTRATÉGIA 2), sem alterações."""
+    termo_norm = normalizar_texto(termo)
+    palavras_busca = termo_norm.split()
+    bonus = {}
+    textuais = set()
+
+    for idx, item in enumerate(dados):
+        texto_item = normalizar_texto(item['texto_completo'])
+        palavras_item_set = set(texto_item.split())
+        bonus_texto = 0.0
+
+        if termo_norm in texto_item:
+            bonus_texto += 0.4
+
+        matches_palavras = 0
+        for palavra in palavras_busca:
+            match_encontrado = False
+            if len(palavra) < 4:
+                if palavra in palavras_item_set: match_encontrado = True
+            else:
+                if palavra in texto_item:
+                    match_encontrado = True
+                else:
+                    raiz = palavra.rstrip('s')
+                    if raiz.endswith(('o', 'a', 'e')): raiz = raiz[:-1]
+                    if len(raiz) >= 3 and raiz in palavras_item_set:
+                        match_encontrado = True
+
+            if match_encontrado: matches_palavras += 1
+
+        if matches_palavras > 0:
+            fator_match = matches_palavras / len(palavras_busca)
+            bonus_texto += (fator_match * 0.3)
+            textuais.add(idx)
+
+        if bonus_texto > 0:
+            bonus[idx] = bonus_texto
+
+    return bonus, textuais
+
+
+def gerar_consultas(textos_norm, quantidade, semente=42):
+    """Consultas tiradas do próprio acervo: palavras, pedaços, frases e plurais."""
+    rnd = random.Random(semente)
+    consultas = list(CONSULTAS_FIXAS)
+    textos = [t for t in textos_norm if t]
+    for _ in range(quantidade):
+        tokens = rnd.choice(textos).split()
+        inicio = rnd.randrange(len(tokens))
+        frase = tokens[inicio:inicio + rnd.randint(1, 3)]
+        tipo = rnd.random()
+        if tipo < 0.3:
+            frase[0] = frase[0][rnd.randint(0, max(0, len(frase[0]) - 2)):]  # corta o começo
+        elif tipo < 0.5:
+            frase[-1] = frase[-1][:rnd.randint(1, len(frase[-1]))]  # corta o fim
+        elif tipo < 0.6:
+            frase[-1] += "s"  # plural
+        consultas.append(" ".join(frase))
+    return consultas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dados", help="Pasta do acervo de lotes ou arquivo JSON antigo "
+                                        "(padrão: o acervo; sem ele, o dados_brutos.json ainda não migrado)")
+    parser.add_argument("--consultas", type=int, default=300)
+    args = parser.parse_args()
+    if args.dados is None:
+        # Só lê: a migração para data/lotes fica com a automação, não com o benchmark
+        args.dados = config.LOTES_DIR if LotStore(config.LOTES_DIR).existe() else config.RAW_DATA_FILE
+
+    if os.path.isdir(args.dados):
+        dados = list(LotStore(args.dados).iterar(incluir_expirados=False))
+    else:
+        with open(args.dados, 'r', encoding='utf-8') as f:
+            dados = json.load(f)
+
+    textos_norm = [normalizar_texto(item['texto_completo']) for item in dados]
+    inicio = time.perf_counter()
+    indice = IndiceInvertido(textos_norm)
+    tempo_indice = time.perf_counter() - inicio
+
+    consultas = gerar_consultas(textos_norm, args.consultas)
+    divergencias = 0
+    tempo_ref = tempo_novo = 0.0
+    for consulta in consultas:
+        t0 = time.perf_counter()
+        esperado = bonus_referencia(dados, consulta)
+        t1 = time.perf_counter()
+        obtido = indice.bonus_texto(consulta)
+        t2 = time.perf_counter()
+        tempo_ref += t1 - t0
+        tempo_novo += t2 - t1
+        if esperado != obtido:
+            divergencias += 1
+            print(f"❌ Divergência em {consulta!r}: {len(esperado[0])} esperados, {len(obtido[0])} obtidos")
+
+    print(json.dumps({
+        "lotes": len(dados),
+        "vocabulario": len(indice.vocabulario),
+        "consultas": len(consultas),
+        "divergencias": divergencias,
+        "montagem_indice_s": round(tempo_indice, 4),
+        "laco_original_ms_por_consulta": round(1000 * tempo_ref / len(consultas), 3),
+        "indice_invertido_ms_por_consulta": round(1000 * tempo_novo / len(consultas), 3),
+    }, indent=2))
+    sys.exit(1 if divergencias else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Site fictício local no lugar do palaciodosleiloes.com.br, para medir a coleta
+sem depender (nem sobrecarregar) do site real.
+
+    GET /site/index.php?categoria_pesquisa=1%2C15  -> listagem com os cards em '#div_lotes'
+    GET /site/lotem.php?cl=1400000                 -> página do lote ('table.table-sm' + 'div.bg-cinza-claro')
+
+As páginas usam a mesma marcação que o scraper procura no site real. A
+latência de cada resposta é configurável (fixa + variação aleatória), assim
+como uma fração de respostas 503 para exercitar o ritmo adaptativo.
+
+Uso:
+    python benchmarks/site_ficticio.py --corpus /tmp/dados_brutos.json [--porta 8800] [--latencia-ms 50]
+"""
+import argparse
+import html
+import json
+import os
+import random
+import sys
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.campos_lote import extrair_cl
+
+
+def pagina_lote(item):
+    linhas = "".join(
+        f"<tr><td>{rotulo}</td><td>{html.escape(item[campo])}</td></tr>"
+        for rotulo, campo in (("Lote", "lote"), ("Leilão e Data", "data"), ("Local", "local")))
+    descricao = "<br>\n".join(html.escape(linha) for linha in item["texto_bruto_com_quebras"].split("\n"))
+    return (
+        "<!DOCTYPE html><html><head><meta charset='utf-8'><title>Lote</title>"
+        "<script>function exibir_foto(){}</script></head><body>"
+        "<div class='rodape_cookies'>Este site usa cookies.</div>"
+        "<div class='container'><h1>Detalhes do lote</h1>"
+        f"<table class='table table-sm'>{linhas}</table>"
+        f"<div class='bg-cinza-claro p-3'>{descricao}</div>"
+        "</div></body></html>"
+    )
+
+
+def pagina_listagem(itens):
+    cards = "".join(
+        f"<div class='col-md-3'><div class='card' onclick='exibir_lote({item['cl']},{item['data'].split(' ')[0]})'>"
+        f"<p>{html.escape(item['texto_completo'][:60])}</p></div></div>"
+        for item in itens)
+    return (
+        "<!DOCTYPE html><html><head><meta charset='utf-8'><title>Leilões</title></head><body>"
+        "<div class='rodape_cookies'>Este site usa cookies.</div>"
+        f"<div id='div_lotes' class='row'>{cards}</div>"
+        "</body></html>"
+    )
+
+
+class SiteFicticio:
+    """Lotes servidos pelo site e estatísticas das requisições recebidas."""
+
+    def __init__(self, itens, latencia_ms=0.0, variacao_ms=0.0, taxa_erro=0.0, semente=42):
+        # Lotes expirados não aparecem mais no site
+        self.itens = [item for item in itens if not item.get("expirado")]
+        self.por_cl = {item["cl"]: item for item in self.itens}
+        self.latencia = latencia_ms / 1000
+        self.variacao = variacao_ms / 1000
+        self.taxa_erro = taxa_erro
+        self._rng = random.Random(semente)
+        self._lock = threading.Lock()
+        self.stats = {"listagem": 0, "lotes": 0, "erros_simulados": 0, "nao_encontrados": 0}
+
+    @classmethod
+    def do_corpus(cls, caminho, **opcoes):
+        with open(caminho, 'r', encoding='utf-8') as f:
+            itens = json.load(f)
+        for item in itens:
+            item.setdefault("cl", extrair_cl(item["url"]))
+        return cls(itens, **opcoes)
+
+    def contar(self, chave):
+        with self._lock:
+            self.stats[chave] += 1
+
+    def atraso(self):
+        with self._lock:
+            erro = self._rng.random() < self.taxa_erro
+            atraso = self.latencia + self._rng.uniform(0, self.variacao)
+        time.sleep(atraso)
+        return erro
+
+    def listagem(self, categorias):
+        if not categorias:
+            return self.itens
+        return [item for item in self.itens if set(item.get("categorias", [])) & categorias]
+
+
+class ManipuladorSite(BaseHTTPRequestHandler):
+    site = None  # SiteFicticio, definido em criar_servidor
+    protocol_version = "HTTP/1.1"  # keep-alive, como o site real
+
+    def log_message(self, formato, *args):
+        pass
+
+    def _responder(self, status, corpo):
+        dados = corpo.encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(dados)))
+        self.end_headers()
+        self.wfile.write(dados)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        parametros = parse_qs(url.query)
+
+        if url.path.endswith("/index.php"):
+            self.site.contar("listagem")
+            codigos = parametros.get("categoria_pesquisa", [""])[0]
+            self._responder(200, pagina_listagem(self.site.listagem({c for c in codigos.split(",") if c})))
+        elif url.path.endswith("/lotem.php"):
+            if self.site.atraso():
+                self.site.contar("erros_simulados")
+                self._responder(503, "<html><body>Serviço indisponível</body></html>")
+                return
+            item = self.site.por_cl.get(int(parametros.get("cl", ["0"])[0] or 0))
+            if item is None:
+                self.site.contar("nao_encontrados")
+                self._responder(404, "<html><body>Lote não encontrado</body></html>")
+                return
+            self.site.contar("lotes")
+            self._responder(200, pagina_lote(item))
+        else:
+            # Imagens, CSS, favicon...: o site fictício não tem
+            self._responder(404, "")
+
+
+def criar_servidor(site, host="127.0.0.1", porta=0):
+    """Sobe o servidor numa thread; devolve (servidor, url da pasta /site/)."""
+    manipulador = type("Manipulador", (ManipuladorSite,), {"site": site})
+    servidor = ThreadingHTTPServer((host, porta), manipulador)
+    servidor.daemon_threads = True
+    threading.Thread(target=servidor.serve_forever, daemon=True, name="site-ficticio").start()
+    return servidor, f"http://{host}:{servidor.server_address[1]}/site/"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Site fictício de leilões servindo um acervo sintético.")
+    parser.add_argument("--corpus", required=True, help="Arquivo no formato de dados_brutos.json")
+    parser.add_argument("--porta", type=int, default=8800)
+    parser.add_argument("--latencia-ms", type=float, default=50)
+    parser.add_argument("--variacao-ms", type=float, default=20)
+    parser.add_argument("--taxa-erro", type=float, default=0.0, help="Fração de respostas 503 nos lotes")
+    args = parser.parse_args()
+
+    site = SiteFicticio.do_corpus(args.corpus, latencia_ms=args.latencia_ms, variacao_ms=args.variacao_ms,
+                                  taxa_erro=args.taxa_erro)
+    servidor, url = criar_servidor(site, porta=args.porta)
+    print(f"🌐 {len(site.itens)} lotes em {url}index.php (Ctrl+C para parar)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        servidor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+import sys
+import os
+import csv
+import json
+import time
+import argparse
+
+# Adiciona o diretório atual ao path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from modules import searcher
+from modules.query_cache import get_cache
+
+
+def inteiro_positivo(texto):
+    """Tipo do argparse: inteiro >= 1 (ex: -n 0 ou -n -3 são recusados)."""
+    try:
+        valor = int(texto)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"'{texto}' não é um número inteiro.")
+    if valor < 1:
+        raise argparse.ArgumentTypeError(f"deve ser pelo menos 1 (recebido: {valor}).")
+    return valor
+
+
+def ler_consultas(args):
+    """Consultas da linha de comando, do arquivo (--arquivo) ou da entrada padrão."""
+    consultas = [c for c in args.consultas if c != '-']
+    if args.arquivo:
+        with open(args.arquivo, 'r', encoding='utf-8') as f:
+            consultas += f.read().splitlines()
+    if '-' in args.consultas or (not args.consultas and not args.arquivo):
+        consultas += sys.stdin.read().splitlines()
+
+    # Linhas vazias e comentários (#) são ignorados
+    return [c.strip() for c in consultas if c.strip() and not c.strip().startswith('#')]
+
+
+def escrever_resultados(saida, formato, consultas, resultados):
+    if formato == 'csv':
+        writer = csv.writer(saida, delimiter=';')  # Ponto e vírgula é o padrão Excel Brasil
+        writer.writerow(['Consulta', 'Posição'] + searcher.CABECALHO_CSV)
+        for consulta, itens in zip(consultas, resultados):
+            for posicao, item in enumerate(itens, start=1):
+                writer.writerow([consulta, posicao] + searcher.linha_csv(item))
+    else:
+        for consulta, itens in zip(consultas, resultados):
+            for posicao, item in enumerate(itens, start=1):
+                saida.write(json.dumps({"consulta": consulta, "posicao": posicao, **item}, ensure_ascii=False) + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Busca híbrida sem menu: várias consultas numa passada só do modelo.",
+        epilog="Ex: python buscar.py furadeira 'mesa cidade:juatuba dias:7' -s resultados.csv")
+    parser.add_argument("consultas", nargs="*",
+                        help="Termos de busca (sem termos nem --arquivo, lê uma consulta por linha da entrada padrão)")
+    parser.add_argument("-a", "--arquivo", help="Arquivo com uma consulta por linha (# = comentário)")
+    parser.add_argument("-s", "--saida", help="Arquivo de saída (padrão: saída padrão)")
+    parser.add_argument("-f", "--formato", choices=["csv", "jsonl"],
+                        help="Formato da saída (padrão: pela extensão do arquivo, senão jsonl)")
+    parser.add_argument("-n", "--limite", type=inteiro_positivo, default=20, help="Resultados por consulta")
+    parser.add_argument("--modo-lexico", choices=["heuristica", "bm25"])
+    parser.add_argument("--lexica", action="store_true", help="Só busca textual: não carrega o modelo de IA")
+    parser.add_argument("--nprobe", type=inteiro_positivo, help="Listas visitadas pelo índice ANN (recall x velocidade)")
+    args = parser.parse_args()
+
+    consultas = ler_consultas(args)
+    if not consultas:
+        parser.error("nenhuma consulta informada.")
+
+    formato = args.formato or ('csv' if (args.saida or '').lower().endswith('.csv') else 'jsonl')
+
+    inicio = time.perf_counter()
+    try:
+        resultados = searcher.buscar_varios(consultas, args.limite, semantica=not args.lexica,
+                                            modo_lexico=args.modo_lexico, nprobe=args.nprobe)
+    except (searcher.DadosIndisponiveis, ValueError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        sys.exit(1)
+    duracao = time.perf_counter() - inicio
+
+    if args.saida:
+        # encoding='utf-8-sig' no CSV para o Excel ler acentos corretamente
+        with open(args.saida, 'w', newline='', encoding='utf-8-sig' if formato == 'csv' else 'utf-8') as f:
+            escrever_resultados(f, formato, consultas, resultados)
+    else:
+        escrever_resultados(sys.stdout, formato, consultas, resultados)
+
+    # Resumo vai para stderr para não misturar com os resultados
+    total = sum(len(r) for r in resultados)
+    print(f"✅ {len(consultas)} consultas, {total} resultados em {duracao:.2f}s", file=sys.stderr)
+    cache = get_cache().estatisticas()
+    print(f"   Cache de consultas: {cache['acertos']} acertos, {cache['faltas']} faltas "
+          f"({cache['taxa_acerto']:.0%})", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,19 +2,110 @@ import os
 
 # Caminhos de Diretórios
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-DATA_DIR = os.path.join(BASE_DIR, 'data')
+# LEILAO_DATA_DIR aponta para outra pasta (ex: benchmarks) sem tocar nos dados reais
+DATA_DIR = os.environ.get('LEILAO_DATA_DIR') or os.path.join(BASE_DIR, 'data')
 
 # Garante que a pasta data existe
 os.makedirs(DATA_DIR, exist_ok=True)
 
 # Caminhos de Arquivos
-RAW_DATA_FILE = os.path.join(DATA_DIR, 'dados_brutos.json')
-EMBEDDINGS_FILE = os.path.join(DATA_DIR, 'embeddings.pkl')
-PROCESSED_DATA_FILE = os.path.join(DATA_DIR, 'dados_processados.json')
+# Acervo de lotes (fonte única): segmentos JSONL comprimidos + estado, ver modules/lot_store.py
+LOTES_DIR = os.path.join(DATA_DIR, 'lotes')
+RAW_DATA_FILE = os.path.join(DATA_DIR, 'dados_brutos.json')  # Formato antigo, migrado para LOTES_DIR
+EMBEDDINGS_FILE = os.path.join(DATA_DIR, 'embeddings.plemb')
+ANN_FILE = os.path.join(DATA_DIR, 'ann.npz')  # Índice aproximado (IVF/PQ) da busca semântica
+FACETS_FILE = os.path.join(DATA_DIR, 'facetas.npz')  # Colunas de filtro: leilão, data, local, categoria
+# Alertas: buscas salvas, estado da última avaliação e resumo dos lotes novos
+BUSCAS_SALVAS_FILE = os.path.join(DATA_DIR, 'buscas_salvas.json')
+ALERTAS_ESTADO_FILE = os.path.join(DATA_DIR, 'alertas_estado.npz')
+ALERTAS_RESUMO_FILE = os.path.join(DATA_DIR, 'alertas_novidades.json')
+QUERY_CACHE_FILE = os.path.join(DATA_DIR, 'cache_consultas.npz')  # Vetores das consultas já feitas
+BM25_FILE = os.path.join(DATA_DIR, 'bm25.npz')  # Pesos pré-calculados do score léxico BM25F
+LEGACY_EMBEDDINGS_FILE = os.path.join(DATA_DIR, 'embeddings.pkl')  # Formato antigo (pickle do torch)
+PROCESSED_DATA_FILE = os.path.join(DATA_DIR, 'dados_processados.json')  # Formato antigo, migrado para LOTES_DIR
+# Coleta em andamento: cada lote é gravado numa linha assim que termina (permite retomar)
+PARTIAL_DATA_FILE = os.path.join(DATA_DIR, 'coleta_parcial.jsonl')
+CHECKPOINT_FILE = os.path.join(DATA_DIR, 'coleta_checkpoint.json')
+RELATORIO_EXECUCAO_FILE = os.path.join(DATA_DIR, 'relatorio_execucao.json')  # Tempos por etapa da automação
 
 # Configurações do Scraper
 URL_ALVO = "https://www.palaciodosleiloes.com.br/site/"
+# User-Agent de um Chrome real no Windows 10 (Anti-bloqueio), usado pelo navegador e pelo HTTP puro
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
 LIMIT_SCRAP = None  # Limite de itens para teste (coloque 0 ou None para rodar tudo)
+SCRAP_CONCORRENCIA = 4  # Abas abertas em paralelo para os lotes (1 = uma aba só, como antes)
+SCRAP_MAX_REQ_POR_SEG = 1.0  # Teto GLOBAL de acessos por segundo ao site (somando todas as abas)
+# Ritmo adaptativo: acelera com o site saudável, freia em timeout/429/5xx
+SCRAP_TAXA_INICIAL = 0.5  # Acessos/s no começo da coleta
+SCRAP_TAXA_MIN = 0.1  # Piso do ritmo quando o site está com problemas
+SCRAP_TAXA_PASSO = 0.02  # Aumento de ritmo a cada resposta rápida
+SCRAP_LATENCIA_ALVO = 3.0  # Segundos: acima disso o lote conta como "site lento"
+SCRAP_MAX_TENTATIVAS = 3  # Tentativas por lote antes de desistir dele
+SCRAP_BACKOFF_BASE = 2.0  # Segundos de espera antes da 1ª repetição (dobra a cada tentativa)
+SCRAP_CIRCUITO_FALHAS = 8  # Falhas seguidas que abrem o circuito (pausa geral)
+SCRAP_CIRCUITO_PAUSA = 60  # Segundos da 1ª pausa (dobra a cada abertura seguida)
+SCRAP_CIRCUITO_MAX_ABERTURAS = 3  # Aberturas seguidas sem sucesso antes de interromper a coleta
+SCRAP_BACKEND = "http"  # "http" (requests + HTML puro, Playwright só se faltar algo) ou "playwright"
+SCRAP_INCREMENTAL = True  # Só visita lotes novos ou com coleta mais velha que o TTL abaixo
+SCRAP_TTL_HORAS = 72  # Idade máxima (em horas) de um lote já salvo antes de ser coletado de novo
+LOTES_MAX_SEGMENTOS = 30  # Segmentos diários do acervo antes de compactar tudo num só
+
+# Bloqueio de recursos no navegador (o scraper só usa o texto do HTML)
+BLOQUEIO_ATIVO = True
+BLOQUEIO_TIPOS = ["image", "media", "font", "stylesheet"]  # resource_type do Playwright que nunca é baixado
+BLOQUEIO_DOMINIOS = [  # Rastreadores/anúncios: bloqueados seja qual for o tipo
+    "google-analytics.com", "googletagmanager.com", "doubleclick.net", "googlesyndication.com",
+    "facebook.net", "facebook.com", "hotjar.com", "clarity.ms", "tiktok.com",
+]
+BLOQUEIO_DOMINIOS_LIBERADOS = []  # Exceções: domínios que nunca são bloqueados (ex: um CDN necessário)
+# Tamanho médio estimado (bytes) de cada tipo bloqueado, só para o relatório de economia
+BLOQUEIO_TAMANHO_ESTIMADO = {"image": 40000, "media": 250000, "font": 35000, "stylesheet": 25000, "script": 45000}
 
 # Configurações da IA
-MODEL_NAME = 'all-MiniLM-L6-v2' # Modelo leve e eficiente para PT-BR/Inglês
\ No newline at end of file
+MODEL_NAME = 'all-MiniLM-L6-v2' # Modelo leve e eficiente para PT-BR/Inglês
+EMBEDDINGS_DTYPE = 'float16'  # 'float16' (metade do tamanho) ou 'float32'
+ENCODE_BLOCO = 1024  # Textos por chamada do modelo no processamento (progresso e medição por bloco)
+ENCODE_PROCESSOS = 0  # Processos rodando o modelo em paralelo (0 = um por núcleo; 1 = no próprio processo)
+ENCODE_THREADS = 0  # Threads do torch em cada processo (0 = núcleos divididos entre os processos)
+
+# Configurações da Busca
+BUSCA_SEMANTICA = True  # False = busca só textual no menu (não carrega o modelo nem o torch)
+BUSCA_MODO_LEXICO = 'heuristica'  # 'heuristica' (frase exata + palavras) ou 'bm25' (pondera termos raros)
+BUSCA_BLOCO_CONSULTAS = 64  # Buscas em lote: consultas pontuadas juntas num produto de matrizes
+BUSCA_BLOCO_LINHAS = 65536  # Varredura exata: linhas do memmap (float16) convertidas para float32 por vez
+BUSCA_PESO_BM25 = 0.7  # Teto do bônus no modo BM25 (termos raros); mesma escala do máximo da heurística
+BM25_CAMPOS = {"texto_completo": 1.0, "local": 0.3, "lote": 0.3}  # BM25F: peso de cada campo do lote
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Cache LRU dos vetores de consulta (compartilhado por menu, linha de comando e serviço)
+QUERY_CACHE_MAX = 5000  # Consultas guardadas (~1.5 KB cada com 384 dimensões)
+QUERY_CACHE_SALVAR_A_CADA = 20  # Grava no disco a cada N consultas novas (e ao sair)
+
+# Serviço local de busca (servidor_busca.py): modelo e índice ficam quentes
+SERVICO_HOST = '127.0.0.1'
+SERVICO_PORTA = 8765
+SERVICO_JANELA_MS = 5  # Espera por outras requisições para agrupar o encode
+SERVICO_LOTE_MAX = 64  # Máximo de textos por chamada do modelo
+SERVICO_LIMITE_MAX = 1000  # Maior 'limite' de resultados aceito por consulta no serviço
+BUSCA_SERVICO_URL = None  # Ex: 'http://127.0.0.1:8765' faz o menu buscar pelo serviço
+
+# Alertas de buscas salvas (avaliados depois de cada processamento)
+ALERTA_SCORE_MINIMO = 0.6  # Padrão de 'score_minimo' de cada busca salva
+ALERTA_MAX_POR_BUSCA = 50  # Lotes listados por busca no resumo
+
+# Índice aproximado (ANN) da busca semântica: só vale a pena em acervos grandes
+ANN_ATIVO = True
+ANN_MIN_LINHAS = 50000  # Abaixo disso a varredura exata é mais rápida (e o índice nem é criado)
+ANN_LISTAS = None  # Nº de listas do IVF (None = 4 x raiz(linhas))
+ANN_NPROBE = 16  # Listas visitadas por consulta: mais = melhor recall, mais lento
+ANN_PQ_SUBESPACOS = 0  # 0 = sem PQ; ex: 48 (384 dims -> 48 bytes por vetor)
+ANN_RERANQUEAMENTO = 500  # Com PQ: candidatos confirmados com o produto exato
+ANN_CANDIDATOS = 200  # Linhas semânticas trazidas pelo ANN por consulta
+ANN_ITERACOES = 10
+ANN_AMOSTRA_POR_LISTA = 64  # Tamanho da amostra de treino do k-means
+
+# Instrumentação (modules/instrumentacao.py): tempos por etapa e contadores de fallback.
+# A automação diária liga sozinha; aqui vale para menu, linha de comando e serviço.
+INSTRUMENTACAO_ATIVA = False
+INSTRUMENTACAO_AMOSTRAS = 10000  # Durações guardadas por etapa para os percentis
@@ -1,6 +1,7 @@
 import sys
 import os
 import time
+import importlib.util
 
 # Adiciona a pasta atual ao path para importação funcionar
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
@@ -20,8 +21,17 @@ def print_logo():
     print(Fore.CYAN + Style.BRIGHT + "         >>> Powered by Playwright & AI <<<")
     print(Fore.CYAN + Style.BRIGHT + "="*60 + "\n")
 
+def faltando(*modulos):
+    """Módulos não instalados (só consulta o disco: nada é importado aqui)."""
+    return [m for m in modulos if importlib.util.find_spec(m) is None]
+
 def menu_scraping():
     """Sub-menu para escolher o tipo de raspagem e disparar a IA em seguida"""
+    if faltando("playwright"):
+        print(Fore.RED + "❌ O Playwright não está instalado: não dá para acessar o site.")
+        print("Rode: pip install playwright && playwright install chromium")
+        return
+
     print(Fore.YELLOW + "Escolha a categoria para raspar e atualizar a IA:")
     print("1. 🏗️  Materiais Genéricos (Móveis, Ferramentas, Sucata)")
     print("2. 🚗  Veículos")
@@ -57,10 +67,14 @@ def menu_scraping():
         ai_processor.gerar_inteligencia()
         print(Fore.GREEN + "✅ Ciclo completo (Download + IA) finalizado com sucesso!" + Style.RESET_ALL)
 
-def menu_principal():
+def menu_principal(ausentes=()):
     while True:
         limpar_tela()
         print_logo()
+        if ausentes:
+            print(Fore.YELLOW + f"⚠️  Dependências faltando: {', '.join(ausentes)} "
+                  "(pip install playwright sentence-transformers torch colorama)")
+            print(Fore.YELLOW + "   Sem elas a coleta fica indisponível e a busca funciona só no texto.\n")
         
         print(Fore.WHITE + "1. " + Fore.GREEN + "📥 Atualizar Tudo (Scraping do Site + Processar IA)")
         print(Fore.WHITE + "2. " + Fore.MAGENTA + "🧠 Reprocessar Apenas IA (Sem acessar o site)")
@@ -81,7 +95,8 @@ def menu_principal():
             input(Fore.BLUE + "\nPressione Enter para voltar ao menu...")
         
         elif opcao == '3':
-            termo = input(Fore.CYAN + "\nDigite o que procura (ex: 'Furadeira', 'Mesa'): " + Style.RESET_ALL)
+            print(Fore.WHITE + "\n   Filtros opcionais: cidade:juatuba  uf:mg  dias:7  data:16/12/25  leilao:8171  categoria:15")
+            termo = input(Fore.CYAN + "Digite o que procura (ex: 'Furadeira', 'Mesa cidade:juatuba dias:7'): " + Style.RESET_ALL)
             searcher.realizar_busca(termo)
             input(Fore.BLUE + "\nPressione Enter para voltar ao menu...")
         
@@ -93,12 +108,5 @@ def menu_principal():
             time.sleep(1)
 
 if __name__ == "__main__":
-    # Verificação básica de libs
-    try:
-        import playwright
-        import sentence_transformers
-        menu_principal()
-    except ImportError as e:
-        print(Fore.RED + "❌ Erro de Dependências!")
-        print(f"Falta instalar: {e.name}")
-        print("Rode: pip install playwright sentence-transformers torch colorama")
\ No newline at end of file
+    # Verificação básica de libs (sem importá-las: o torch sozinho leva segundos)
+    menu_principal(faltando("playwright", "sentence_transformers"))
\ No newline at end of file
@@ -1,53 +1,161 @@
-import json
-import pickle
 import os
+import importlib.util
+import numpy as np
 import config
+from modules import embedding_store
+from modules import lexical
+from modules import ann_index
+from modules import facets
+from modules import lot_store
+from modules import codificador
+from modules.campos_lote import cl_do_item
+from modules.instrumentacao import trecho, contar, registrar
+
+# O import de verdade (que puxa o torch) só acontece se houver texto novo para vetorizar
+AI_AVAILABLE = importlib.util.find_spec("sentence_transformers") is not None
 
-try:
-    from sentence_transformers import SentenceTransformer
-    AI_AVAILABLE = True
-except ImportError:
-    AI_AVAILABLE = False
 
 def gerar_inteligencia():
+    with trecho("processamento.total"):
+        _gerar_inteligencia()
+
+
+def _gerar_inteligencia():
     if not AI_AVAILABLE:
         print("❌ Erro: Biblioteca 'sentence-transformers' não instalada.")
         print("   Rode: pip install sentence-transformers")
         return
 
-    if not os.path.exists(config.RAW_DATA_FILE):
-        print("❌ Erro: Arquivo de dados brutos não encontrado.")
+    with trecho("processamento.abrir_lotes"):
+        acervo = lot_store.abrir_lotes()
+    if not acervo.existe():
+        print("❌ Erro: Acervo de lotes não encontrado.")
         print("   Rode a opção 1 (Scraper) primeiro.")
         return
 
-    print("🧠 Carregando modelo de IA (isso pode demorar na primeira vez)...")
-    model = SentenceTransformer(config.MODEL_NAME)
-
-    print("📂 Lendo dados brutos...")
-    with open(config.RAW_DATA_FILE, 'r', encoding='utf-8') as f:
-        dados = json.load(f)
-
-    textos_para_vetorizar = []
-    dados_processados = []
-
-    print(f"⚙️  Processando {len(dados)} itens...")
-    
-    for item in dados:
-        # Criamos um texto rico para a IA entender
-        # Juntamos Lote + Data + Descrição para a busca pegar qualquer coisa
-        conteudo_vetor = f"Lote {item['lote']} Data {item['data']}. {item['texto_completo']}"
-        textos_para_vetorizar.append(conteudo_vetor)
-        dados_processados.append(item)
-
-    print("🔢 Gerando Embeddings (Cálculos matemáticos)...")
-    embeddings = model.encode(textos_para_vetorizar, convert_to_tensor=True, show_progress_bar=True)
-
-    # Salvando os vetores (Embeddings)
-    with open(config.EMBEDDINGS_FILE, 'wb') as f:
-        pickle.dump(embeddings, f)
-    
-    # Salvando os dados correspondentes (para sabermos qual vetor é qual produto)
-    with open(config.PROCESSED_DATA_FILE, 'w', encoding='utf-8') as f:
-        json.dump(dados_processados, f, ensure_ascii=False, indent=4)
-
-    print("✅ Processamento de IA concluído! Sistema pronto para buscas.")
\ No newline at end of file
+    textos_para_vetorizar = []  # Descrições ÚNICAS (uma linha da matriz cada)
+    linha_por_texto = {}
+    # Do lote só ficam o 'cl' e a linha do vetor; BM25 e facetas recebem cada
+    # item na passagem e guardam só o que usam, então o item inteiro
+    # (com 'texto_bruto_com_quebras') é descartado logo em seguida
+    cls = []
+    linhas_dos_lotes = []
+    acumulador_bm25 = lexical.AcumuladorBM25()
+    acumulador_facetas = facets.AcumuladorFacetas()
+
+    print(f"⚙️  Processando {len(acervo)} itens (ignorando os expirados)...")
+
+    with trecho("processamento.preparar"):
+        # Lotes que sumiram do site (modo incremental do scraper) não entram na busca
+        for item in acervo.iterar(incluir_expirados=False):
+            # Só a descrição vai para a IA. Lote/Data/Local ficam nos campos do item
+            # (servem de filtro); assim lotes com a mesma descrição compartilham o vetor.
+            conteudo_vetor = " ".join(item['texto_completo'].split())
+            if conteudo_vetor not in linha_por_texto:
+                linha_por_texto[conteudo_vetor] = len(textos_para_vetorizar)
+                textos_para_vetorizar.append(conteudo_vetor)
+
+            cls.append(cl_do_item(item))
+            linhas_dos_lotes.append(linha_por_texto[conteudo_vetor])
+            acumulador_bm25.adicionar(item)
+            # Campos tipados (leilão, data, cidade, UF) a partir do texto do site
+            item.update(facets.facetas_do_item(item))
+            acumulador_facetas.adicionar(item)
+    del linha_por_texto
+    contar("processamento.lotes_ativos", len(cls))
+    contar("processamento.textos_unicos", len(textos_para_vetorizar))
+
+    if not cls:
+        print("❌ Nenhum lote ativo para processar.")
+        return
+
+    taxa_duplicacao = 1 - len(textos_para_vetorizar) / len(cls)
+    print(f"🧬 {len(cls)} lotes -> {len(textos_para_vetorizar)} descrições únicas "
+          f"(duplicação de {taxa_duplicacao:.0%}).")
+
+    # --- CACHE: só vai para o modelo o que nunca foi calculado ---
+    # O próprio arquivo de embeddings anterior serve de cache: cada linha guarda
+    # o hash (modelo + texto exato) de onde veio.
+    with trecho("processamento.cache"):
+        store_anterior = embedding_store.abrir_store()
+        linha_anterior = {}
+        if store_anterior is not None and store_anterior.modelo == config.MODEL_NAME:
+            linha_anterior = store_anterior.linha_por_hash()
+
+        hashes = [embedding_store.hash_texto(texto) for texto in textos_para_vetorizar]
+        faltando = [i for i, h in enumerate(hashes) if h not in linha_anterior]
+    contar("processamento.textos_reaproveitados", len(hashes) - len(faltando))
+
+    print(f"♻️  Cache: {len(hashes) - len(faltando)} reaproveitados, {len(faltando)} textos novos ou alterados.")
+
+    # Os vetores vão direto para o arquivo novo (memmap), bloco a bloco: nenhuma
+    # matriz completa fica na memória, nem a reaproveitada nem a calculada agora
+    gravador = embedding_store.GravadorStore(
+        config.EMBEDDINGS_FILE, len(hashes), len(cls), store_anterior.dimensao if linha_anterior else None)
+    with gravador:
+        if linha_anterior:
+            with trecho("processamento.copiar_reaproveitados"):
+                reaproveitados = [i for i, h in enumerate(hashes) if h in linha_anterior]
+                for inicio in range(0, len(reaproveitados), config.ENCODE_BLOCO):
+                    bloco = reaproveitados[inicio:inicio + config.ENCODE_BLOCO]
+                    origem = [linha_anterior[hashes[i]] for i in bloco]
+                    gravador.escrever(bloco, store_anterior.matriz[origem], normalizar=False)
+
+        # Linhas que nenhum lote atual usa simplesmente não entram no arquivo novo
+        removidos = len(linha_anterior) - (len(hashes) - len(faltando))
+        if removidos > 0:
+            print(f"🧹 {removidos} vetores antigos descartados.")
+        del store_anterior, linha_anterior
+
+        if faltando:
+            # Textos de tamanho parecido no mesmo bloco: o modelo completa cada lote
+            # interno até o maior texto dele, então misturar tamanhos é trabalho jogado fora
+            faltando.sort(key=lambda i: len(textos_para_vetorizar[i]))
+            blocos = [faltando[inicio:inicio + config.ENCODE_BLOCO]
+                      for inicio in range(0, len(faltando), config.ENCODE_BLOCO)]
+            processos, threads = codificador.dimensionar(len(blocos))
+            print(f"🧠 Carregando modelo de IA em {processos} processo(s) x {threads} thread(s) "
+                  f"(isso pode demorar na primeira vez)...")
+
+            print("🔢 Gerando Embeddings (Cálculos matemáticos)...")
+            feitos = 0
+            with trecho("processamento.encode"):
+                for bloco, novos, duracao in codificador.codificar_blocos(
+                        textos_para_vetorizar, blocos, processos, threads):
+                    # Cada chamada do modelo vira uma medição (e o progresso aparece no log)
+                    registrar("processamento.encode_bloco", duracao)
+                    gravador.escrever(bloco, novos)
+                    feitos += len(bloco)
+                    contar("processamento.textos_codificados", len(bloco))
+                    print(f"   🔢 {feitos}/{len(faltando)} textos", end="\r")
+            print()
+        else:
+            print("✨ Nada mudou desde o último processamento: modelo não precisou ser carregado.")
+
+        # Salvando os vetores (Embeddings): uma linha por descrição única, com o
+        # mapa lote 'cl' -> linha para sabermos qual vetor é de qual produto
+        with trecho("processamento.gravar_embeddings"):
+            cabecalho = gravador.concluir(
+                np.frombuffer(b"".join(hashes), dtype=np.uint8), cls, linhas_dos_lotes)
+    tamanho = os.path.getsize(config.EMBEDDINGS_FILE) / 1024 / 1024
+    print(f"💾 Embeddings salvos: {cabecalho['linhas']} x {cabecalho['dimensao']} ({cabecalho['dtype']}, {tamanho:.1f} MB).")
+
+    # Índice aproximado (IVF/PQ) para a busca semântica em acervos grandes
+    with trecho("processamento.ann"):
+        ann_index.atualizar_indice(embedding_store.abrir_store())
+
+    # Estatísticas do BM25 (IDF, tamanho dos campos): calculadas uma vez aqui,
+    # ao lado dos embeddings, para a busca só somar pesos prontos
+    with trecho("processamento.bm25"):
+        tabela_bm25 = acumulador_bm25.concluir(cls)
+        del acumulador_bm25
+        lexical.salvar_tabela_bm25(tabela_bm25)
+    print(f"📚 Tabela BM25 salva: {len(tabela_bm25['termos'])} termos.")
+
+    # Índice de facetas: filtros por leilão/data/local/categoria antes da busca
+    with trecho("processamento.facetas"):
+        colunas, vocabularios = acumulador_facetas.concluir(cls)
+        facets.salvar_facetas(colunas, vocabularios)
+    print(f"🏷️  Facetas salvas: {len(vocabularios['local'])} locais, {len(vocabularios['categorias'])} categorias.")
+
+    print("✅ Processamento de IA concluído! Sistema pronto para buscas.")
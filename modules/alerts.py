@@ -0,0 +1,283 @@
+"""
+Alertas de buscas salvas: depois de cada processamento, avisa quais lotes
+NOVOS ou ALTERADOS batem com as buscas cadastradas.
+
+Cadastro em data/buscas_salvas.json (lista):
+    [
+        {"nome": "Furadeiras MG", "consulta": "furadeira uf:mg", "score_minimo": 0.6},
+        {"nome": "Mesas", "consulta": "mesa de escritorio", "filtros": {"dias": "7"}}
+    ]
+('consulta' aceita os mesmos filtros em linha da busca; 'score_minimo' e
+'filtros' são opcionais.)
+
+O estado (data/alertas_estado.npz) guarda o hash do conteúdo de cada lote já
+avaliado e a matriz das consultas já calculadas. A cada execução:
+  - só os lotes novos/alterados são pontuados, contra a matriz de TODAS as
+    buscas num único produto de matrizes;
+  - uma busca recém-cadastrada é avaliada uma vez contra o acervo inteiro;
+  - o modelo só é carregado se alguma consulta mudou.
+Na primeira execução (sem o arquivo de estado) o acervo atual só é registrado,
+sem resumo: os alertas valem a partir dos lotes que chegarem depois.
+"""
+import hashlib
+import json
+import os
+from datetime import datetime
+import numpy as np
+import config
+from colorama import Fore, Style
+from modules import facets, searcher
+from modules.campos_lote import cl_do_item
+
+
+def hash_lote(item):
+    """Identidade do conteúdo de um lote: muda se descrição, data ou local mudarem."""
+    conteudo = "\x00".join(str(item.get(campo, "")) for campo in ("texto_completo", "lote", "data", "local"))
+    return hashlib.blake2b(conteudo.encode('utf-8'), digest_size=16).digest()
+
+
+def hash_consulta(consulta, modelo=config.MODEL_NAME):
+    return hashlib.blake2b(f"{modelo}\x00{consulta}".encode('utf-8'), digest_size=16).digest()
+
+
+def hash_busca(busca):
+    """Identidade da definição inteira (consulta, filtros, score mínimo)."""
+    definicao = json.dumps([busca["consulta"], busca["filtros"], busca["score_minimo"]], sort_keys=True)
+    return hashlib.blake2b(definicao.encode('utf-8'), digest_size=16).digest()
+
+
+def _aviso(mensagem):
+    print(Fore.YELLOW + f"⚠️  {mensagem}" + Style.RESET_ALL)
+
+
+def carregar_buscas_salvas(caminho=None):
+    """
+    Buscas cadastradas, com os campos opcionais preenchidos. Um cadastro com
+    erro (sem 'consulta', 'filtros' que não é objeto...) é ignorado com um
+    aviso: um erro de digitação não pode derrubar a automação.
+    """
+    caminho = caminho or config.BUSCAS_SALVAS_FILE
+    if not os.path.exists(caminho):
+        return []
+    try:
+        with open(caminho, 'r', encoding='utf-8') as f:
+            cadastro = json.load(f)
+    except json.JSONDecodeError as e:
+        _aviso(f"'{os.path.basename(caminho)}' não é um JSON válido ({e}). Alertas ignorados.")
+        return []
+    if not isinstance(cadastro, list):
+        _aviso(f"'{os.path.basename(caminho)}' deve ser uma lista de buscas. Alertas ignorados.")
+        return []
+
+    buscas = []
+    for posicao, busca in enumerate(cadastro, start=1):
+        if not isinstance(busca, dict) or not isinstance(busca.get("consulta"), str) \
+                or not isinstance(busca.get("filtros", {}), dict):
+            _aviso(f"Busca salva nº {posicao} ignorada: use {{\"consulta\": \"...\", \"filtros\": {{...}}}}.")
+            continue
+        busca.setdefault("nome", busca["consulta"])
+        busca.setdefault("score_minimo", config.ALERTA_SCORE_MINIMO)
+        # Como no serviço de busca: {"dias": 7} vale o mesmo que "dias:7" na consulta
+        busca["filtros"] = {chave: str(valor) for chave, valor in busca.get("filtros", {}).items()}
+        buscas.append(busca)
+    return buscas
+
+
+def carregar_estado(caminho=None):
+    """Estado da última avaliação; None na primeira execução (sem arquivo)."""
+    caminho = caminho or config.ALERTAS_ESTADO_FILE
+    if not os.path.exists(caminho):
+        return None
+    with np.load(caminho) as arquivo:
+        lotes = dict(zip(arquivo["lote_cl"].tolist(), (bytes(h) for h in arquivo["lote_hash"])))
+        consultas = dict(zip((bytes(h) for h in arquivo["consulta_hash"]), arquivo["consulta_vetor"]))
+        buscas = {bytes(h) for h in arquivo["busca_hash"]}
+        if bytes(arquivo["modelo"]).decode('utf-8') != config.MODEL_NAME:
+            consultas = {}  # Vetores de outro modelo não servem (os lotes já vistos continuam valendo)
+    return {"lotes": lotes, "consultas": consultas, "buscas": buscas}
+
+
+def salvar_estado(lotes, consultas, buscas, caminho=None):
+    caminho = caminho or config.ALERTAS_ESTADO_FILE
+    dimensao = len(next(iter(consultas.values()))) if consultas else 0
+    temporario = caminho + ".tmp.npz"
+    np.savez(
+        temporario,
+        modelo=np.frombuffer(config.MODEL_NAME.encode('utf-8'), dtype=np.uint8),
+        lote_cl=np.fromiter(lotes.keys(), dtype=np.int64, count=len(lotes)),
+        lote_hash=np.frombuffer(b"".join(lotes.values()), dtype=np.uint8).reshape(len(lotes), 16),
+        consulta_hash=np.frombuffer(b"".join(consultas.keys()), dtype=np.uint8).reshape(len(consultas), 16),
+        consulta_vetor=np.array(list(consultas.values()), dtype=np.float32).reshape(len(consultas), dimensao),
+        busca_hash=np.frombuffer(b"".join(buscas), dtype=np.uint8).reshape(len(buscas), 16),
+    )
+    os.replace(temporario, caminho)
+
+
+def vetores_das_consultas(textos, estado, get_model):
+    """Matriz das consultas; só as que não estão no estado vão para o modelo."""
+    hashes = [hash_consulta(texto) for texto in textos]
+    faltando = [i for i, h in enumerate(hashes) if h not in estado["consultas"]]
+    if faltando:
+        print(f"🧠 Calculando {len(faltando)} consultas novas ou alteradas...")
+        novos = get_model().encode([textos[i] for i in faltando], convert_to_numpy=True, normalize_embeddings=True)
+        for i, vetor in zip(faltando, novos):
+            estado["consultas"][hashes[i]] = np.asarray(vetor, dtype=np.float32)
+    matriz = np.stack([estado["consultas"][h] for h in hashes]) if hashes else np.zeros((0, 0), dtype=np.float32)
+    return matriz, hashes
+
+
+def avaliar_alertas(indice=None, get_model=None):
+    """
+    Avalia as buscas salvas contra os lotes novos/alterados e grava o resumo
+    em ALERTAS_RESUMO_FILE. Devolve o resumo (ou None se não há o que avaliar).
+    """
+    indice = indice or searcher.INDICE
+    get_model = get_model or searcher.get_model
+
+    buscas = carregar_buscas_salvas()
+    if not buscas:
+        print(f"🔕 Nenhuma busca salva em '{os.path.basename(config.BUSCAS_SALVAS_FILE)}'. Alertas ignorados.")
+        return None
+    if not indice.disponivel():
+        print(Fore.RED + "❌ Dados de inteligência não encontrados: rode o processamento antes dos alertas." + Style.RESET_ALL)
+        return None
+
+    estado_busca = indice.estado()
+    dados = estado_busca["dados"]
+    estado = carregar_estado()
+    if estado is None:
+        # Primeira avaliação: o acervo inteiro seria "novo". Só registra o que já
+        # existe (sem carregar o modelo) e não gera resumo.
+        salvar_estado({cl_do_item(item): hash_lote(item) for item in dados}, {},
+                      [hash_busca(busca) for busca in buscas])
+        print(Fore.CYAN + f"🔕 Primeira avaliação dos alertas: {len(dados)} lotes registrados como já vistos. "
+              "Os avisos começam na próxima execução." + Style.RESET_ALL)
+        return None
+
+    # --- DELTA: lotes novos ou com conteúdo diferente da última avaliação ---
+    hashes_atuais = {}
+    delta = []
+    for idx, item in enumerate(dados):
+        cl = cl_do_item(item)
+        hashes_atuais[cl] = hash_lote(item)
+        if estado["lotes"].get(cl) != hashes_atuais[cl]:
+            delta.append(idx)
+
+    # Filtros de cada busca viram a máscara dos lotes permitidos uma vez só.
+    # Filtro inválido para o acervo de hoje (ex: categoria que sumiu): a busca
+    # é pulada com um aviso, e as outras seguem normalmente.
+    textos, permitidos_por_busca, validas = [], [], []
+    for b, busca in enumerate(buscas):
+        texto, filtros_em_linha = facets.separar_filtros(busca["consulta"])
+        textos.append(texto)
+        filtros = {**filtros_em_linha, **busca["filtros"]}
+        try:
+            permitidos_por_busca.append(indice.lotes_permitidos(estado_busca, filtros) if filtros else None)
+        except ValueError as e:
+            _aviso(f"Busca salva '{busca['nome']}' ignorada nesta execução: {e}")
+            permitidos_por_busca.append(None)
+            continue
+        validas.append(b)
+
+    matriz_consultas, hashes = vetores_das_consultas(textos, estado, get_model)
+    # Busca cadastrada (ou alterada) depois da última avaliação: vale o acervo inteiro.
+    # As puladas não entram no estado: quando o filtro voltar a valer, elas contam como novas.
+    definicoes = [hash_busca(busca) for busca in buscas]
+    novas = [i for i in validas if definicoes[i] not in estado["buscas"]]
+
+    print(f"🔔 Avaliando {len(buscas)} buscas salvas: {len(delta)} lotes novos/alterados de {len(dados)}"
+          + (f", {len(novas)} buscas novas contra o acervo inteiro" if novas else "") + ".")
+
+    resultados = [[] for _ in buscas]
+    if delta and validas:
+        _pontuar(estado_busca, indice, np.array(delta, dtype=np.int64), validas,
+                 textos, permitidos_por_busca, buscas, matriz_consultas, resultados)
+    antigos = sorted(set(range(len(dados))) - set(delta))
+    if novas and antigos:
+        _pontuar(estado_busca, indice, np.array(antigos, dtype=np.int64), novas,
+                 textos, permitidos_por_busca, buscas, matriz_consultas, resultados)
+
+    resumo = {
+        "gerado_em": datetime.now().isoformat(timespec="seconds"),
+        "lotes_avaliados": len(delta),
+        "buscas": [],
+    }
+    for busca, achados in zip(buscas, resultados):
+        if not achados:
+            continue
+        achados.sort(key=lambda x: -x["score"])
+        resumo["buscas"].append({
+            "nome": busca["nome"], "consulta": busca["consulta"],
+            "novos": achados[:config.ALERTA_MAX_POR_BUSCA],
+        })
+
+    with open(config.ALERTAS_RESUMO_FILE, 'w', encoding='utf-8') as f:
+        json.dump(resumo, f, ensure_ascii=False, indent=4)
+    salvar_estado(hashes_atuais, {h: estado["consultas"][h] for h in hashes}, [definicoes[i] for i in validas])
+
+    _imprimir_resumo(resumo)
+    return resumo
+
+
+def _pontuar(estado_busca, indice, lotes, quais_buscas, textos, permitidos_por_busca, buscas, matriz_consultas,
+             resultados):
+    """
+    Pontua o subconjunto `lotes` contra as buscas `quais_buscas` de uma vez:
+    um produto (lotes x buscas) para a parte semântica e, para a parte
+    textual, o mesmo bônus léxico da busca (BUSCA_MODO_LEXICO) restrito a
+    estes lotes (o bônus depende só do próprio lote, então o resultado é o
+    mesmo da busca no acervo inteiro). `permitidos_por_busca`: máscara dos
+    filtros de cada busca (None = sem filtro).
+    """
+    dados = estado_busca["dados"]
+    linhas = estado_busca["linha_do_lote"][lotes]
+    tem_vetor = linhas >= 0
+
+    scores = np.zeros((len(lotes), len(quais_buscas)), dtype=np.float64)
+    scores[tem_vetor] = searcher.linhas_float32(estado_busca["embeddings"], linhas[tem_vetor]) @ matriz_consultas[quais_buscas].T
+
+    no_subconjunto = np.zeros(len(dados), dtype=bool)
+    no_subconjunto[lotes] = True
+    posicao = np.full(len(dados), -1, dtype=np.int64)
+    posicao[lotes] = np.arange(len(lotes))
+
+    for coluna, b in enumerate(quais_buscas):
+        permitidos = no_subconjunto
+        if permitidos_por_busca[b] is not None:
+            permitidos = no_subconjunto & permitidos_por_busca[b]
+
+        if not textos[b].strip():
+            # Busca só de filtros ('cidade:juatuba dias:7'): todo lote novo que passar
+            score = np.zeros(len(lotes))
+            textual = np.zeros(len(lotes), dtype=bool)
+            passou = np.ones(len(lotes), dtype=bool)
+        else:
+            score = scores[:, coluna].copy()
+            textual = np.zeros(len(lotes), dtype=bool)
+            bonus, com_match = indice.bonus_lexico(estado_busca, textos[b], permitidos=permitidos)
+            for idx, valor in bonus.items():
+                score[posicao[idx]] += valor
+            textual[posicao[list(com_match)]] = True
+            passou = (score > np.where(textual, 0.10, 0.35)) & (score >= buscas[b]["score_minimo"])
+        passou &= permitidos[lotes]
+
+        for pos in np.flatnonzero(passou):
+            item = dados[lotes[pos]]
+            resultados[b].append({
+                "score": round(float(score[pos]), 4),
+                "tipo_match": "Texto + IA" if textual[pos] else ("Conceito IA" if textos[b].strip() else "Filtro"),
+                "lote": item['lote'], "data": item['data'], "local": item['local'],
+                "texto_completo": item['texto_completo'], "url": item['url'],
+            })
+
+
+def _imprimir_resumo(resumo):
+    if not resumo["buscas"]:
+        print(Fore.CYAN + "🔕 Nenhum lote novo para as buscas salvas." + Style.RESET_ALL)
+        return
+    for busca in resumo["buscas"]:
+        print(Fore.GREEN + f"🔔 {busca['nome']}: {len(busca['novos'])} lote(s) novo(s)" + Style.RESET_ALL)
+        for achado in busca["novos"][:5]:
+            print(f"   [{achado['score']:.2f}] {achado['texto_completo'][:80]}")
+            print(f"   🔗 {achado['url']}")
+    print(f"💾 Resumo salvo em: {config.ALERTAS_RESUMO_FILE}")
@@ -0,0 +1,233 @@
+"""
+Índice aproximado (ANN) para a busca semântica em acervos grandes.
+
+IVF: um k-means esférico divide as linhas da matriz em `listas`; cada consulta
+só visita as `nprobe` listas de centróide mais próximo. Com PQ opcional, cada
+vetor vira `subespacos` bytes (código do centróide mais próximo em cada fatia
+da dimensão). A consulta pontua os códigos por tabela (ADC) e confirma os
+melhores com o produto exato na matriz original.
+
+Arquivo (.npz): centróides, 'ordem' (linhas agrupadas por lista), 'inicio'
+(onde cada lista começa em 'ordem') e, com PQ, os codebooks e os códigos já
+na mesma ordem. A 'impressao' amarra o índice ao arquivo de embeddings.
+"""
+import hashlib
+import json
+import os
+import numpy as np
+import config
+
+
+def impressao_store(store):
+    """Identifica o conteúdo do arquivo de embeddings (linhas + hashes dos textos)."""
+    h = hashlib.sha256(np.ascontiguousarray(store.hashes).tobytes())
+    h.update(f"{store.modelo}:{store.linhas}x{store.dimensao}".encode('utf-8'))
+    return h.hexdigest()
+
+
+def listas_padrao(linhas):
+    """Regra usual do IVF: ~4 x raiz(n) listas."""
+    return max(1, min(65536, int(4 * np.sqrt(linhas))))
+
+
+def _mais_proximos(X, centroides, esferico, bloco=65536):
+    """Centróide mais próximo de cada linha, em blocos para não estourar a memória."""
+    saida = np.empty(len(X), dtype=np.int32)
+    meia_norma = None if esferico else 0.5 * np.einsum('ij,ij->i', centroides, centroides)
+    for inicio in range(0, len(X), bloco):
+        produto = np.asarray(X[inicio:inicio + bloco], dtype=np.float32) @ centroides.T
+        if meia_norma is not None:
+            produto -= meia_norma  # argmin ||x - c||² == argmax (x·c - ||c||²/2)
+        saida[inicio:inicio + bloco] = produto.argmax(axis=1)
+    return saida
+
+
+def _kmeans(X, k, iteracoes, rng, esferico):
+    """k-means simples (Lloyd). Esférico = centróides normalizados, para cosseno."""
+    X = np.asarray(X, dtype=np.float32)
+    k = min(k, len(X))
+    centroides = X[rng.choice(len(X), k, replace=False)].copy()
+
+    for _ in range(iteracoes):
+        rotulos = _mais_proximos(X, centroides, esferico)
+        # Soma por grupo: ordena pelos rótulos e soma fatias contíguas (reduceat)
+        ordem = np.argsort(rotulos, kind='stable')
+        contagem = np.bincount(rotulos, minlength=k).astype(np.float32)
+        presentes = np.flatnonzero(contagem)
+        somas = np.zeros_like(centroides)
+        inicios = np.concatenate(([0], np.cumsum(contagem[presentes])[:-1])).astype(np.int64)
+        somas[presentes] = np.add.reduceat(X[ordem], inicios, axis=0)
+
+        vazios = contagem == 0
+        if vazios.any():
+            # Lista vazia recebe um ponto qualquer (evita centróide morto)
+            somas[vazios] = X[rng.choice(len(X), int(vazios.sum()), replace=False)]
+            contagem[vazios] = 1
+        centroides = somas / contagem[:, None]
+        if esferico:
+            centroides /= np.maximum(np.linalg.norm(centroides, axis=1, keepdims=True), 1e-12)
+    return centroides
+
+
+def construir_indice(matriz, listas=None, subespacos=None, amostra=None, iteracoes=None, semente=0, base=None):
+    """
+    Treina o IVF (e o PQ, se `subespacos` > 0) sobre a matriz normalizada.
+    Com `base` (um IndiceANN anterior), reaproveita os centróides e codebooks
+    já treinados e só redistribui as linhas.
+    Devolve o dicionário de arrays que vai para o .npz.
+    """
+    linhas, dimensao = matriz.shape
+    listas = listas or config.ANN_LISTAS or listas_padrao(linhas)
+    subespacos = config.ANN_PQ_SUBESPACOS if subespacos is None else subespacos
+    iteracoes = iteracoes or config.ANN_ITERACOES
+    amostra = amostra or max(config.ANN_AMOSTRA_POR_LISTA * listas, 10000)
+    rng = np.random.default_rng(semente)
+
+    # Treina numa amostra; a atribuição final é feita para todas as linhas
+    if base is not None:
+        centroides = base.centroides
+        treino = None
+    else:
+        escolhidas = np.sort(rng.choice(linhas, min(amostra, linhas), replace=False))
+        treino = np.asarray(matriz[escolhidas], dtype=np.float32)
+        centroides = _kmeans(treino, listas, iteracoes, rng, esferico=True)
+    rotulos = _mais_proximos(matriz, centroides, esferico=True)
+
+    ordem = np.argsort(rotulos, kind='stable').astype(np.int64)
+    inicio = np.zeros(len(centroides) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rotulos, minlength=len(centroides)), out=inicio[1:])
+
+    indice = {"centroides": centroides, "ordem": ordem, "inicio": inicio}
+
+    if subespacos:
+        if dimensao % subespacos:
+            raise ValueError(f"A dimensão {dimensao} não é divisível por {subespacos} subespaços do PQ.")
+        fatia = dimensao // subespacos
+        if base is not None:
+            codebooks = base.pq_codebooks
+        else:
+            codebooks = np.empty((subespacos, min(256, len(treino)), fatia), dtype=np.float32)
+        codigos = np.empty((linhas, subespacos), dtype=np.uint8)
+        for j in range(subespacos):
+            parte = slice(j * fatia, (j + 1) * fatia)
+            if base is None:
+                codebooks[j] = _kmeans(treino[:, parte], codebooks.shape[1], iteracoes, rng, esferico=False)
+            for bloco in range(0, linhas, 65536):
+                sub = np.asarray(matriz[bloco:bloco + 65536, parte], dtype=np.float32)
+                codigos[bloco:bloco + 65536, j] = _mais_proximos(sub, codebooks[j], esferico=False)
+        # Códigos na ordem das listas: cada lista vira uma fatia contígua
+        indice["pq_codebooks"] = codebooks
+        indice["pq_codigos"] = codigos[ordem]
+
+    return indice
+
+
+def gravar_indice(indice, impressao, linhas_treino, caminho=None):
+    caminho = caminho or config.ANN_FILE
+    meta = {"versao": 1, "impressao": impressao, "linhas_treino": int(linhas_treino)}
+    temporario = caminho + ".tmp.npz"
+    np.savez(temporario, meta=np.frombuffer(json.dumps(meta).encode('utf-8'), dtype=np.uint8), **indice)
+    os.replace(temporario, caminho)
+
+
+class IndiceANN:
+    """IVF(+PQ) carregado na memória; `buscar` devolve (linhas, scores) aproximados."""
+
+    def __init__(self, arrays):
+        self.meta = json.loads(bytes(arrays["meta"]).decode('utf-8'))
+        self.centroides = arrays["centroides"]
+        self.ordem = arrays["ordem"]
+        self.inicio = arrays["inicio"]
+        self.pq_codebooks = arrays.get("pq_codebooks")
+        self.pq_codigos = arrays.get("pq_codigos")
+
+    @classmethod
+    def abrir(cls, caminho=None):
+        caminho = caminho or config.ANN_FILE
+        if not os.path.exists(caminho):
+            return None
+        with np.load(caminho) as arquivo:
+            return cls({nome: arquivo[nome] for nome in arquivo.files})
+
+    @property
+    def impressao(self):
+        return self.meta["impressao"]
+
+    def _posicoes_visitadas(self, consulta, nprobe):
+        """Posições (em 'ordem') das listas mais próximas da consulta."""
+        nprobe = min(nprobe, len(self.centroides))
+        proximidade = self.centroides @ consulta
+        listas = np.argpartition(-proximidade, nprobe - 1)[:nprobe]
+        return np.concatenate([np.arange(self.inicio[l], self.inicio[l + 1]) for l in listas])
+
+    def buscar(self, matriz, consulta, k, nprobe=None, reranqueamento=None):
+        """
+        Top-`k` linhas aproximadas para `consulta` (vetor normalizado).
+        Sem PQ o score das listas visitadas já é exato; com PQ os
+        `reranqueamento` melhores pelo código são confirmados na `matriz`.
+        """
+        nprobe = nprobe or config.ANN_NPROBE
+        consulta = np.asarray(consulta, dtype=np.float32)
+        posicoes = self._posicoes_visitadas(consulta, nprobe)
+        if len(posicoes) == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        linhas = self.ordem[posicoes]
+
+        if self.pq_codigos is not None:
+            # ADC: tabela [subespaço x código] com o produto da fatia da consulta
+            subespacos, _, fatia = self.pq_codebooks.shape
+            tabela = np.einsum('jcf,jf->jc', self.pq_codebooks, consulta.reshape(subespacos, fatia))
+            codigos = self.pq_codigos[posicoes]
+            aproximado = tabela[np.arange(subespacos), codigos].sum(axis=1)
+
+            reranqueamento = max(k, reranqueamento or config.ANN_RERANQUEAMENTO)
+            if len(linhas) > reranqueamento:
+                melhores = np.argpartition(-aproximado, reranqueamento - 1)[:reranqueamento]
+                linhas = linhas[melhores]
+
+        scores = np.asarray(matriz[linhas], dtype=np.float32) @ consulta
+        if len(linhas) > k:
+            melhores = np.argpartition(-scores, k - 1)[:k]
+            linhas, scores = linhas[melhores], scores[melhores]
+        ordem = np.argsort(-scores, kind='stable')
+        return linhas[ordem], scores[ordem]
+
+
+def atualizar_indice(store, caminho=None):
+    """
+    Chamado pelo processamento da IA: (re)constrói o índice se o acervo é
+    grande o bastante e o índice salvo não corresponde mais aos embeddings.
+    Abaixo de ANN_MIN_LINHAS a varredura exata é mais rápida e o índice é removido.
+    """
+    caminho = caminho or config.ANN_FILE
+    if not config.ANN_ATIVO or store.linhas < config.ANN_MIN_LINHAS:
+        if os.path.exists(caminho):
+            os.remove(caminho)
+        return None
+
+    impressao = impressao_store(store)
+    atual = IndiceANN.abrir(caminho)
+    if atual is not None and atual.impressao == impressao:
+        print("🗂️  Índice ANN já está em dia.")
+        return atual
+
+    # Os centróides continuam bons enquanto o acervo não mudar muito de tamanho:
+    # nesse caso só redistribui as linhas (bem mais rápido que treinar de novo)
+    subespacos = config.ANN_PQ_SUBESPACOS
+    reaproveitar = (
+        atual is not None
+        and atual.centroides.shape[1] == store.dimensao
+        and (atual.pq_codigos.shape[1] if atual.pq_codigos is not None else 0) == subespacos
+        and store.linhas <= 2 * atual.meta.get("linhas_treino", 0)
+    )
+    if reaproveitar:
+        print(f"🗂️  Atualizando índice ANN ({store.linhas} vetores, centróides reaproveitados)...")
+        linhas_treino = atual.meta["linhas_treino"]
+    else:
+        print(f"🗂️  Construindo índice ANN para {store.linhas} vetores...")
+        linhas_treino = store.linhas
+    indice = construir_indice(store.matriz, base=atual if reaproveitar else None)
+    gravar_indice(indice, impressao, linhas_treino, caminho)
+    pq = f", PQ {indice['pq_codigos'].shape[1]} bytes/vetor" if "pq_codigos" in indice else ""
+    print(f"✅ Índice ANN salvo: {len(indice['centroides'])} listas{pq}.")
+    return IndiceANN.abrir(caminho)
@@ -0,0 +1,27 @@
+"""
+Campos do lote usados em todo o pipeline (scraper, acervo, embeddings, busca).
+Não depende de nenhum outro módulo do projeto: quem está embaixo (o acervo)
+pode importar daqui sem puxar o scraper ou o arquivo de embeddings.
+"""
+import re
+
+
+def limpar_texto(texto):
+    """Espaços e quebras de linha viram um espaço só: a descrição em uma linha."""
+    if not texto:
+        return ""
+    return " ".join(texto.split())
+
+
+def extrair_cl(url):
+    """Pega o ID do lote da URL: lotem.php?cl=1466396 -> 1466396"""
+    match = re.search(r'[?&]cl=(\d+)', url or "")
+    return int(match.group(1)) if match else None
+
+
+def cl_do_item(item):
+    """ID 'cl' do lote (campo do scraper incremental ou extraído da URL); -1 se não houver."""
+    if item.get('cl') is not None:
+        return int(item['cl'])
+    cl = extrair_cl(item.get('url', ''))
+    return cl if cl is not None else -1
@@ -0,0 +1,93 @@
+"""
+Geração dos embeddings em paralelo na CPU: os blocos de textos são divididos
+entre processos, cada um com o seu modelo carregado e um número fixo de threads
+do torch (os processos não disputam os mesmos núcleos).
+
+    processos, threads = dimensionar(len(blocos))
+    for posicoes, vetores, duracao in codificar_blocos(textos, blocos, processos, threads):
+        gravador.escrever(posicoes, vetores)
+
+Os blocos voltam na ordem em que terminam, não na de envio. Só alguns ficam em
+andamento por vez, então a memória não cresce com o tamanho do acervo.
+"""
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+import config
+from modules.instrumentacao import trecho
+
+_MODELO = None  # Modelo do processo trabalhador (carregado uma vez, na criação)
+
+
+def nucleos_disponiveis():
+    """Núcleos que este processo pode usar (respeita limites de container/affinity)."""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def dimensionar(quantidade_blocos, processos=None, threads=None):
+    """(processos, threads por processo) para codificar `quantidade_blocos` blocos."""
+    nucleos = nucleos_disponiveis()
+    processos = config.ENCODE_PROCESSOS if processos is None else processos
+    processos = max(1, min(processos or nucleos, quantidade_blocos))
+    threads = config.ENCODE_THREADS if threads is None else threads
+    return processos, threads or max(1, nucleos // processos)
+
+
+def _carregar_modelo(modelo, threads, dispositivo=None):
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    torch.set_num_threads(threads)
+    return SentenceTransformer(modelo, device=dispositivo)
+
+
+def _iniciar_trabalhador(modelo, threads):
+    global _MODELO
+    # Vários processos na mesma GPU só atrapalham: o paralelismo aqui é de CPU
+    _MODELO = _carregar_modelo(modelo, threads, "cpu")
+
+
+def _codificar(modelo, posicoes, textos):
+    inicio = time.perf_counter()
+    vetores = modelo.encode(textos, convert_to_numpy=True, show_progress_bar=False)
+    return posicoes, vetores, time.perf_counter() - inicio
+
+
+def _codificar_no_trabalhador(posicoes, textos):
+    return _codificar(_MODELO, posicoes, textos)
+
+
+def codificar_blocos(textos, blocos, processos=1, threads=None, modelo=config.MODEL_NAME):
+    """
+    Codifica os textos de cada bloco (lista de posições em `textos`) e devolve,
+    bloco a bloco, (posições, vetores, segundos no modelo).
+    """
+    threads = threads or nucleos_disponiveis()
+    if processos <= 1:
+        with trecho("processamento.carregar_modelo"):
+            modelo_local = _carregar_modelo(modelo, threads)
+        for posicoes in blocos:
+            yield _codificar(modelo_local, posicoes, [textos[i] for i in posicoes])
+        return
+
+    # 'spawn': processos novos, sem herdar o estado de threads do pai (fork + torch pode travar)
+    contexto = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(processos, mp_context=contexto, initializer=_iniciar_trabalhador,
+                             initargs=(modelo, threads)) as pool:
+        pendentes = iter(blocos)
+        em_andamento = set()
+        while True:
+            # Dois blocos por processo: ninguém fica parado esperando, e a fila não cresce
+            while len(em_andamento) < 2 * processos:
+                posicoes = next(pendentes, None)
+                if posicoes is None:
+                    break
+                em_andamento.add(pool.submit(_codificar_no_trabalhador, posicoes, [textos[i] for i in posicoes]))
+            if not em_andamento:
+                break
+            prontos, em_andamento = wait(em_andamento, return_when=FIRST_COMPLETED)
+            for futuro in prontos:
+                yield futuro.result()
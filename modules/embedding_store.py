@@ -0,0 +1,228 @@
+"""
+Formato em disco dos embeddings (substitui o pickle de tensor do torch).
+
+Layout do arquivo (tudo little-endian, seções alinhadas em 64 bytes):
+
+    MAGIC (8 bytes) | versão (uint32) | tamanho do cabeçalho (uint32)
+    cabeçalho JSON: modelo, dimensão, dtype, linhas, lotes e offsets das seções
+    matriz     [linhas x dimensão]  float16/float32, vetores já normalizados
+    hashes     [linhas x 32]        uint8, sha256(modelo + texto) de cada linha
+    lote_cl    [lotes]              int64, ID 'cl' de cada lote
+    lote_linha [lotes]              int32, linha da matriz usada por cada lote
+
+Todas as seções são abertas com numpy.memmap: nada é lido até ser usado.
+"""
+import json
+import os
+import hashlib
+import struct
+import numpy as np
+import config
+from modules.campos_lote import cl_do_item
+
+MAGIC = b"PLEMBED\x00"
+VERSAO = 1
+ALINHAMENTO = 64
+
+
+def hash_texto(texto, modelo=config.MODEL_NAME):
+    """Identidade de um vetor: o texto exato que foi para o modelo + o nome do modelo."""
+    return hashlib.sha256(f"{modelo}\x00{texto}".encode('utf-8')).digest()
+
+
+def _alinhar(posicao):
+    return (posicao + ALINHAMENTO - 1) // ALINHAMENTO * ALINHAMENTO
+
+
+def normalizar_linhas(matriz):
+    """Normaliza cada vetor (norma 1): o cosseno vira um simples produto escalar."""
+    matriz = np.asarray(matriz, dtype=np.float32)
+    normas = np.linalg.norm(matriz, axis=1, keepdims=True)
+    normas[normas == 0] = 1.0
+    return matriz / normas
+
+
+class GravadorStore:
+    """
+    Grava o arquivo de embeddings aos poucos: a matriz vai direto para o disco
+    (memmap do arquivo temporário), bloco a bloco e em qualquer ordem. Hashes,
+    mapa lote -> linha e cabeçalho entram no final (`concluir`), com a troca
+    atômica do arquivo. Só o bloco sendo escrito fica na memória.
+
+    A dimensão pode ficar para o primeiro bloco (quando o modelo só roda depois).
+    """
+
+    def __init__(self, caminho, linhas, lotes, dimensao=None, modelo=config.MODEL_NAME, dtype=None):
+        self.caminho = caminho
+        self.temporario = caminho + ".tmp"
+        self.linhas = int(linhas)
+        self.lotes = int(lotes)
+        self.modelo = modelo
+        self.dtype = np.dtype(dtype or config.EMBEDDINGS_DTYPE)
+        self.cabecalho = None
+        self.matriz = None
+        if dimensao is not None:
+            self._preparar(dimensao)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo_erro, *_erro):
+        if tipo_erro is not None:
+            self.descartar()
+        return False
+
+    def _preparar(self, dimensao):
+        # O cabeçalho depende dos offsets, que dependem do tamanho do cabeçalho:
+        # reservamos um espaço generoso e alinhado para ele.
+        cabecalho = {
+            "modelo": self.modelo, "dimensao": int(dimensao), "dtype": self.dtype.name,
+            "linhas": self.linhas, "lotes": self.lotes, "normalizado": True, "offsets": {},
+        }
+        inicio_dados = _alinhar(16 + len(json.dumps(cabecalho)) + 256)
+        tamanhos = [("matriz", self.linhas * int(dimensao) * self.dtype.itemsize), ("hashes", self.linhas * 32),
+                    ("lote_cl", self.lotes * 8), ("lote_linha", self.lotes * 4)]
+        posicao = inicio_dados
+        for nome, tamanho in tamanhos:
+            cabecalho["offsets"][nome] = posicao
+            posicao = _alinhar(posicao + tamanho)
+
+        # Arquivo já no tamanho final (esparso: nada é escrito até os blocos chegarem)
+        with open(self.temporario, 'wb') as f:
+            f.truncate(posicao)
+        if self.linhas and dimensao:
+            self.matriz = np.memmap(self.temporario, mode='r+', dtype=self.dtype, shape=(self.linhas, int(dimensao)),
+                                    offset=cabecalho["offsets"]["matriz"])
+        self.cabecalho = cabecalho
+
+    def escrever(self, linhas, vetores, normalizar=True):
+        """Grava `vetores` nas `linhas` da matriz (`normalizar=False`: já vêm de um arquivo gravado)."""
+        vetores = np.asarray(vetores)
+        if self.cabecalho is None:
+            self._preparar(vetores.shape[1])
+        if len(vetores):
+            self.matriz[linhas] = (normalizar_linhas(vetores) if normalizar else vetores).astype(self.dtype)
+
+    def concluir(self, hashes, lote_cl, lote_linha):
+        """Grava o restante e troca o arquivo antigo pelo novo; devolve o cabeçalho."""
+        if self.cabecalho is None:
+            self._preparar(0)
+        if self.matriz is not None:
+            self.matriz.flush()
+            self.matriz = None  # Fecha o memmap antes da troca (no Windows é obrigatório)
+
+        secoes = [("hashes", np.asarray(hashes, dtype=np.uint8).reshape(self.linhas, 32)),
+                  ("lote_cl", np.asarray(lote_cl, dtype='<i8')), ("lote_linha", np.asarray(lote_linha, dtype='<i4'))]
+        bruto = json.dumps(self.cabecalho).encode('utf-8')
+        assert 16 + len(bruto) <= self.cabecalho["offsets"]["matriz"]
+        assert len(secoes[1][1]) == len(secoes[2][1]) == self.lotes
+
+        with open(self.temporario, 'r+b') as f:
+            f.write(MAGIC + struct.pack('<II', VERSAO, len(bruto)) + bruto)
+            for nome, array in secoes:
+                f.seek(self.cabecalho["offsets"][nome])
+                f.write(np.ascontiguousarray(array).tobytes())
+        os.replace(self.temporario, self.caminho)
+        return self.cabecalho
+
+    def descartar(self):
+        self.matriz = None
+        if os.path.exists(self.temporario):
+            os.remove(self.temporario)
+
+
+def gravar_store(caminho, matriz, hashes, lote_cl, lote_linha, modelo=config.MODEL_NAME, dtype=None):
+    """Grava o arquivo completo de forma atômica (arquivo temporário + rename)."""
+    matriz = np.asarray(matriz, dtype=np.float32)
+    with GravadorStore(caminho, matriz.shape[0], len(lote_cl), matriz.shape[1], modelo, dtype) as gravador:
+        gravador.escrever(slice(None), matriz)
+        return gravador.concluir(hashes, lote_cl, lote_linha)
+
+
+class EmbeddingStore:
+    """Arquivo de embeddings aberto via memmap (somente leitura)."""
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        with open(caminho, 'rb') as f:
+            inicio = f.read(16)
+            if len(inicio) < 16 or inicio[:8] != MAGIC:
+                raise ValueError(f"'{caminho}' não é um arquivo de embeddings válido.")
+            versao, tamanho = struct.unpack('<II', inicio[8:])
+            if versao != VERSAO:
+                raise ValueError(f"Versão {versao} do arquivo de embeddings não suportada (esperada {VERSAO}).")
+            self.cabecalho = json.loads(f.read(tamanho))
+
+        c = self.cabecalho
+        self.modelo = c["modelo"]
+        self.dimensao = c["dimensao"]
+        self.linhas = c["linhas"]
+        self.lotes = c["lotes"]
+        self.matriz = self._abrir("matriz", np.dtype(c["dtype"]), (self.linhas, self.dimensao))
+        self.hashes = self._abrir("hashes", np.uint8, (self.linhas, 32))
+        self.lote_cl = self._abrir("lote_cl", np.dtype('<i8'), (self.lotes,))
+        self.lote_linha = self._abrir("lote_linha", np.dtype('<i4'), (self.lotes,))
+
+    def _abrir(self, secao, dtype, shape):
+        if 0 in shape:
+            return np.zeros(shape, dtype=dtype)
+        return np.memmap(self.caminho, mode='r', dtype=dtype, shape=shape,
+                         offset=self.cabecalho["offsets"][secao])
+
+    def linha_por_hash(self):
+        """{hash: linha} - usado como cache para não recalcular vetores já conhecidos."""
+        return {bytes(h): i for i, h in enumerate(self.hashes)}
+
+    def linha_por_cl(self):
+        return {int(cl): int(linha) for cl, linha in zip(self.lote_cl, self.lote_linha)}
+
+
+def abrir_store(caminho=None):
+    """Abre o arquivo de embeddings; None se ele ainda não existe."""
+    caminho = caminho or config.EMBEDDINGS_FILE
+    if not os.path.exists(caminho):
+        return None
+    return EmbeddingStore(caminho)
+
+
+# --- CONVERSÃO DO FORMATO ANTIGO (pickle do torch) ---
+
+def converter_pickle_legado(origem=None, dados_path=None, destino=None):
+    """
+    Converte uma única vez o 'embeddings.pkl' antigo para o novo formato.
+    Precisa do torch só aqui, para desempacotar o tensor.
+    """
+    import pickle
+
+    origem = origem or config.LEGACY_EMBEDDINGS_FILE
+    dados_path = dados_path or config.PROCESSED_DATA_FILE
+    destino = destino or config.EMBEDDINGS_FILE
+
+    print(f"🔄 Convertendo '{os.path.basename(origem)}' para o formato memmap...")
+    with open(origem, 'rb') as f:
+        tensor = pickle.load(f)
+    matriz = tensor.detach().cpu().numpy() if hasattr(tensor, "detach") else np.asarray(tensor)
+
+    with open(dados_path, 'r', encoding='utf-8') as f:
+        dados = json.load(f)
+
+    lote_cl = [cl_do_item(item) for item in dados]
+    lote_linha = [item.get('vetor_idx', idx) for idx, item in enumerate(dados)]
+
+    # Só dá para reconstruir o hash quando a linha é a descrição pura (arquivos com
+    # 'vetor_idx'); nos mais antigos o texto tinha Lote/Data junto e o hash fica zerado.
+    hashes = np.zeros((len(matriz), 32), dtype=np.uint8)
+    for item in dados:
+        if 'vetor_idx' in item:
+            texto = " ".join(item['texto_completo'].split())
+            hashes[item['vetor_idx']] = np.frombuffer(hash_texto(texto), dtype=np.uint8)
+
+    cabecalho = gravar_store(destino, matriz, hashes, lote_cl, lote_linha)
+    tamanho_antigo = os.path.getsize(origem) / 1024 / 1024
+    tamanho_novo = os.path.getsize(destino) / 1024 / 1024
+    print(f"✅ {cabecalho['linhas']} vetores convertidos ({tamanho_antigo:.1f} MB -> {tamanho_novo:.1f} MB).")
+    return cabecalho
+
+
+if __name__ == "__main__":
+    converter_pickle_legado()
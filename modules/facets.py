@@ -0,0 +1,246 @@
+"""
+Índice de facetas dos lotes: nº do leilão, data, local e categoria em colunas
+tipadas (numpy), para restringir os candidatos ANTES da busca semântica/léxica.
+
+O site entrega esses dados como texto livre:
+    data  = "8171 - 16/12/25"             -> leilão 8171, dia 2025-12-16
+    local = "Br-262, Km 375 Juatuba-MG"   -> cidade 'juatuba', UF 'MG'
+e a categoria vem dos códigos de 'categoria_pesquisa' em que o lote foi visto.
+
+Filtros em linha na consulta (tudo sem acento/maiúsculas):
+    furadeira cidade:juatuba dias:7 leilao:8171 categoria:15 uf:mg data:16/12/25
+"""
+import json
+import os
+import re
+from array import array
+from datetime import date, datetime
+import numpy as np
+import config
+from modules.lexical import normalizar_texto
+
+SEM_DATA = np.iinfo(np.int32).min
+EPOCA = date(1970, 1, 1).toordinal()
+CHAVES_FILTRO = ("cidade", "uf", "local", "leilao", "categoria", "dias", "data")
+VERSAO = 2  # 2: coluna 'cidade' (arquivos antigos são remontados na carga)
+
+
+# --- INTERPRETAÇÃO DOS CAMPOS DE TEXTO ---
+
+def interpretar_data(texto):
+    """'8171 - 16/12/25' -> (8171, date(2025, 12, 16)); partes ausentes viram None."""
+    texto = texto or ""
+    leilao = re.match(r'\s*(\d+)\s*-', texto)
+    dia = re.search(r'(\d{1,2})/(\d{1,2})/(\d{2,4})', texto)
+
+    data_leilao = None
+    if dia:
+        d, m, a = (int(x) for x in dia.groups())
+        try:
+            data_leilao = date(a + 2000 if a < 100 else a, m, d)
+        except ValueError:
+            pass
+    return (int(leilao.group(1)) if leilao else None), data_leilao
+
+
+def interpretar_local(texto):
+    """
+    'Br-262, Km 375 Juatuba-MG' -> ('juatuba', 'MG').
+    A cidade é a última palavra antes do '-UF' (melhor esforço: para nomes
+    compostos, o filtro 'local:' procura no local normalizado inteiro).
+    """
+    match = re.search(r'([A-Za-zÀ-ÿ]+)\s*[-/]\s*([A-Za-z]{2})\s*$', texto or "")
+    if not match:
+        return None, None
+    return normalizar_texto(match.group(1)), match.group(2).upper()
+
+
+def facetas_do_item(item):
+    """Campos tipados de cada lote (derivados do texto do site no processamento e na busca)."""
+    leilao, data_leilao = interpretar_data(item.get('data'))
+    cidade, uf = interpretar_local(item.get('local'))
+    return {
+        "leilao": leilao,
+        "data_leilao": data_leilao.isoformat() if data_leilao else None,
+        "cidade": cidade,
+        "uf": uf,
+    }
+
+
+# --- CONSTRUÇÃO E GRAVAÇÃO ---
+
+class _Vocabulario:
+    """Coluna categórica montada aos poucos: código na ordem de chegada, ordenado no fim."""
+
+    def __init__(self):
+        self.codigo = {}
+        self.codigos = array('i')
+
+    def adicionar(self, valor):
+        self.codigos.append(-1 if valor is None else self.codigo.setdefault(valor, len(self.codigo)))
+
+    def concluir(self):
+        """(códigos int32 na ordem do vocabulário ordenado, vocabulário). None vira -1."""
+        vocabulario = sorted(self.codigo)
+        novo = np.empty(len(vocabulario) + 1, dtype=np.int32)
+        novo[[self.codigo[v] for v in vocabulario]] = np.arange(len(vocabulario), dtype=np.int32)
+        novo[-1] = -1
+        return novo[np.asarray(self.codigos, dtype=np.int64)], vocabulario
+
+
+class AcumuladorFacetas:
+    """
+    Monta as colunas lote a lote (itens já com os campos de facetas_do_item):
+    só os valores das facetas ficam guardados, já como códigos, não o item.
+    """
+
+    def __init__(self):
+        self.leilao = array('i')
+        self.dia = array('i')
+        self.local = _Vocabulario()
+        self.cidade = _Vocabulario()
+        self.uf = _Vocabulario()
+        self.categorias = _Vocabulario()  # Combinações de categorias (são poucas)
+
+    def adicionar(self, item):
+        self.leilao.append(item.get('leilao') or -1)
+        self.dia.append(date.fromisoformat(item['data_leilao']).toordinal() - EPOCA
+                        if item.get('data_leilao') else SEM_DATA)
+        self.local.adicionar(normalizar_texto(item.get('local')) or None)
+        self.cidade.adicionar(item.get('cidade'))
+        self.uf.adicionar(item.get('uf'))
+        self.categorias.adicionar(tuple(sorted(set(item.get('categorias', [])))))
+
+    def concluir(self, cls):
+        categorias_vocab = sorted({c for combinacao in self.categorias.codigo for c in combinacao})
+        if len(categorias_vocab) > 64:
+            raise ValueError("Mais de 64 categorias: não cabem na máscara de bits.")
+        bit = {c: 1 << i for i, c in enumerate(categorias_vocab)}
+        # Máscara de bits de cada combinação, indexada pelo código de chegada dela
+        mascaras = np.array([sum(bit[c] for c in combinacao) for combinacao in self.categorias.codigo],
+                            dtype=np.uint64)
+
+        locais, locais_vocab = self.local.concluir()
+        cidades, cidades_vocab = self.cidade.concluir()
+        ufs, ufs_vocab = self.uf.concluir()
+        colunas = {
+            "cl": np.asarray(cls, dtype=np.int64),
+            "leilao": np.asarray(self.leilao, dtype=np.int32),
+            "dia": np.asarray(self.dia, dtype=np.int32),
+            "local": locais,
+            "cidade": cidades,
+            "uf": ufs,
+            "categorias": mascaras[np.asarray(self.categorias.codigos, dtype=np.int64)],
+        }
+        vocabularios = {"local": locais_vocab, "cidade": cidades_vocab, "uf": ufs_vocab,
+                        "categorias": categorias_vocab}
+        return colunas, vocabularios
+
+
+def construir_facetas(dados, cls):
+    """Colunas de uma lista (ou qualquer iterável) de itens; veja AcumuladorFacetas."""
+    acumulador = AcumuladorFacetas()
+    for item in dados:
+        acumulador.adicionar(item)
+    return acumulador.concluir(cls)
+
+
+def salvar_facetas(colunas, vocabularios, caminho=None):
+    caminho = caminho or config.FACETS_FILE
+    meta = json.dumps({"versao": VERSAO, "vocabularios": vocabularios}, ensure_ascii=False)
+    temporario = caminho + ".tmp.npz"
+    np.savez(temporario, meta=np.frombuffer(meta.encode('utf-8'), dtype=np.uint8), **colunas)
+    os.replace(temporario, caminho)
+
+
+# --- FILTROS EM LINHA NA CONSULTA ---
+
+def separar_filtros(consulta):
+    """
+    'furadeira cidade:juatuba dias:7' -> ('furadeira', {'cidade': 'juatuba', 'dias': '7'}).
+    Só as chaves conhecidas viram filtro; 'abc:def' qualquer continua no texto.
+    """
+    filtros = {}
+    restante = []
+    for parte in (consulta or "").split():
+        chave, sep, valor = parte.partition(":")
+        chave = normalizar_texto(chave)
+        if sep and valor and chave in CHAVES_FILTRO:
+            filtros[chave] = valor
+        else:
+            restante.append(parte)
+    return " ".join(restante), filtros
+
+
+class IndiceFacetas:
+    """Colunas de facetas carregadas na memória; `filtrar` devolve uma máscara booleana."""
+
+    def __init__(self, colunas, vocabularios):
+        self.colunas = colunas
+        self.vocabularios = vocabularios
+        self.total = len(colunas["cl"])
+
+    @classmethod
+    def carregar(cls, caminho=None):
+        with np.load(caminho or config.FACETS_FILE) as arquivo:
+            colunas = {nome: arquivo[nome] for nome in arquivo.files if nome != "meta"}
+            meta = json.loads(bytes(arquivo["meta"]).decode('utf-8'))
+        if meta["versao"] != VERSAO:
+            return None
+        return cls(colunas, meta["vocabularios"])
+
+    def _codigos_que_contem(self, coluna, trecho):
+        trecho = normalizar_texto(trecho)
+        return [i for i, valor in enumerate(self.vocabularios[coluna]) if trecho and trecho in valor]
+
+    def filtrar(self, filtros, hoje=None):
+        """
+        Máscara das linhas que passam em TODOS os filtros.
+        Valores inválidos (ex: 'dias:abc') levantam ValueError com a explicação.
+        """
+        c = self.colunas
+        mascara = np.ones(self.total, dtype=bool)
+
+        for chave, valor in filtros.items():
+            if chave == "cidade":
+                # Igualdade com a cidade interpretada do local ('juatuba' não pega 'juatubinha')
+                cidades = {normalizar_texto(cidade) for cidade in valor.split(",")}
+                mascara &= np.isin(c["cidade"], [i for i, cidade in enumerate(self.vocabularios["cidade"])
+                                                 if cidade in cidades])
+            elif chave == "local":
+                mascara &= np.isin(c["local"], self._codigos_que_contem("local", valor))
+            elif chave == "uf":
+                mascara &= np.isin(c["uf"], [i for i, uf in enumerate(self.vocabularios["uf"]) if uf == valor.upper()])
+            elif chave == "leilao":
+                numeros = [int(n) for n in valor.split(",") if n.strip().isdigit()]
+                if not numeros:
+                    raise ValueError(f"leilao:{valor} - use o número do leilão (ex: leilao:8171).")
+                mascara &= np.isin(c["leilao"], numeros)
+            elif chave == "categoria":
+                bits = 0
+                for codigo in valor.split(","):
+                    if codigo not in self.vocabularios["categorias"]:
+                        conhecidas = ", ".join(self.vocabularios["categorias"]) or "nenhuma"
+                        raise ValueError(f"categoria:{codigo} - categoria desconhecida (conhecidas: {conhecidas}).")
+                    bits |= 1 << self.vocabularios["categorias"].index(codigo)
+                mascara &= (c["categorias"] & np.uint64(bits)) != 0
+            elif chave == "dias":
+                if not valor.isdigit():
+                    raise ValueError(f"dias:{valor} - use um número de dias (ex: dias:7).")
+                inicio = (hoje or date.today()).toordinal() - EPOCA
+                mascara &= (c["dia"] >= inicio) & (c["dia"] <= inicio + int(valor))
+            elif chave == "data":
+                try:
+                    dia = datetime.strptime(valor, "%d/%m/%y" if len(valor.split("/")[-1]) == 2 else "%d/%m/%Y")
+                except ValueError:
+                    raise ValueError(f"data:{valor} - use dd/mm/aa (ex: data:16/12/25).")
+                mascara &= c["dia"] == dia.date().toordinal() - EPOCA
+        return mascara
+
+
+def abrir_facetas(caminho=None):
+    """Abre o índice de facetas; None se ele ainda não existe (ou é de uma versão antiga)."""
+    caminho = caminho or config.FACETS_FILE
+    if not os.path.exists(caminho):
+        return None
+    return IndiceFacetas.carregar(caminho)
@@ -0,0 +1,183 @@
+import re
+from html.parser import HTMLParser
+import config
+from modules.throttle import ErroHttp
+
+# Tags que o navegador renderiza como bloco: no innerText viram quebras de linha
+# "obrigatórias" (várias seguidas contam como a maior delas; <p> vale duas).
+TAGS_BLOCO = {"div", "li", "ul", "ol", "tr", "table", "h1", "h2", "h3", "h4", "h5", "h6"}
+TAGS_PARAGRAFO = {"p"}
+TAGS_IGNORADAS = {"script", "style", "noscript"}
+
+# O CSS (white-space: normal) só junta espaços ASCII: o &nbsp; (\xa0) fica no texto
+_ESPACOS = re.compile(r"[ \t\n\r\f]+")
+_MARCAS = "\x01\x02"  # Quebra obrigatória de 1 e de 2 linhas (marcadores internos)
+
+
+def renderizar_texto(pecas):
+    """
+    Junta os pedaços coletados como o innerText do navegador: textos (espaços
+    já reduzidos a um), "\n" literais dos <br> e quebras obrigatórias (int 1/2)
+    dos blocos. Espaços colados em quebras somem, quebras obrigatórias seguidas
+    viram a maior delas e as do começo/fim são removidas; linhas em branco
+    feitas de <br> ficam como estão.
+    """
+    texto = "".join(_MARCAS[peca - 1] if isinstance(peca, int) else peca for peca in pecas)
+    texto = re.sub(r" {2,}", " ", texto)
+    texto = re.sub(r" *([\n" + _MARCAS + r"]) *", r"\1", texto).strip(" ")
+    texto = re.sub(r"^[" + _MARCAS + r"]+|[" + _MARCAS + r"]+$", "", texto)
+    return re.sub(r"[" + _MARCAS + r"]+", lambda m: "\n" * (2 if "\x02" in m.group(0) else 1), texto)
+
+
+class ExtratorLote(HTMLParser):
+    """
+    Lê o HTML estático de 'lotem.php' sem navegador.
+    Coleta as células das linhas de 'table.table-sm' e o texto do
+    primeiro 'div.bg-cinza-claro' (os mesmos elementos que o Playwright lê),
+    com o texto montado como o innerText (ver renderizar_texto).
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.linhas = []
+        self.descricao = None
+
+        self._tabela_nivel = 0     # Profundidade dentro de uma table.table-sm
+        self._linha = None         # Células da <tr> atual
+        self._celula = None        # Pedaços de texto da <td> atual
+        self._desc_nivel = 0       # Profundidade de <div> dentro da descrição
+        self._desc_partes = None
+        self._ignorar = 0
+
+    def handle_starttag(self, tag, attrs):
+        classes = (dict(attrs).get("class") or "").split()
+
+        if tag in TAGS_IGNORADAS:
+            self._ignorar += 1
+            return
+
+        if tag == "table":
+            if self._tabela_nivel or "table-sm" in classes:
+                self._tabela_nivel += 1
+        elif self._tabela_nivel and tag == "tr":
+            self._fechar_linha()
+            self._linha = []
+        elif self._tabela_nivel and tag == "td":
+            self._fechar_celula()
+            self._celula = []
+
+        if tag == "div":
+            if self._desc_partes is not None:
+                self._desc_nivel += 1
+            elif self.descricao is None and "bg-cinza-claro" in classes:
+                self._desc_partes = []
+                self._desc_nivel = 1
+                return
+
+        if tag == "br":
+            self._texto("\n")
+        else:
+            self._quebra(tag)
+
+    def handle_endtag(self, tag):
+        if tag in TAGS_IGNORADAS:
+            self._ignorar = max(0, self._ignorar - 1)
+            return
+
+        if self._tabela_nivel:
+            if tag == "td":
+                self._fechar_celula()
+            elif tag == "tr":
+                self._fechar_linha()
+            elif tag == "table":
+                self._fechar_linha()
+                self._tabela_nivel -= 1
+
+        if tag == "div" and self._desc_partes is not None:
+            self._desc_nivel -= 1
+            if self._desc_nivel == 0:
+                self.descricao = renderizar_texto(self._desc_partes)
+                self._desc_partes = None
+                return
+
+        self._quebra(tag)
+
+    def handle_data(self, data):
+        if self._ignorar:
+            return
+        self._texto(_ESPACOS.sub(" ", data))
+
+    def _quebra(self, tag):
+        if tag in TAGS_PARAGRAFO:
+            self._texto(2)
+        elif tag in TAGS_BLOCO:
+            self._texto(1)
+
+    def _texto(self, texto):
+        if self._celula is not None:
+            self._celula.append(texto)
+        if self._desc_partes is not None:
+            self._desc_partes.append(texto)
+
+    def _fechar_celula(self):
+        if self._celula is not None and self._linha is not None:
+            self._linha.append(renderizar_texto(self._celula))
+        self._celula = None
+
+    def _fechar_linha(self):
+        self._fechar_celula()
+        if self._linha is not None:
+            self.linhas.append(self._linha)
+        self._linha = None
+
+
+def extrair_de_html(html):
+    """
+    Devolve {"linhas": [[célula, ...], ...], "descricao": str} a partir do HTML,
+    ou None se a tabela ou a descrição não estiverem no HTML estático
+    (sinal de que a página depende de JavaScript e precisa do Playwright).
+    """
+    extrator = ExtratorLote()
+    extrator.feed(html)
+    extrator.close()
+
+    if not extrator.linhas or extrator.descricao is None:
+        return None
+    return {"linhas": extrator.linhas, "descricao": extrator.descricao}
+
+
+# --- SESSÃO HTTP COMPARTILHADA (keep-alive) ---
+_SESSAO = None
+
+
+def get_sessao():
+    """Cria (uma vez) a sessão com pool de conexões do tamanho do pool de abas."""
+    global _SESSAO
+    if _SESSAO is None:
+        # Import tardio: o requests só é carregado quando a coleta baixa o primeiro lote
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        sessao = requests.Session()
+        adaptador = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, config.SCRAP_CONCORRENCIA))
+        sessao.mount("http://", adaptador)
+        sessao.mount("https://", adaptador)
+        sessao.headers.update({"User-Agent": config.USER_AGENT})
+        _SESSAO = sessao
+    return _SESSAO
+
+
+def baixar_lote(url, timeout=30):
+    """
+    Baixa a página do lote via HTTP puro e extrai os campos.
+    Erros HTTP (4xx/5xx) sobem como exceção; HTML incompleto devolve None.
+    """
+    resposta = get_sessao().get(url, timeout=timeout)
+    if resposta.status_code >= 400:
+        raise ErroHttp(resposta.status_code, url)
+
+    # Sem charset no cabeçalho o requests assume ISO-8859-1; melhor detectar
+    if "charset" not in resposta.headers.get("Content-Type", "").lower():
+        resposta.encoding = resposta.apparent_encoding
+
+    return extrair_de_html(resposta.text)
@@ -0,0 +1,163 @@
+"""
+Instrumentação leve: trechos cronometrados e contadores por etapa.
+
+    from modules.instrumentacao import trecho, contar
+
+    with trecho("scraping.lote.goto"):
+        await page.goto(url)
+    contar("scraping.fallback.lote_pronto_timeout")
+
+Desligada (padrão), `trecho` devolve sempre o mesmo objeto vazio e `contar`
+só testa uma variável: o custo é de uma chamada de função. Ligada (ativar(),
+ou INSTRUMENTACAO_ATIVA no config), cada trecho guarda chamadas, tempo total,
+máximo e uma amostra das durações para os percentis do relatório JSON.
+"""
+import json
+import os
+import random
+import threading
+import time
+from datetime import datetime
+import config
+
+_ATIVO = config.INSTRUMENTACAO_ATIVA
+_LOCK = threading.Lock()
+_TRECHOS = {}     # nome -> [chamadas, total, máximo, amostra de durações]
+_CONTADORES = {}  # nome -> valor
+_INICIO = time.time()
+_RNG = random.Random(0)
+
+
+class _TrechoNulo:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_erro):
+        return False
+
+
+_NULO = _TrechoNulo()
+
+
+class _Trecho:
+    __slots__ = ("nome", "inicio")
+
+    def __init__(self, nome):
+        self.nome = nome
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *_erro):
+        registrar(self.nome, time.perf_counter() - self.inicio)
+        return False
+
+
+def trecho(nome):
+    """Context manager que cronometra o bloco (também vale em código async)."""
+    if not _ATIVO:
+        return _NULO
+    return _Trecho(nome)
+
+
+def registrar(nome, duracao):
+    """Soma uma duração (em segundos) já medida por fora ao trecho `nome`."""
+    if not _ATIVO:
+        return
+    with _LOCK:
+        dados = _TRECHOS.get(nome)
+        if dados is None:
+            dados = _TRECHOS[nome] = [0, 0.0, 0.0, []]
+        dados[0] += 1
+        dados[1] += duracao
+        dados[2] = max(dados[2], duracao)
+        amostra = dados[3]
+        # Amostragem de reservatório: a memória fica limitada em execuções longas
+        if len(amostra) < config.INSTRUMENTACAO_AMOSTRAS:
+            amostra.append(duracao)
+        else:
+            posicao = _RNG.randrange(dados[0])
+            if posicao < len(amostra):
+                amostra[posicao] = duracao
+
+
+def contar(nome, quantidade=1):
+    if not _ATIVO:
+        return
+    with _LOCK:
+        _CONTADORES[nome] = _CONTADORES.get(nome, 0) + quantidade
+
+
+def ativar():
+    global _ATIVO
+    _ATIVO = True
+
+
+def desativar():
+    global _ATIVO
+    _ATIVO = False
+
+
+def ativo():
+    return _ATIVO
+
+
+def zerar():
+    global _INICIO
+    with _LOCK:
+        _TRECHOS.clear()
+        _CONTADORES.clear()
+        _INICIO = time.time()
+
+
+def _percentil(ordenadas, fracao):
+    return ordenadas[min(len(ordenadas) - 1, int(fracao * len(ordenadas)))]
+
+
+def resumo():
+    """Trechos (ordenados pelo tempo total) e contadores acumulados até agora."""
+    with _LOCK:
+        trechos = {nome: (dados[0], dados[1], dados[2], sorted(dados[3])) for nome, dados in _TRECHOS.items()}
+        contadores = dict(sorted(_CONTADORES.items()))
+
+    saida = {}
+    for nome, (chamadas, total, maximo, amostra) in sorted(trechos.items(), key=lambda x: -x[1][1]):
+        saida[nome] = {
+            "chamadas": chamadas,
+            "total_s": round(total, 4),
+            "media_ms": round(total / chamadas * 1000, 3),
+            "p50_ms": round(_percentil(amostra, 0.50) * 1000, 3),
+            "p99_ms": round(_percentil(amostra, 0.99) * 1000, 3),
+            "max_ms": round(maximo * 1000, 3),
+        }
+    return {
+        "gerado_em": datetime.now().isoformat(timespec="seconds"),
+        "duracao_s": round(time.time() - _INICIO, 3),
+        "trechos": saida,
+        "contadores": contadores,
+    }
+
+
+def salvar_relatorio(caminho=None, **extras):
+    """Grava o resumo em JSON (mais os campos de `extras`) e devolve o dicionário."""
+    caminho = caminho or config.RELATORIO_EXECUCAO_FILE
+    relatorio = {**resumo(), **extras}
+    temporario = caminho + ".tmp"
+    with open(temporario, 'w', encoding='utf-8') as f:
+        json.dump(relatorio, f, ensure_ascii=False, indent=4)
+    os.replace(temporario, caminho)
+    return relatorio
+
+
+def imprimir_resumo(relatorio=None, limite=10):
+    """Os trechos que mais consumiram tempo, em texto (para o log da execução)."""
+    relatorio = relatorio or resumo()
+    print(f"⏱️  Etapas mais demoradas ({relatorio['duracao_s']:.1f}s no total):")
+    for nome, dados in list(relatorio["trechos"].items())[:limite]:
+        print(f"   {nome:<40} {dados['total_s']:>9.2f}s  {dados['chamadas']:>7}x  "
+              f"p50 {dados['p50_ms']:>9.1f} ms  p99 {dados['p99_ms']:>9.1f} ms")
+    if relatorio["contadores"]:
+        print("   " + " | ".join(f"{nome}: {valor}" for nome, valor in relatorio["contadores"].items()))
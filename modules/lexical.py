@@ -0,0 +1,319 @@
+import json
+import os
+from array import array
+import unicodedata
+import re
+import numpy as np
+import config
+
+
+def normalizar_texto(texto):
+    """
+    Remove acentos, coloca em minúsculas e TROCA PONTUAÇÃO POR ESPAÇO.
+    """
+    if not texto: return ""
+    nfkd = unicodedata.normalize('NFKD', texto)
+    sem_acentos = u"".join([c for c in nfkd if not unicodedata.combining(c)]).lower()
+    texto_limpo = re.sub(r'[^a-z0-9]', ' ', sem_acentos)
+    return " ".join(texto_limpo.split())
+
+
+def raiz_palavra(palavra):
+    """Stemming simples (raízes): tira o plural e a vogal final. 'mesas' -> 'mes'"""
+    raiz = palavra.rstrip('s')
+    if raiz.endswith(('o', 'a', 'e')): raiz = raiz[:-1]
+    return raiz
+
+
+class IndiceInvertido:
+    """
+    Índice invertido posicional dos textos normalizados, montado uma vez na carga.
+
+    Reproduz exatamente o bônus textual da busca híbrida, que antes normalizava
+    e varria todos os lotes a cada consulta:
+      - Match exato: a consulta normalizada é substring do texto do lote (+0.4)
+      - Match por palavra: palavra curta (< 4) precisa ser um token igual; palavra
+        longa pode aparecer dentro de um token ou casar pela raiz (+0.3 x fração)
+
+    Como o texto normalizado é só tokens separados por um espaço, "substring do
+    texto" vira uma condição sobre tokens consecutivos, resolvida com as posições.
+    Cada consulta só toca o vocabulário e as listas dos termos que ela usa.
+    """
+
+    def __init__(self, textos_norm):
+        self.total_docs = len(textos_norm)
+        self.postings = {}  # token -> {doc: [posições]}
+        for doc, texto in enumerate(textos_norm):
+            for posicao, token in enumerate(texto.split()):
+                self.postings.setdefault(token, {}).setdefault(doc, []).append(posicao)
+        self.vocabulario = list(self.postings)
+        self._cache_substring = {}
+
+    # --- Consultas ao vocabulário (independem do tamanho do acervo) ---
+
+    def tokens_contendo(self, fragmento):
+        tokens = self._cache_substring.get(fragmento)
+        if tokens is None:
+            tokens = [t for t in self.vocabulario if fragmento in t]
+            if len(self._cache_substring) > 10000:
+                self._cache_substring.clear()
+            self._cache_substring[fragmento] = tokens
+        return tokens
+
+    def _docs(self, tokens):
+        docs = set()
+        for token in tokens:
+            docs.update(self.postings[token])
+        return docs
+
+    def _posicoes(self, tokens, doc):
+        posicoes = set()
+        for token in tokens:
+            posicoes.update(self.postings[token].get(doc, ()))
+        return posicoes
+
+    # --- Match exato (substring do texto normalizado) ---
+
+    @staticmethod
+    def _restringir(docs, permitidos):
+        return docs if permitidos is None else {doc for doc in docs if permitidos[doc]}
+
+    def docs_frase(self, termo_norm, permitidos=None):
+        palavras = termo_norm.split()
+        if not palavras:
+            # "" está contido em qualquer texto
+            return set(range(self.total_docs)) if permitidos is None else set(np.flatnonzero(permitidos).tolist())
+        if len(palavras) == 1:
+            return self._restringir(self._docs(self.tokens_contendo(palavras[0])), permitidos)
+
+        primeira, meio, ultima = palavras[0], palavras[1:-1], palavras[-1]
+        tokens_inicio = [t for t in self.tokens_contendo(primeira) if t.endswith(primeira)]
+        tokens_fim = [t for t in self.tokens_contendo(ultima) if t.startswith(ultima)]
+        if not tokens_inicio or not tokens_fim or any(p not in self.postings for p in meio):
+            return set()
+
+        candidatos = self._restringir(self._docs(tokens_inicio) & self._docs(tokens_fim), permitidos)
+        for palavra in meio:
+            candidatos &= self.postings[palavra].keys()
+
+        encontrados = set()
+        deslocamento_fim = len(palavras) - 1
+        for doc in candidatos:
+            fins = self._posicoes(tokens_fim, doc)
+            posicoes_meio = [self.postings[p][doc] for p in meio]
+            for inicio in self._posicoes(tokens_inicio, doc):
+                if inicio + deslocamento_fim in fins and all(
+                        inicio + j in posicoes for j, posicoes in enumerate(posicoes_meio, start=1)):
+                    encontrados.add(doc)
+                    break
+        return encontrados
+
+    # --- Match por palavra/raiz ---
+
+    def docs_palavra(self, palavra, permitidos=None):
+        if len(palavra) < 4:
+            return self._restringir(set(self.postings.get(palavra, ())), permitidos)
+
+        docs = self._docs(self.tokens_contendo(palavra))
+        raiz = raiz_palavra(palavra)
+        if len(raiz) >= 3 and raiz in self.postings:
+            docs.update(self.postings[raiz])
+        return self._restringir(docs, permitidos)
+
+    def bonus_texto(self, termo, permitidos=None):
+        """
+        Devolve ({doc: bônus}, docs_com_match_de_palavra), com os mesmos valores
+        do laço antigo (mesma ordem de somas em ponto flutuante).
+        `permitidos` (máscara por doc, dos filtros): só esses docs são verificados.
+        """
+        termo_norm = normalizar_texto(termo)
+        palavras_busca = termo_norm.split()
+
+        exatos = self.docs_frase(termo_norm, permitidos)
+        matches_por_doc = {}
+        for palavra in palavras_busca:
+            for doc in self.docs_palavra(palavra, permitidos):
+                matches_por_doc[doc] = matches_por_doc.get(doc, 0) + 1
+
+        bonus = {}
+        for doc in exatos | matches_por_doc.keys():
+            bonus_texto = 0.0
+            if doc in exatos:
+                bonus_texto += 0.4
+            matches_palavras = matches_por_doc.get(doc, 0)
+            if matches_palavras > 0:
+                fator_match = matches_palavras / len(palavras_busca)
+                bonus_texto += (fator_match * 0.3)
+            if bonus_texto > 0:
+                bonus[doc] = bonus_texto
+
+        return bonus, set(matches_por_doc)
+
+
+# --- BM25F: score léxico que considera a raridade dos termos ---
+# As estatísticas (IDF, tamanho dos campos) são calculadas uma vez no
+# processamento da IA; o peso final de cada (termo, lote) já vai pronto
+# para o arquivo, então a consulta só soma listas.
+
+def termo_bm25(token):
+    """Termo indexado: a raiz para palavras longas (plural e singular batem), o token nas curtas."""
+    if len(token) < 4:
+        return token
+    raiz = raiz_palavra(token)
+    return raiz if len(raiz) >= 3 else token
+
+
+def termos_bm25(texto):
+    return [termo_bm25(token) for token in normalizar_texto(texto).split()]
+
+
+class AcumuladorBM25:
+    """
+    Monta a tabela BM25F lote a lote: `adicionar(item)` guarda só as contagens
+    dos termos (em arrays compactos), não o item; `concluir(cls)` calcula os
+    pesos no fim, quando os tamanhos médios dos campos já são conhecidos.
+    `campos` = {campo_do_item: peso}.
+
+    tf~(t, d) = soma_f peso_f * tf_f / (1 - b + b * tamanho_f / tamanho_medio_f)
+    peso(t, d) = idf(t) * tf~ / (k1 + tf~)
+    """
+
+    def __init__(self, campos=None, k1=None, b=None):
+        self.campos = campos or config.BM25_CAMPOS
+        self.k1 = config.BM25_K1 if k1 is None else k1
+        self.b = config.BM25_B if b is None else b
+        self.total = 0
+        self.id_termo = {}  # termo -> id (ordem de chegada)
+        # Por campo: (doc, id do termo, tf) de cada par presente, e o tamanho de cada doc
+        self._postings = {campo: (array('i'), array('i'), array('i')) for campo in self.campos}
+        self._tamanhos = {campo: array('i') for campo in self.campos}
+
+    def adicionar(self, item):
+        doc = self.total
+        self.total += 1
+        for campo in self.campos:
+            tokens = termos_bm25(item.get(campo, ""))
+            self._tamanhos[campo].append(len(tokens))
+            contagem = {}
+            for termo in tokens:
+                contagem[termo] = contagem.get(termo, 0) + 1
+            docs, ids, tfs = self._postings[campo]
+            for termo, tf in contagem.items():
+                docs.append(doc)
+                ids.append(self.id_termo.setdefault(termo, len(self.id_termo)))
+                tfs.append(tf)
+
+    def concluir(self, cls):
+        total, k1, b = self.total, self.k1, self.b
+        termos = sorted(self.id_termo)
+        # id de chegada -> posição alfabética
+        posto = np.empty(len(termos), dtype=np.int64)
+        posto[[self.id_termo[termo] for termo in termos]] = np.arange(len(termos))
+
+        tamanho_medio, chaves, valores = {}, [], []
+        for campo, peso_campo in self.campos.items():
+            tamanhos = np.asarray(self._tamanhos[campo], dtype=np.float64)
+            tamanho_medio[campo] = (float(tamanhos.sum()) / total if total else 0.0) or 1.0
+            docs, ids, tfs = (np.asarray(coluna, dtype=np.int64) for coluna in self._postings[campo])
+            normalizacao = 1 - b + b * tamanhos[docs] / tamanho_medio[campo]
+            chaves.append(posto[ids] * max(total, 1) + docs)
+            valores.append(peso_campo * tfs / normalizacao)
+
+        # Soma os campos de cada (termo, doc); a ordem das chaves já é a do CSR:
+        # termos em ordem alfabética e docs crescentes dentro de cada termo
+        chaves = np.concatenate(chaves)
+        valores = np.concatenate(valores)
+        ordem = np.argsort(chaves, kind='stable')
+        chaves, valores = chaves[ordem], valores[ordem]
+        primeiros = np.flatnonzero(np.r_[True, chaves[1:] != chaves[:-1]]) if len(chaves) else np.zeros(0, np.int64)
+        tf = np.add.reduceat(valores, primeiros) if len(chaves) else np.zeros(0)
+        chaves = chaves[primeiros]
+        termo_do_par = chaves // max(total, 1)
+
+        # Postings em CSR: os docs do termo termos[i] são docs[inicio[i]:inicio[i + 1]]
+        df = np.bincount(termo_do_par, minlength=len(termos))
+        idf = np.log(1 + (total - df + 0.5) / (df + 0.5))
+        inicio = np.zeros(len(termos) + 1, dtype=np.int64)
+        np.cumsum(df, out=inicio[1:])
+
+        return {
+            "versao": 2,
+            "k1": k1, "b": b, "campos": self.campos,
+            "docs": total, "tamanho_medio": tamanho_medio,
+            "cls": np.asarray(list(cls), dtype=np.int64),
+            "termos": termos,
+            "inicio": inicio,
+            "docs_postings": (chaves % max(total, 1)).astype(np.int32),
+            "pesos": (idf[termo_do_par] * tf / (k1 + tf)).astype(np.float32),
+        }
+
+
+def construir_tabela_bm25(dados, cls, campos=None, k1=None, b=None):
+    """Tabela BM25F de uma lista (ou qualquer iterável) de lotes; veja AcumuladorBM25."""
+    acumulador = AcumuladorBM25(campos, k1, b)
+    for item in dados:
+        acumulador.adicionar(item)
+    return acumulador.concluir(cls)
+
+
+def salvar_tabela_bm25(tabela, caminho=None):
+    """Grava a tabela num .npz compactado (os pesos já embutem o IDF)."""
+    caminho = caminho or config.BM25_FILE
+    meta = json.dumps({chave: tabela[chave] for chave in ("versao", "k1", "b", "campos", "docs", "tamanho_medio")},
+                      ensure_ascii=False)
+    # Termos nunca têm espaço nem quebra de linha (saem de normalizar_texto)
+    termos = "\n".join(tabela["termos"]).encode('utf-8')
+    temporario = caminho + ".tmp.npz"
+    np.savez_compressed(temporario, meta=np.frombuffer(meta.encode('utf-8'), dtype=np.uint8),
+                        termos=np.frombuffer(termos, dtype=np.uint8), cls=tabela["cls"], inicio=tabela["inicio"],
+                        docs=tabela["docs_postings"], pesos=tabela["pesos"])
+    os.replace(temporario, caminho)
+
+
+class TabelaBM25:
+    """Tabela BM25F pré-calculada; a consulta só soma os pesos dos seus termos."""
+
+    def __init__(self, caminho=None):
+        with np.load(caminho or config.BM25_FILE) as arquivo:
+            termos = bytes(arquivo["termos"]).decode('utf-8')
+            self.cls = arquivo["cls"].tolist()
+            self.inicio = arquivo["inicio"]
+            self.docs = arquivo["docs"]
+            self.pesos = arquivo["pesos"]
+        self.posicao = {termo: i for i, termo in enumerate(termos.split("\n"))} if termos else {}
+        # Maior peso de um termo num doc: o teto de cada termo da consulta
+        self.peso_maximo = float(self.pesos.max()) if len(self.pesos) else 0.0
+
+    def pontuar(self, termo, permitidos=None):
+        """
+        {doc: score BM25F} para os docs (posição na tabela) com algum termo da consulta.
+        `permitidos` (máscara por doc da tabela): os demais nem entram na soma.
+        """
+        scores = {}
+        for termo_consulta in dict.fromkeys(termos_bm25(termo)):
+            i = self.posicao.get(termo_consulta)
+            if i is None:
+                continue
+            fatia = slice(self.inicio[i], self.inicio[i + 1])
+            docs, pesos = self.docs[fatia], self.pesos[fatia]
+            if permitidos is not None:
+                manter = permitidos[docs]
+                docs, pesos = docs[manter], pesos[manter]
+            for doc, peso in zip(docs.tolist(), pesos.tolist()):
+                scores[doc] = scores.get(doc, 0.0) + peso
+        return scores
+
+    def bonus_texto(self, termo, peso=None, permitidos=None):
+        """
+        Mesmo formato do IndiceInvertido: ({doc: bônus}, docs_com_match).
+        O score é dividido pelo teto da tabela (maior peso de um termo vezes o
+        nº de termos da consulta), não pelo melhor doc da consulta: um termo
+        comum ('lote') rende bônus pequeno mesmo no seu melhor doc, e só os
+        termos raros chegam perto de `peso` (padrão BUSCA_PESO_BM25).
+        """
+        peso = config.BUSCA_PESO_BM25 if peso is None else peso
+        scores = self.pontuar(termo, permitidos)
+        if not scores:
+            return {}, set()
+        teto = self.peso_maximo * len(dict.fromkeys(termos_bm25(termo)))
+        return {doc: peso * score / teto for doc, score in scores.items()}, set(scores)
@@ -0,0 +1,251 @@
+"""
+Acervo de lotes: a fonte única dos dados do site (substitui dados_brutos.json
+e dados_processados.json).
+
+Layout em data/lotes/:
+
+    seg-000001.jsonl.gz   segmentos imutáveis com o CONTEÚDO dos lotes, uma linha
+    seg-000002.jsonl.gz   "cl<TAB>json" por lote; o segmento mais novo vence
+    ...
+    estado.json.gz        ordem da listagem, datas de coleta/visita e 'expirado'
+                          de cada lote, e a lista dos segmentos válidos
+
+Só lotes novos ou com conteúdo alterado viram linhas num segmento novo (o
+delta do dia); as datas, que mudam todo dia, ficam só no arquivo de estado,
+que é pequeno. A descrição é guardada uma vez só, com as quebras de linha:
+'texto_completo' é derivado dela na leitura. Quando há segmentos demais ou
+metade das linhas já foi substituída, tudo é compactado num segmento só.
+
+O gzip é gravado sem data no cabeçalho: o mesmo conteúdo gera sempre os mesmos
+bytes, então o Git não vê mudança onde não houve.
+"""
+import contextlib
+import gzip
+import hashlib
+import json
+import os
+import config
+from modules.campos_lote import limpar_texto, cl_do_item
+
+ARQUIVO_ESTADO = "estado.json.gz"
+PREFIXO_SEGMENTO = "seg-"
+SUFIXO_SEGMENTO = ".jsonl.gz"
+VERSAO = 1
+
+# Campos que mudam a cada execução: ficam no estado, não nos segmentos
+CAMPOS_ESTADO = ("coletado_em", "visto_em", "expirado")
+
+
+def _serializar(item):
+    """Linha canônica do conteúdo do lote (a mesma entrada gera os mesmos bytes)."""
+    conteudo = {chave: valor for chave, valor in item.items() if chave not in CAMPOS_ESTADO and chave != "cl"}
+    # 'texto_completo' só é guardado se não puder ser refeito a partir do texto com quebras
+    if "texto_bruto_com_quebras" in conteudo and \
+            conteudo.get("texto_completo") == limpar_texto(conteudo["texto_bruto_com_quebras"]):
+        del conteudo["texto_completo"]
+    return json.dumps(conteudo, ensure_ascii=False, sort_keys=True, separators=(",", ":")).encode('utf-8')
+
+
+@contextlib.contextmanager
+def _gzip_escrita(caminho):
+    with open(caminho, 'wb') as bruto, \
+            gzip.GzipFile(filename="", mode="wb", fileobj=bruto, mtime=0, compresslevel=9) as f:
+        yield f
+
+
+class LotStore:
+    """
+    Acervo carregado de forma compacta: o conteúdo de cada lote fica como a
+    linha JSON em bytes e só vira dicionário quando é lido (`iterar`).
+    """
+
+    def __init__(self, pasta=None):
+        self.pasta = pasta or config.LOTES_DIR
+        self.caminho_estado = os.path.join(self.pasta, ARQUIVO_ESTADO)
+        self.segmentos = []
+        self.ordem = []      # cls na ordem da listagem do site
+        self.estado = {}     # cl -> (coletado_em, visto_em, expirado)
+        self.conteudo = {}   # cl -> linha JSON do conteúdo
+        self.linhas_total = 0  # Linhas em todos os segmentos (inclui as já substituídas)
+        if self.existe():
+            self._carregar()
+
+    def existe(self):
+        return os.path.exists(self.caminho_estado)
+
+    def _carregar(self):
+        with gzip.open(self.caminho_estado, 'rt', encoding='utf-8') as f:
+            estado = json.load(f)
+        if estado.get("versao") != VERSAO:
+            raise ValueError(f"Versão {estado.get('versao')} do acervo de lotes não suportada (esperada {VERSAO}).")
+
+        self.segmentos = estado["segmentos"]
+        self.ordem = estado["cl"]
+        self.estado = {cl: (coletado, visto, bool(expirado)) for cl, coletado, visto, expirado in zip(
+            estado["cl"], estado["coletado_em"], estado["visto_em"], estado["expirado"])}
+
+        # Segmentos em ordem: a versão mais nova de cada lote sobrescreve as antigas
+        for nome in self.segmentos:
+            with gzip.open(os.path.join(self.pasta, nome), 'rb') as f:
+                for linha in f:
+                    cl, _, corpo = linha.rstrip(b"\n").partition(b"\t")
+                    cl = int(cl)
+                    self.linhas_total += 1
+                    if cl in self.estado:  # Lotes removidos ficam nos segmentos até a compactação
+                        self.conteudo[cl] = corpo
+
+    def __len__(self):
+        return len(self.ordem)
+
+    def iterar(self, incluir_expirados=True):
+        """Lotes na ordem do site, no formato dos antigos arquivos JSON (um dicionário por vez)."""
+        for cl in self.ordem:
+            if self.estado[cl][2] and not incluir_expirados:
+                continue
+            yield self.obter(cl)
+
+    def obter(self, cl):
+        """Um lote pelo 'cl' (None se não estiver no acervo)."""
+        if cl not in self.estado:
+            return None
+        coletado_em, visto_em, expirado = self.estado[cl]
+        item = json.loads(self.conteudo[cl])
+        if "texto_completo" not in item:
+            item["texto_completo"] = limpar_texto(item.get("texto_bruto_com_quebras"))
+        item["cl"] = cl
+        if coletado_em is not None:
+            item["coletado_em"] = coletado_em
+        if visto_em is not None:
+            item["visto_em"] = visto_em
+        item["expirado"] = expirado
+        return item
+
+    def upsert(self, itens, reordenar=False, remover_ausentes=False, ordem=None):
+        """
+        Insere ou atualiza lotes pelo 'cl'; `itens` pode ser um gerador (só o
+        conteúdo em bytes fica guardado). Só o conteúdo novo ou alterado vai
+        para um segmento novo; o estado é sempre regravado. Com `reordenar`,
+        a ordem passa a ser a de `itens`, ou a de `ordem` (lista de cls) se
+        ela for dada; os demais lotes ficam no final. Com `remover_ausentes`,
+        o acervo passa a ter só os lotes de `itens`.
+        Devolve quantos lotes tiveram conteúdo gravado.
+        """
+        novas = []
+        cls_itens = []
+        for item in itens:
+            cl = cl_do_item(item)
+            corpo = _serializar(item)
+            if self.conteudo.get(cl) != corpo:
+                self.conteudo[cl] = corpo
+                novas.append(b"%d\t%s\n" % (cl, corpo))
+            self.estado[cl] = (item.get("coletado_em"), item.get("visto_em"), bool(item.get("expirado")))
+            cls_itens.append(cl)
+
+        conhecidos = set(self.ordem)
+        vindos = dict.fromkeys(cls_itens)
+        if remover_ausentes:
+            for cl in conhecidos.difference(vindos):
+                del self.estado[cl], self.conteudo[cl]
+            self.ordem = list(vindos)
+        else:
+            self.ordem += [cl for cl in vindos if cl not in conhecidos]
+        if reordenar:
+            frente = dict.fromkeys(cl for cl in (vindos if ordem is None else ordem) if cl in self.estado)
+            self.ordem = list(frente) + [cl for cl in self.ordem if cl not in frente]
+
+        os.makedirs(self.pasta, exist_ok=True)
+        if novas:
+            nome = self._proximo_segmento()
+            self._gravar_segmento(nome, novas)
+            self.segmentos.append(nome)
+            self.linhas_total += len(novas)
+
+        obsoletas = self.linhas_total - len(self.conteudo)
+        if len(self.segmentos) > config.LOTES_MAX_SEGMENTOS or obsoletas > len(self.conteudo):
+            self.compactar()
+        else:
+            self._gravar_estado()
+        return len(novas)
+
+    def compactar(self):
+        """Reescreve o acervo num segmento só (sem as versões substituídas)."""
+        antigos = self.segmentos
+        nome = self._proximo_segmento()
+        self._gravar_segmento(nome, (b"%d\t%s\n" % (cl, self.conteudo[cl]) for cl in self.ordem))
+        self.segmentos = [nome]
+        self.linhas_total = len(self.ordem)
+        # O estado novo é o ponto de virada: só depois dele os segmentos antigos somem
+        self._gravar_estado()
+        for antigo in antigos:
+            caminho = os.path.join(self.pasta, antigo)
+            if os.path.exists(caminho):
+                os.remove(caminho)
+
+    def _proximo_segmento(self):
+        numeros = [int(nome[len(PREFIXO_SEGMENTO):-len(SUFIXO_SEGMENTO)]) for nome in self.segmentos]
+        return f"{PREFIXO_SEGMENTO}{max(numeros, default=0) + 1:06d}{SUFIXO_SEGMENTO}"
+
+    def _gravar_segmento(self, nome, linhas):
+        caminho = os.path.join(self.pasta, nome)
+        temporario = caminho + ".tmp"
+        with _gzip_escrita(temporario) as f:
+            for linha in linhas:
+                f.write(linha)
+        os.replace(temporario, caminho)
+
+    def _gravar_estado(self):
+        colunas = [self.estado[cl] for cl in self.ordem]
+        estado = {
+            "versao": VERSAO,
+            "segmentos": self.segmentos,
+            "cl": self.ordem,
+            "coletado_em": [c[0] for c in colunas],
+            "visto_em": [c[1] for c in colunas],
+            "expirado": [int(c[2]) for c in colunas],
+        }
+        temporario = self.caminho_estado + ".tmp"
+        with _gzip_escrita(temporario) as f:
+            f.write(json.dumps(estado, ensure_ascii=False, separators=(",", ":")).encode('utf-8'))
+        os.replace(temporario, self.caminho_estado)
+
+    def impressao(self):
+        """Identidade do conteúdo atual do acervo (muda a cada gravação); None se não existe."""
+        if not self.existe():
+            return None
+        with open(self.caminho_estado, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()[:16]
+
+    def tamanho_em_disco(self):
+        nomes = self.segmentos + [ARQUIVO_ESTADO]
+        return sum(os.path.getsize(os.path.join(self.pasta, nome)) for nome in nomes)
+
+
+# --- MIGRAÇÃO DOS ARQUIVOS JSON ANTIGOS ---
+
+def importar_json(caminho, pasta=None):
+    """Deixa o acervo igual a um arquivo no formato de dados_brutos.json (cria se não existir)."""
+    with open(caminho, 'r', encoding='utf-8') as f:
+        dados = json.load(f)
+    store = LotStore(pasta)
+    store.upsert(dados, reordenar=True, remover_ausentes=True)
+    return store
+
+
+def abrir_lotes(pasta=None):
+    """
+    Abre o acervo. Na primeira vez, migra o 'dados_brutos.json' (ou, na falta
+    dele, o 'dados_processados.json') para o formato novo. Os arquivos antigos
+    não são apagados aqui (a automação os remove do repositório).
+    """
+    store = LotStore(pasta)
+    if store.existe():
+        return store
+
+    for legado in (config.RAW_DATA_FILE, config.PROCESSED_DATA_FILE):
+        if os.path.exists(legado):
+            print(f"🔄 Migrando '{os.path.basename(legado)}' para o acervo compacto em '{store.pasta}'...")
+            store = importar_json(legado, pasta)
+            print(f"   ✅ {len(store)} lotes: {os.path.getsize(legado) / 1024:.0f} KB -> "
+                  f"{store.tamanho_em_disco() / 1024:.0f} KB.")
+            break
+    return store
@@ -0,0 +1,141 @@
+"""
+Cache LRU persistente dos vetores de consulta ("furadeira", "mesa", "moto"...).
+
+A chave é (modelo, consulta normalizada): minúsculas e espaços colapsados. O
+all-MiniLM-L6-v2 é 'uncased' (o tokenizador já ignora maiúsculas), então a
+normalização não muda o vetor. Quando todas as consultas estão no cache, a
+busca nem chega a carregar o modelo (nem o torch).
+
+Fica em data/cache_consultas.npz. É gravado a cada QUERY_CACHE_SALVAR_A_CADA
+vetores novos e na saída do programa.
+"""
+import atexit
+import json
+import os
+import threading
+from collections import OrderedDict
+import numpy as np
+import config
+
+
+def chave_consulta(texto, modelo=None):
+    return f"{modelo or config.MODEL_NAME}\x00{' '.join(texto.lower().split())}"
+
+
+class CacheConsultas:
+    """LRU de vetores normalizados (float32), seguro para várias threads."""
+
+    def __init__(self, caminho=None, capacidade=None):
+        self.caminho = caminho or config.QUERY_CACHE_FILE
+        self.capacidade = capacidade or config.QUERY_CACHE_MAX
+        self._vetores = OrderedDict()
+        self._lock = threading.Lock()
+        self._novos_desde_gravacao = 0
+        self.acertos = 0
+        self.faltas = 0
+        self._carregar()
+
+    def _carregar(self):
+        if not os.path.exists(self.caminho):
+            return
+        try:
+            with np.load(self.caminho) as arquivo:
+                chaves = json.loads(bytes(arquivo["chaves"]).decode('utf-8'))
+                matriz = arquivo["vetores"]
+        except (OSError, ValueError, KeyError):
+            return  # Cache corrompido: recomeça vazio (é só cache)
+        # Gravado do menos para o mais recente: a ordem do LRU se mantém
+        for chave, vetor in zip(chaves[-self.capacidade:], matriz[-self.capacidade:]):
+            self._vetores[chave] = vetor
+
+    def salvar(self):
+        with self._lock:
+            if not self._novos_desde_gravacao:
+                return
+            chaves = list(self._vetores)
+            matriz = np.stack(list(self._vetores.values())) if chaves else np.zeros((0, 0), dtype=np.float32)
+            self._novos_desde_gravacao = 0
+
+        temporario = self.caminho + ".tmp.npz"
+        np.savez(temporario, chaves=np.frombuffer(json.dumps(chaves).encode('utf-8'), dtype=np.uint8),
+                 vetores=matriz)
+        os.replace(temporario, self.caminho)
+
+    def encode(self, textos, get_model):
+        """
+        Matriz [len(textos) x dim] com os vetores das consultas. Só as que
+        faltam no cache vão para o modelo, todas numa única chamada.
+        """
+        chaves = [chave_consulta(texto) for texto in textos]
+        vetores = [None] * len(textos)
+        faltando = {}  # chave -> posições (a mesma consulta repetida vai uma vez só)
+
+        with self._lock:
+            for i, chave in enumerate(chaves):
+                vetor = self._vetores.get(chave)
+                if vetor is None:
+                    faltando.setdefault(chave, []).append(i)
+                else:
+                    self._vetores.move_to_end(chave)
+                    vetores[i] = vetor
+                    self.acertos += 1
+
+        if faltando:
+            primeiro = [posicoes[0] for posicoes in faltando.values()]
+            novos = get_model().encode([textos[i] for i in primeiro], convert_to_numpy=True,
+                                       normalize_embeddings=True)
+            with self._lock:
+                for (chave, posicoes), vetor in zip(faltando.items(), novos):
+                    vetor = np.asarray(vetor, dtype=np.float32)
+                    for i in posicoes:
+                        vetores[i] = vetor
+                    self.faltas += len(posicoes)
+                    self._vetores[chave] = vetor
+                    self._vetores.move_to_end(chave)
+                    while len(self._vetores) > self.capacidade:
+                        self._vetores.popitem(last=False)
+                self._novos_desde_gravacao += len(faltando)
+                gravar = self._novos_desde_gravacao >= config.QUERY_CACHE_SALVAR_A_CADA
+            if gravar:
+                self.salvar()
+
+        return np.stack(vetores)
+
+    def estatisticas(self):
+        total = self.acertos + self.faltas
+        return {
+            "entradas": len(self._vetores),
+            "acertos": self.acertos,
+            "faltas": self.faltas,
+            "taxa_acerto": self.acertos / total if total else 0.0,
+        }
+
+
+class ModeloComCache:
+    """
+    Mesma interface de `encode` do modelo, com o cache na frente.
+    `get_model` só é chamado (e o modelo carregado) quando há falta no cache.
+    """
+
+    def __init__(self, cache, get_model):
+        self.cache = cache
+        self.get_model = get_model
+
+    def encode(self, textos, **_opcoes):
+        if isinstance(textos, str):
+            return self.cache.encode([textos], self.get_model)[0]
+        return self.cache.encode(list(textos), self.get_model)
+
+
+# Cache compartilhado por menu, linha de comando e serviço (um por processo)
+_CACHE = None
+_CACHE_LOCK = threading.Lock()
+
+
+def get_cache():
+    global _CACHE
+    with _CACHE_LOCK:
+        if _CACHE is None:
+            _CACHE = CacheConsultas()
+            atexit.register(_CACHE.salvar)
+        return _CACHE
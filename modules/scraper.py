@@ -1,29 +1,234 @@
+import asyncio
 import json
+import os
 import re
 import time
-import random
-from playwright.sync_api import sync_playwright
+from datetime import datetime, timedelta
+from urllib.parse import urlparse, parse_qs, urljoin
 from colorama import Fore, Style
 import config
+from modules import http_fetcher, lot_store
+from modules.campos_lote import limpar_texto, extrair_cl
+from modules.instrumentacao import trecho, contar
+from modules.throttle import ControladorTaxa, CircuitoAberto, ErroHttp
 
+# Página do lote, relativa à listagem (mesmo site e pasta de target_url)
+URL_LOTE = "lotem.php?cl={}"
 
-def limpar_texto(texto):
-    if not texto:
-        return ""
-    return " ".join(texto.split())
 
+def url_do_lote(cl, target_url=config.URL_ALVO):
+    """'https://.../site/index.php?categoria_pesquisa=1' + 1466396 -> 'https://.../site/lotem.php?cl=1466396'"""
+    return urljoin(target_url, URL_LOTE.format(cl))
 
-def fechar_popups_e_cookies(page):
+
+def categorias_da_url(target_url):
+    """Lê os códigos de 'categoria_pesquisa' da URL de listagem (ex: '1%2C15' -> ['1', '15'])."""
+    valor = parse_qs(urlparse(target_url).query).get("categoria_pesquisa", [""])[0]
+    return [c.strip() for c in valor.split(",") if c.strip()]
+
+
+# --- MODO INCREMENTAL ---
+
+def lote_vencido(coletado_em, agora, ttl_horas):
+    """Itens antigos (sem 'coletado_em') são tratados como vencidos."""
+    if not coletado_em:
+        return True
+    return agora - datetime.fromisoformat(coletado_em) > timedelta(hours=ttl_horas)
+
+
+def selecionar_urls_pendentes(lista_urls, acervo, agora, ttl_horas):
+    """
+    Das URLs da listagem, devolve só as de lotes novos ou com coleta vencida.
+    Só olha o estado de cada lote no acervo (datas e 'expirado'), sem abrir o conteúdo.
+    """
+    pendentes = []
+    for url in lista_urls:
+        estado = acervo.estado.get(extrair_cl(url))
+        if estado is None or estado[2] or lote_vencido(estado[0], agora, ttl_horas):
+            pendentes.append(url)
+    return pendentes
+
+
+def mesclar_coleta(acervo, lista_urls, coletados, categorias, agora, marcar_expirados=True, resumo=None):
+    """
+    Junta a coleta atual com o que já estava salvo, um lote por vez (gerador
+    para o LotStore.upsert: nada é acumulado na memória). Saem primeiro os
+    lotes coletados agora (lidos do JSONL), depois os demais do acervo (em dia
+    ou que sumiram do site); a ordem do site é passada à parte para o acervo.
+    `acervo` None: sem dados salvos (coleta completa). `resumo` recebe as
+    contagens ('coletados', 'expirados') quando o gerador termina.
+
+    Um lote que não apareceu na listagem só é marcado como expirado se todas as
+    categorias em que ele já foi visto fazem parte desta execução; assim uma
+    raspagem só de Veículos não expira os Materiais.
+    """
+    resumo = resumo if resumo is not None else {}
+    resumo.update(coletados=0, expirados=0)
+    agora_iso = agora.isoformat(timespec="seconds")
+    categorias = set(categorias)
+    na_listagem = {extrair_cl(url) for url in lista_urls}
+
+    def atualizar(item):
+        if item["cl"] in na_listagem:
+            item["expirado"] = False
+            item["visto_em"] = agora_iso
+            item["categorias"] = sorted(set(item.get("categorias", [])) | categorias)
+        elif marcar_expirados and not item.get("expirado") and set(item.get("categorias", [])) <= categorias:
+            item["expirado"] = True
+            resumo["expirados"] += 1
+        return item
+
+    # Os lotes já salvos são fixados antes de o upsert começar a mexer no acervo
+    salvos = list(acervo.ordem) if acervo is not None else []
+
+    feitos = set()
+    for item in coletados:
+        item["cl"] = extrair_cl(item["url"])
+        item.setdefault("coletado_em", agora_iso)
+        anterior = acervo.obter(item["cl"]) if acervo is not None else None
+        if anterior:
+            item["categorias"] = anterior.get("categorias", [])
+        feitos.add(item["cl"])
+        resumo["coletados"] += 1
+        yield atualizar(item)
+
+    # Lotes novos cuja coleta falhou não estão em lugar nenhum: tentam de novo na próxima
+    for cl in salvos:
+        if cl not in feitos:
+            yield atualizar(acervo.obter(cl))
+
+
+# --- GRAVAÇÃO EM STREAMING E CHECKPOINT ---
+
+def salvar_checkpoint(target_url, lista_urls, urls_visitar, impressao_acervo):
+    """
+    Grava o plano da coleta (listagem + o que falta visitar) e zera o arquivo
+    parcial. O plano guarda a impressão do acervo de onde saiu: retomar em
+    cima de um acervo que já mudou (outra execução terminou depois) misturaria
+    uma listagem velha com dados novos.
+    """
+    plano = {
+        "target_url": target_url,
+        "iniciado_em": datetime.now().isoformat(timespec="seconds"),
+        "acervo": impressao_acervo,
+        "lista_urls": lista_urls,
+        "urls_visitar": urls_visitar,
+    }
+    _gravar_json_atomico(config.CHECKPOINT_FILE, plano)
+    open(config.PARTIAL_DATA_FILE, 'w', encoding='utf-8').close()
+
+
+def carregar_checkpoint(impressao_acervo):
+    """O plano da coleta interrompida, ou None se não há (ou se é de outro estado do acervo)."""
+    if not os.path.exists(config.CHECKPOINT_FILE):
+        return None
+    with open(config.CHECKPOINT_FILE, 'r', encoding='utf-8') as f:
+        plano = json.load(f)
+    if plano.get("acervo") != impressao_acervo:
+        print(Fore.YELLOW + f"   ⚠️ A coleta interrompida de {plano.get('iniciado_em')} é anterior à última "
+              "atualização do acervo: descartada." + Style.RESET_ALL)
+        limpar_checkpoint()
+        return None
+    return plano
+
+
+def atualizar_checkpoint(impressao_acervo):
+    """Depois de gravar uma coleta incompleta no acervo, o plano passa a valer para o acervo novo."""
+    if not os.path.exists(config.CHECKPOINT_FILE):
+        return
+    with open(config.CHECKPOINT_FILE, 'r', encoding='utf-8') as f:
+        plano = json.load(f)
+    plano["acervo"] = impressao_acervo
+    _gravar_json_atomico(config.CHECKPOINT_FILE, plano)
+
+
+def ler_coleta_parcial():
+    """
+    Lê, em streaming, os lotes já gravados no JSONL da coleta em andamento.
+    Uma última linha cortada (queda no meio da escrita) é ignorada.
+    """
+    if not os.path.exists(config.PARTIAL_DATA_FILE):
+        return
+    with open(config.PARTIAL_DATA_FILE, 'r', encoding='utf-8') as f:
+        for linha in f:
+            try:
+                yield json.loads(linha)
+            except json.JSONDecodeError:
+                continue
+
+
+def limpar_checkpoint():
+    for caminho in (config.CHECKPOINT_FILE, config.PARTIAL_DATA_FILE):
+        if os.path.exists(caminho):
+            os.remove(caminho)
+
+
+def _gravar_json_atomico(caminho, dados, indent=None):
+    """Escreve num arquivo temporário e troca no final: nunca deixa JSON pela metade."""
+    temporario = caminho + ".tmp"
+    with open(temporario, 'w', encoding='utf-8') as f:
+        json.dump(dados, f, ensure_ascii=False, indent=indent)
+    os.replace(temporario, caminho)
+
+
+# --- BLOQUEIO DE RECURSOS ---
+
+def _dominio_na_lista(host, dominios):
+    return any(host == d or host.endswith("." + d) for d in dominios)
+
+
+def motivo_bloqueio(tipo_recurso, url):
+    """
+    Aplica a política de bloqueio do config a uma requisição.
+    Devolve None (liberar) ou o motivo do bloqueio ("dominio" / "tipo").
+    """
+    host = (urlparse(url).hostname or "").lower()
+
+    if _dominio_na_lista(host, config.BLOQUEIO_DOMINIOS_LIBERADOS):
+        return None
+    if _dominio_na_lista(host, config.BLOQUEIO_DOMINIOS):
+        return "dominio"
+    if tipo_recurso in config.BLOQUEIO_TIPOS:
+        return "tipo"
+    return None
+
+
+async def instalar_bloqueio_recursos(context):
+    """
+    Intercepta todas as requisições do contexto e aborta as que a política
+    bloqueia. Devolve o dicionário de contadores, preenchido durante a execução.
+    """
+    contadores = {"bloqueadas": 0, "liberadas": 0, "bytes_evitados": 0, "por_tipo": {}}
+
+    async def _rotear(route):
+        request = route.request
+        # A página principal nunca é bloqueada
+        motivo = None if request.resource_type == "document" else motivo_bloqueio(request.resource_type, request.url)
+
+        if motivo:
+            contadores["bloqueadas"] += 1
+            contadores["por_tipo"][request.resource_type] = contadores["por_tipo"].get(request.resource_type, 0) + 1
+            contadores["bytes_evitados"] += config.BLOQUEIO_TAMANHO_ESTIMADO.get(request.resource_type, 0)
+            await route.abort()
+        else:
+            contadores["liberadas"] += 1
+            await route.continue_()
+
+    await context.route("**/*", _rotear)
+    return contadores
+
+
+async def fechar_popups_e_cookies(page):
     """
     Força o fechamento de modais e cookies via JavaScript.
     Agora mais agressivo para pegar modais que aparecem com delay.
     """
     # Pequeno delay para garantir que animações de entrada do modal iniciaram
     try:
-        page.wait_for_timeout(500)
+        await page.wait_for_timeout(500)
 
         # Executa JS no navegador para destruir os elementos
-        page.evaluate("""
+        await page.evaluate("""
             () => {
                 const removeEl = (el) => {
                     if (el) {
@@ -35,7 +240,7 @@ def fechar_popups_e_cookies(page):
 
                 // 1. Banner de Cookies
                 removeEl(document.querySelector('.rodape_cookies'));
-                
+
                 // 2. Modal de Aviso Específico (#modalAviso)
                 const modal = document.getElementById('modalAviso');
                 if (modal) {
@@ -47,7 +252,7 @@ def fechar_popups_e_cookies(page):
                 // 3. Limpeza Genérica (Remove qualquer fundo escuro 'backdrop')
                 document.querySelectorAll('.modal-backdrop').forEach(el => removeEl(el));
                 document.querySelectorAll('.modal.show').forEach(el => removeEl(el));
-                
+
                 // 4. Destrava o scroll do corpo da página
                 document.body.classList.remove('modal-open');
                 document.body.style.paddingRight = '';
@@ -59,213 +264,495 @@ def fechar_popups_e_cookies(page):
         pass
 
 
-def extrair_metadados_tabela(page):
+def interpretar_linhas_tabela(linhas):
     """
-    Analisa a tabela HTML específica do Palácio dos Leilões 
-    para extrair Lote, Data e Local de forma precisa.
+    Converte as linhas da tabela de informações (lista de células por linha)
+    em Lote, Data e Local. Usado tanto pelo Playwright quanto pelo HTTP puro.
     """
     dados = {"lote": "N/A", "data": "N/A", "local": "N/A"}
 
-    try:
-        # OTIMIZAÇÃO: Espera a tabela aparecer antes de ler
-        try:
-            page.wait_for_selector("table.table-sm", timeout=5000)
-        except:
-            pass  # Se não aparecer em 5s, tenta ler o que tiver
+    for colunas in linhas:
+        if len(colunas) >= 2:
+            chave = colunas[0].strip().lower()
+            valor = colunas[1].strip()
+
+            if "lote" == chave:
+                dados["lote"] = valor
+            elif "leilão e data" in chave:
+                dados["data"] = valor
+            elif "local" in chave:
+                dados["local"] = valor
 
-        # Seleciona todas as linhas da tabela de informações
-        linhas = page.locator("table.table-sm tr").all()
+    return dados
 
-        for linha in linhas:
-            colunas = linha.locator("td").all_inner_texts()
 
-            if len(colunas) >= 2:
-                chave = colunas[0].strip().lower()
-                valor = colunas[1].strip()
+# Lê tabela + descrição numa única ida ao navegador (um page.evaluate).
+# Antes eram: locator.all() + all_inner_texts() por linha + count() + inner_text().
+JS_LER_LOTE = """
+    () => {
+        const linhas = [];
+        document.querySelectorAll('table.table-sm tr').forEach(tr => {
+            linhas.push(Array.from(tr.querySelectorAll('td'), td => td.innerText));
+        });
+        const desc = document.querySelector('div.bg-cinza-claro');
+        return {linhas: linhas, descricao: desc ? desc.innerText : null};
+    }
+"""
+
+# Condição explícita de "página do lote pronta": tabela com linhas e descrição no DOM.
+# Substitui a heurística de networkidle (que esperava até imagens e rastreadores).
+JS_LOTE_PRONTO = """
+    () => document.querySelector('table.table-sm tr') !== null
+        && document.querySelector('div.bg-cinza-claro') !== null
+"""
+
+# Varre os cards da listagem numa única ida ao navegador.
+# Antes eram: locator.all() dos cards + .all() por card + get_attribute() por elemento.
+JS_LER_CARDS = """
+    () => {
+        const cards = document.querySelectorAll('#div_lotes div.col-md-3');
+        const onclicks = [];
+        cards.forEach(card => {
+            card.querySelectorAll("[onclick*='exibir_lote']").forEach(el => {
+                onclicks.push(el.getAttribute('onclick'));
+            });
+        });
+        return {cards: cards.length, onclicks: onclicks};
+    }
+"""
+
+
+async def ler_tabela_e_descricao(page):
+    """
+    Extrai as linhas da tabela de informações e a descrição do lote
+    com um único page.evaluate. Devolve também quantas idas e voltas
+    (IPC) ao navegador foram economizadas em relação à leitura por locators.
+    """
+    bruto = await page.evaluate(JS_LER_LOTE)
+    # Locators: 1 (all das linhas) + 1 por linha + count + inner_text
+    bruto["ida_volta_economizadas"] = len(bruto["linhas"]) + 3 - 1
+    return bruto
 
-                if "lote" == chave:
-                    dados["lote"] = valor
-                elif "leilão e data" in chave:
-                    dados["data"] = valor
-                elif "local" in chave:
-                    dados["local"] = valor
 
-    except Exception as e:
-        print(Fore.RED + f"   ⚠️ Erro ao ler tabela: {e}" + Style.RESET_ALL)
+async def coletar_urls_listagem(page, target_url):
+    """
+    Abre a listagem, expande todos os cards e devolve as URLs dos lotes
+    na ordem em que aparecem na página (None se a listagem não carregou).
+    """
+    print("   Carregando listagem principal...")
+    # Sem esperar o evento 'load': a prontidão real é o '#div_lotes' visível (abaixo)
+    with trecho("scraping.listagem.goto"):
+        await page.goto(target_url, timeout=60000, wait_until="domcontentloaded")
 
-    return dados
+    # --- LIMPEZA INICIAL ---
+    print(Fore.YELLOW + "   🧹 Varrendo bloqueios visuais..." + Style.RESET_ALL)
+    with trecho("scraping.listagem.popups"):
+        await fechar_popups_e_cookies(page)
 
+    # --- ESPERA PELO CONTAINER PRINCIPAL ---
+    try:
+        with trecho("scraping.listagem.esperar_container"):
+            await page.wait_for_selector(
+                "#div_lotes", state="visible", timeout=15000)
+    except:
+        contar("scraping.fallback.container_timeout")
+        print(
+            Fore.RED + "❌ Erro: Container '#div_lotes' não encontrado ou demorou demais." + Style.RESET_ALL)
+        return None
 
-def executar_scraping(target_url=config.URL_ALVO):
-    print(Fore.CYAN + f"\n🚀 Iniciando Scraper..." + Style.RESET_ALL)
-    print(f"Alvo: {target_url}")
+    container_lotes = page.locator("#div_lotes")
 
-    dados_coletados = []
+    # --- BOTÃO EXIBIR TODOS (Com Lógica de Força Bruta) ---
+    try:
+        botao_exibir = container_lotes.locator(".btn_exibir_todos")
 
-    with sync_playwright() as p:
-        print(Fore.WHITE + "   Iniciando navegador (pode levar alguns segundos)..." + Style.RESET_ALL)
+        # Verifica se o botão existe antes de tentar qualquer coisa
+        if await botao_exibir.count() > 0 and await botao_exibir.is_visible():
+            print(
+                Fore.YELLOW + "   Botão 'Exibir todos' detectado. Clicando..." + Style.RESET_ALL)
 
-        # --- DEFININDO USER-AGENT REAL (Anti-bloqueio) ---
-        # Simula um navegador Chrome real no Windows 10
-        user_agent_real = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+            try:
+                # Tenta clique normal primeiro
+                await botao_exibir.click(timeout=3000)
+            except Exception:
+                contar("scraping.fallback.clique_forcado")
+                print(
+                    Fore.RED + "   ⚠️ Clique bloqueado por modal. Tentando força bruta..." + Style.RESET_ALL)
+                # Se falhar (modal na frente), roda limpeza de novo e força o clique
+                await fechar_popups_e_cookies(page)
+                await botao_exibir.click(force=True, timeout=5000)
+
+            print("   ✅ Clique realizado. Aguardando carregamento dos itens...")
+            # Tempo de espera para a lista carregar
+            with trecho("scraping.listagem.esperar_exibir_todos"):
+                await page.wait_for_timeout(5000)
+        else:
+            print("   Lista parece completa ou botão não visível.")
+    except Exception as e:
+        contar("scraping.fallback.exibir_todos_ignorado")
+        print(
+            Fore.YELLOW + f"   Nota: Botão 'Exibir todos' ignorado: {e}" + Style.RESET_ALL)
+
+    # --- COLETA DE LINKS ---
+    print("   Mapeando itens dentro de '#div_lotes'...")
+    # dict em vez de set: remove duplicados mantendo a ordem da listagem
+    urls_unicas = {}
+
+    # Busca cards apenas dentro da área de resultados (tudo em um page.evaluate)
+    with trecho("scraping.listagem.ler_cards"):
+        cards = await page.evaluate(JS_LER_CARDS)
+
+    print(
+        Fore.BLUE + f"   Cards encontrados na área correta: {cards['cards']}" + Style.RESET_ALL)
+
+    for onclick_text in cards["onclicks"]:
+        # Extrai ID: exibir_lote(1466396,8135) -> Pega 1466396
+        match = re.search(r'exibir_lote\(\s*(\d+)', onclick_text or "")
+        if match:
+            urls_unicas[url_do_lote(match.group(1), target_url)] = True
+
+    # Locators: 1 (all dos cards) + 1 por card + 1 get_attribute por elemento
+    economizadas = cards["cards"] + len(cards["onclicks"])
+    print(
+        Fore.BLUE + f"   ⚡ Listagem lida em 1 ida ao navegador ({economizadas} economizadas)." + Style.RESET_ALL)
+
+    return list(urls_unicas)
+
+
+def montar_item(url, meta, texto_desc):
+    """Monta o item no formato de 'dados_brutos.json'."""
+    return {
+        "url": url,
+        "lote": meta['lote'],
+        "data": meta['data'],
+        "local": meta['local'],
+        "texto_completo": limpar_texto(texto_desc),
+        "texto_bruto_com_quebras": texto_desc
+    }
+
+
+async def extrair_lote(page, url, estatisticas=None):
+    """Abre a página de um lote no navegador e devolve o item."""
+    # Aumentei o timeout geral da página
+    with trecho("scraping.lote.goto"):
+        resposta = await page.goto(url, timeout=60000, wait_until="domcontentloaded")
+    if resposta is not None and resposta.status >= 400:
+        raise ErroHttp(resposta.status, url)
+
+    # OTIMIZAÇÃO: Espera explícita pela tabela e pela descrição
+    try:
+        with trecho("scraping.lote.esperar_pronto"):
+            await page.wait_for_function(JS_LOTE_PRONTO, timeout=5000)
+    except:
+        contar("scraping.fallback.lote_pronto_timeout")
+        pass  # Se não ficar pronta em 5s, tenta ler o que tiver
 
-        browser = p.chromium.launch(headless=True)
+    with trecho("scraping.lote.ler"):
+        bruto = await ler_tabela_e_descricao(page)
+    if estatisticas is not None:
+        estatisticas["ida_volta_economizadas"] += bruto["ida_volta_economizadas"]
 
-        # Injetamos o User-Agent aqui
-        context = browser.new_context(user_agent=user_agent_real)
-        page = context.new_page()
+    texto_desc = bruto["descricao"]
+    if texto_desc is None:
+        contar("scraping.lote.sem_descricao")
+        texto_desc = "Descrição não localizada (Elemento não carregou ou não existe)."
 
-        try:
-            print("   Carregando listagem principal...")
-            page.goto(target_url, timeout=60000)
+    return montar_item(url, interpretar_linhas_tabela(bruto["linhas"]), texto_desc)
 
-            # --- LIMPEZA INICIAL ---
-            print(Fore.YELLOW + "   🧹 Varrendo bloqueios visuais..." + Style.RESET_ALL)
-            fechar_popups_e_cookies(page)
 
-            # --- ESPERA PELO CONTAINER PRINCIPAL ---
-            try:
-                page.wait_for_selector(
-                    "#div_lotes", state="visible", timeout=15000)
-            except:
-                print(
-                    Fore.RED + "❌ Erro: Container '#div_lotes' não encontrado ou demorou demais." + Style.RESET_ALL)
-                return
+async def extrair_lote_http(url):
+    """
+    Caminho leve: baixa o HTML estático numa sessão keep-alive (em thread,
+    para não travar o loop) e lê os campos sem abrir navegador.
+    Devolve None se o HTML não tiver a tabela ou a descrição.
+    """
+    with trecho("scraping.lote.http"):
+        bruto = await asyncio.to_thread(http_fetcher.baixar_lote, url)
+    if bruto is None:
+        return None
+    return montar_item(url, interpretar_linhas_tabela(bruto["linhas"]), bruto["descricao"])
 
-            container_lotes = page.locator("#div_lotes")
 
-            # --- BOTÃO EXIBIR TODOS (Com Lógica de Força Bruta) ---
-            try:
-                botao_exibir = container_lotes.locator(".btn_exibir_todos")
+async def _coletar_lote(context, abas, url, controlador, estatisticas):
+    """
+    Uma tentativa de coleta de um lote: HTTP puro primeiro e, se o HTML
+    vier incompleto, o navegador (que conta como mais um acesso ao site).
+    Devolve (item, latência): a latência soma só o tempo dos acessos ao site,
+    sem a espera de ritmo do fallback (senão o controlador tomaria a própria
+    fila por lentidão do site).
+    """
+    item = None
+    latencia = 0.0
+    if config.SCRAP_BACKEND == "http":
+        inicio = time.monotonic()
+        item = await extrair_lote_http(url)
+        latencia += time.monotonic() - inicio
+        if item is None:
+            estatisticas["fallback"] += 1
+            contar("scraping.fallback.http_para_playwright")
+            with trecho("scraping.espera_ritmo"):
+                await controlador.aguardar()
+        else:
+            estatisticas["http"] += 1
+
+    if item is None:
+        if not abas:
+            with trecho("scraping.navegador.nova_aba"):
+                abas.append(await context.new_page())
+        inicio = time.monotonic()
+        with trecho("scraping.lote.playwright"):
+            item = await extrair_lote(abas[0], url, estatisticas)
+        latencia += time.monotonic() - inicio
+        estatisticas["playwright"] += 1
+
+    return item, latencia
+
+
+async def _trabalhador_lotes(context, fila, saida, total, controlador, progresso, estatisticas):
+    """
+    Um trabalhador do pool: consome a fila compartilhada até ela esvaziar.
+    Cada lote é escrito no JSONL da coleta assim que termina, então nada
+    fica acumulado em memória e uma queda não perde o que já foi feito.
+    A aba do navegador só é aberta se o caminho HTTP precisar de fallback.
+    Falhas de rede/servidor são repetidas até SCRAP_MAX_TENTATIVAS vezes.
+    """
+    abas = []
+    try:
+        # A fila é um iterador comum: no asyncio só uma corrotina roda por vez,
+        # então o next() nunca entrega o mesmo lote para dois trabalhadores.
+        for url in fila:
+            item = None
+            for tentativa in range(1, config.SCRAP_MAX_TENTATIVAS + 1):
+                # --- PAUSA GLOBAL ADAPTATIVA (Anti-bloqueio) ---
+                # O ritmo vale para o site inteiro e se ajusta à saúde do servidor
+                with trecho("scraping.espera_ritmo"):
+                    await controlador.aguardar()
 
-                # Verifica se o botão existe antes de tentar qualquer coisa
-                if botao_exibir.count() > 0 and botao_exibir.is_visible():
+                try:
+                    with trecho("scraping.lote"):
+                        item, latencia = await _coletar_lote(context, abas, url, controlador, estatisticas)
+                    controlador.registrar_sucesso(latencia)
+                    break
+                except CircuitoAberto:
+                    raise
+                except Exception as e:
+                    contar(f"scraping.erro.{e.__class__.__name__}")
+                    if not controlador.registrar_falha(e) or tentativa == config.SCRAP_MAX_TENTATIVAS:
+                        contar("scraping.lotes_desistidos")
+                        print(
+                            Fore.RED + f"   ❌ Falha na URL {url} (tentativa {tentativa}): {e}" + Style.RESET_ALL)
+                        break
+                    controlador.stats["retentativas"] += 1
+                    contar("scraping.retentativas")
+                    espera = controlador.tempo_backoff(tentativa)
                     print(
-                        Fore.YELLOW + "   Botão 'Exibir todos' detectado. Clicando..." + Style.RESET_ALL)
+                        Fore.YELLOW + f"   🔁 {url}: {e.__class__.__name__}, nova tentativa em {espera:.1f}s" + Style.RESET_ALL)
+                    with trecho("scraping.backoff"):
+                        await asyncio.sleep(espera)
+
+            progresso[0] += 1
+            if item is None:
+                continue
+
+            item["coletado_em"] = datetime.now().isoformat(timespec="seconds")
+            # flush por linha: se o processo morrer, o lote já está no disco
+            with trecho("scraping.gravar_parcial"):
+                saida.write(json.dumps(item, ensure_ascii=False) + "\n")
+                saida.flush()
+            contar("scraping.lotes_coletados")
+
+            # Feedback visual
+            resumo = item['texto_completo'][:40] + "..." if len(
+                item['texto_completo']) > 40 else item['texto_completo']
+            print(Fore.GREEN +
+                  f"   ✅ [{progresso[0]}/{total}] [{item['lote']}] {resumo}" + Style.RESET_ALL)
+    finally:
+        for page in abas:
+            await page.close()
+
+
+async def _rodar_trabalhadores(corrotinas):
+    """
+    Roda os trabalhadores juntos. Se um deles falhar (ex.: circuito aberto), os
+    outros são cancelados e esperados antes de a exceção subir: nenhum continua
+    escrevendo no JSONL ou usando o navegador depois que eles forem fechados.
+    """
+    tarefas = [asyncio.ensure_future(corrotina) for corrotina in corrotinas]
+    try:
+        await asyncio.wait(tarefas, return_when=asyncio.FIRST_EXCEPTION)
+    finally:
+        for tarefa in tarefas:
+            tarefa.cancel()  # Nas que já terminaram não faz nada
+        await asyncio.gather(*tarefas, return_exceptions=True)
 
-                    try:
-                        # Tenta clique normal primeiro
-                        botao_exibir.click(timeout=3000)
-                    except Exception:
-                        print(
-                            Fore.RED + "   ⚠️ Clique bloqueado por modal. Tentando força bruta..." + Style.RESET_ALL)
-                        # Se falhar (modal na frente), roda limpeza de novo e força o clique
-                        fechar_popups_e_cookies(page)
-                        botao_exibir.click(force=True, timeout=5000)
-
-                    print("   ✅ Clique realizado. Aguardando carregamento dos itens...")
-                    # Tempo de espera para a lista carregar
-                    page.wait_for_timeout(5000)
-                else:
-                    print("   Lista parece completa ou botão não visível.")
-            except Exception as e:
-                print(
-                    Fore.YELLOW + f"   Nota: Botão 'Exibir todos' ignorado: {e}" + Style.RESET_ALL)
+    for tarefa in tarefas:
+        if not tarefa.cancelled() and tarefa.exception() is not None:
+            raise tarefa.exception()
 
-            # --- COLETA DE LINKS ---
-            print("   Mapeando itens dentro de '#div_lotes'...")
-            urls_unicas = set()
 
-            # Busca cards apenas dentro da área de resultados
-            cards = container_lotes.locator("div.col-md-3").all()
+async def _executar_scraping_async(target_url, concorrencia, acervo, incremental=True, plano=None):
+    """
+    Devolve as URLs da listagem; os lotes coletados vão direto para o JSONL parcial.
+    No modo `incremental` só lotes novos ou vencidos no `acervo` são visitados.
+    Com `plano` (checkpoint de uma execução interrompida) a listagem é pulada
+    e só as URLs que ainda não estão no JSONL são visitadas.
+    Devolve (lista_urls, completa, stats_do_controlador).
+    """
+    lista_urls = None
+    completa = False
+    controlador = ControladorTaxa()
 
-            print(
-                Fore.BLUE + f"   Cards encontrados na área correta: {len(cards)}" + Style.RESET_ALL)
+    # Import tardio: o Playwright só é carregado quando a coleta começa de fato
+    from playwright.async_api import async_playwright
 
-            for card in cards:
-                # Busca elementos clicáveis dentro do card
-                elementos_clicaveis = card.locator(
-                    "[onclick*='exibir_lote']").all()
+    async with async_playwright() as p:
+        print(Fore.WHITE + "   Iniciando navegador (pode levar alguns segundos)..." + Style.RESET_ALL)
 
-                for el in elementos_clicaveis:
-                    onclick_text = el.get_attribute("onclick")
-                    # Extrai ID: exibir_lote(1466396,8135) -> Pega 1466396
-                    match = re.search(r'exibir_lote\(\s*(\d+)', onclick_text)
-                    if match:
-                        urls_unicas.add(
-                            f"https://www.palaciodosleiloes.com.br/site/lotem.php?cl={match.group(1)}")
+        with trecho("scraping.navegador.iniciar"):
+            browser = await p.chromium.launch(headless=True)
 
-            lista_urls = list(urls_unicas)
+            # Injetamos o User-Agent aqui
+            context = await browser.new_context(user_agent=config.USER_AGENT)
+            bloqueio = await instalar_bloqueio_recursos(context) if config.BLOQUEIO_ATIVO else None
 
-            if config.LIMIT_SCRAP:
+        try:
+            if plano:
+                lista_urls = plano["lista_urls"]
+                ja_feitas = {item["url"] for item in ler_coleta_parcial()}
+                urls_visitar = [url for url in plano["urls_visitar"] if url not in ja_feitas]
                 print(
-                    Fore.YELLOW + f"⚠️  Modo Teste: Limitando a {config.LIMIT_SCRAP} itens." + Style.RESET_ALL)
-                lista_urls = lista_urls[:config.LIMIT_SCRAP]
+                    Fore.GREEN + f"⏯️  Retomando coleta de {plano['iniciado_em']}: {len(ja_feitas)} lotes já gravados, "
+                    f"{len(urls_visitar)} restantes." + Style.RESET_ALL)
+            else:
+                page = await context.new_page()
+                with trecho("scraping.listagem"):
+                    lista_urls = await coletar_urls_listagem(page, target_url)
+                if lista_urls is None:
+                    return lista_urls, completa, controlador.resumo()
+                await page.close()
+
+                if config.LIMIT_SCRAP:
+                    print(
+                        Fore.YELLOW + f"⚠️  Modo Teste: Limitando a {config.LIMIT_SCRAP} itens." + Style.RESET_ALL)
+                    lista_urls = lista_urls[:config.LIMIT_SCRAP]
 
-            print(
-                Fore.GREEN + f"📦 Encontrados {len(lista_urls)} lotes VÁLIDOS para analisar." + Style.RESET_ALL)
+                print(
+                    Fore.GREEN + f"📦 Encontrados {len(lista_urls)} lotes VÁLIDOS na listagem." + Style.RESET_ALL)
 
-            # --- PROCESSAMENTO INDIVIDUAL ---
-            for i, url in enumerate(lista_urls):
-                print(f"[{i+1}/{len(lista_urls)}] Acessando lote...", end="\r")
+                urls_visitar = lista_urls
+                if incremental:
+                    urls_visitar = selecionar_urls_pendentes(
+                        lista_urls, acervo, datetime.now(), config.SCRAP_TTL_HORAS)
+                    print(
+                        Fore.GREEN + f"♻️  Incremental: {len(lista_urls) - len(urls_visitar)} lotes em dia, {len(urls_visitar)} novos ou vencidos para analisar." + Style.RESET_ALL)
 
-                # --- PAUSA ALEATÓRIA (Anti-bloqueio) ---
-                # Essencial para não ser detectado como robô pelo servidor
-                # Espera entre 2 e 5 segundos
-                tempo_espera = random.uniform(2, 5)
-                time.sleep(tempo_espera)
+                salvar_checkpoint(target_url, lista_urls, urls_visitar, acervo.impressao())
 
-                try:
-                    # Aumentei o timeout geral da página
-                    page.goto(url, timeout=60000)
-
-                    # OTIMIZAÇÃO: Espera a rede acalmar (garante que AJAX carregou)
-                    try:
-                        page.wait_for_load_state("networkidle", timeout=5000)
-                    except:
-                        # Se networkidle falhar (timeout), segue o jogo
-                        pass
-
-                    meta = extrair_metadados_tabela(page)
-
-                    seletor_desc = "div.bg-cinza-claro"
-                    texto_desc = ""
-
-                    # OTIMIZAÇÃO: Espera explícita pelo elemento de descrição
-                    try:
-                        # Aguarda até 5 segundos para o elemento aparecer no DOM
-                        page.wait_for_selector(
-                            seletor_desc, state="visible", timeout=5000)
-                    except:
-                        pass
-
-                    if page.locator(seletor_desc).count() > 0:
-                        texto_desc = page.locator(
-                            seletor_desc).first.inner_text()
-                    else:
-                        texto_desc = "Descrição não localizada (Elemento não carregou ou não existe)."
-
-                    item = {
-                        "url": url,
-                        "lote": meta['lote'],
-                        "data": meta['data'],
-                        "local": meta['local'],
-                        "texto_completo": limpar_texto(texto_desc),
-                        "texto_bruto_com_quebras": texto_desc
-                    }
+            # --- PROCESSAMENTO EM PARALELO ---
+            qtd_abas = max(1, min(concorrencia, len(urls_visitar)))
+            print(f"   {qtd_abas} trabalhador(es) via '{config.SCRAP_BACKEND}', ritmo adaptativo até {config.SCRAP_MAX_REQ_POR_SEG} acesso(s)/s...")
 
-                    dados_coletados.append(item)
+            fila = iter(urls_visitar)
+            progresso = [0]
+            estatisticas = {"http": 0, "fallback": 0, "playwright": 0, "ida_volta_economizadas": 0}
 
-                    # Feedback visual
-                    resumo = item['texto_completo'][:40] + "..." if len(
-                        item['texto_completo']) > 40 else item['texto_completo']
-                    print(Fore.GREEN +
-                          f"   ✅ [{meta['lote']}] {resumo}" + Style.RESET_ALL)
+            with open(config.PARTIAL_DATA_FILE, 'a', encoding='utf-8') as saida, trecho("scraping.lotes"):
+                await _rodar_trabalhadores([
+                    _trabalhador_lotes(context, fila, saida, len(urls_visitar), controlador, progresso, estatisticas)
+                    for _ in range(qtd_abas)
+                ])
+            completa = True
 
-                except Exception as e:
-                    print(
-                        Fore.RED + f"   ❌ Falha na URL {url}: {e}" + Style.RESET_ALL)
+            if config.SCRAP_BACKEND == "http":
+                print(
+                    Fore.BLUE + f"   🌐 HTTP puro: {estatisticas['http']} lotes | Fallback Playwright: {estatisticas['fallback']}" + Style.RESET_ALL)
+            if estatisticas["playwright"]:
+                print(
+                    Fore.BLUE + f"   ⚡ {estatisticas['playwright']} lotes lidos no navegador com 1 evaluate cada "
+                    f"({estatisticas['ida_volta_economizadas']} idas ao navegador economizadas)." + Style.RESET_ALL)
 
+        except CircuitoAberto as e:
+            contar("scraping.circuito_interrompeu")
+            print(
+                Fore.RED + f"⛔ {e} Rode com --resume mais tarde para continuar." + Style.RESET_ALL)
         except Exception as e:
+            contar("scraping.erro_critico")
             print(
                 Fore.RED + f"Erro crítico na navegação: {e}" + Style.RESET_ALL)
         finally:
-            browser.close()
+            with trecho("scraping.navegador.fechar"):
+                await browser.close()
 
-    if dados_coletados:
-        with open(config.RAW_DATA_FILE, 'w', encoding='utf-8') as f:
-            json.dump(dados_coletados, f, ensure_ascii=False, indent=4)
+        stats = controlador.resumo()
         print(
-            Fore.CYAN + f"\n✨ Concluído! {len(dados_coletados)} itens salvos em '{config.RAW_DATA_FILE}'" + Style.RESET_ALL)
-    else:
+            Fore.BLUE + f"   📈 Ritmo: {stats['taxa_efetiva']:.2f} acessos/s efetivos (final {stats['taxa_final']:.2f}/s) | "
+            f"latência média {stats['latencia_media']:.2f}s | {stats['retentativas']} retentativas | "
+            f"{stats['falhas']} falhas | circuito aberto {stats['aberturas_circuito']}x" + Style.RESET_ALL)
+
+        if bloqueio:
+            por_tipo = ", ".join(f"{tipo}: {qtd}" for tipo, qtd in sorted(bloqueio["por_tipo"].items()))
+            print(
+                Fore.BLUE + f"   🚫 Recursos bloqueados: {bloqueio['bloqueadas']} de {bloqueio['bloqueadas'] + bloqueio['liberadas']} "
+                f"requisições (~{bloqueio['bytes_evitados'] / 1024 / 1024:.1f} MB estimados) [{por_tipo}]" + Style.RESET_ALL)
+
+    return lista_urls, completa, stats
+
+
+def executar_scraping(target_url=config.URL_ALVO, concorrencia=None, incremental=None, retomar=False):
+    """
+    Roda a coleta completa. Com retomar=True, continua a execução interrompida
+    a partir do checkpoint (mesma listagem, pulando os lotes já gravados).
+    """
+    print(Fore.CYAN + f"\n🚀 Iniciando Scraper..." + Style.RESET_ALL)
+
+    if concorrencia is None:
+        concorrencia = config.SCRAP_CONCORRENCIA
+    if incremental is None:
+        incremental = config.SCRAP_INCREMENTAL
+
+    with trecho("scraping.carregar_salvos"):
+        acervo = lot_store.abrir_lotes()
+
+    plano = None
+    if retomar:
+        plano = carregar_checkpoint(acervo.impressao())
+        if plano is None:
+            print(Fore.YELLOW + "   Nenhuma coleta interrompida encontrada. Começando do zero." + Style.RESET_ALL)
+        else:
+            target_url = plano["target_url"]
+    elif os.path.exists(config.CHECKPOINT_FILE):
+        print(Fore.YELLOW + "   ⚠️ Havia uma coleta interrompida; ela será descartada (use --resume para continuar)." + Style.RESET_ALL)
+
+    print(f"Alvo: {target_url}")
+    agora = datetime.now()
+
+    with trecho("scraping.coleta"):
+        lista_urls, completa, stats = asyncio.run(_executar_scraping_async(
+            target_url, concorrencia, acervo, incremental, plano))
+
+    if not lista_urls:
         print(Fore.RED + "\nNenhum dado foi coletado." + Style.RESET_ALL)
+        return stats
+
+    with trecho("scraping.mesclar_gravar"):
+        # Em streaming: o JSONL da coleta e o acervo são lidos um lote por vez.
+        # Em modo teste (LIMIT_SCRAP) a listagem está cortada: não dá para saber o que sumiu.
+        # Fora do modo incremental a coleta substitui o acervo, como antes.
+        resumo = {}
+        gravados = acervo.upsert(
+            mesclar_coleta(acervo if incremental else None, lista_urls, ler_coleta_parcial(),
+                           categorias_da_url(target_url), agora, marcar_expirados=not config.LIMIT_SCRAP,
+                           resumo=resumo),
+            reordenar=True, remover_ausentes=not incremental, ordem=[extrair_cl(url) for url in lista_urls])
+    contar("scraping.lotes_expirados", resumo["expirados"])
+    contar("scraping.lotes_gravados", gravados)
+    # Coleta interrompida (circuito/erro): o que já veio fica salvo e o checkpoint
+    # continua no disco para o --resume buscar o restante
+    if completa:
+        limpar_checkpoint()
+    else:
+        atualizar_checkpoint(acervo.impressao())
+    print(
+        Fore.CYAN + f"\n✨ Concluído! {resumo['coletados']} lotes coletados, {resumo['expirados']} expirados, "
+        f"{len(acervo)} itens no acervo '{acervo.pasta}' ({gravados} novos ou alterados)" + Style.RESET_ALL)
+    return stats
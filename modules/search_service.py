@@ -0,0 +1,284 @@
+"""
+Serviço local de busca (HTTP + JSON): modelo e índice carregados uma vez e
+compartilhados por quem quiser buscar (menu, painel, bot...).
+
+    GET  /status                        -> lotes, modelo, latências
+    GET  /buscar?q=furadeira&limite=20  -> {"resultados": [...], "latencia_ms": ...}
+    POST /buscar        {"consulta": "...", "limite": 20, "filtros": {...}, "modo_lexico": "bm25"}
+    POST /buscar_lote   {"consultas": ["...", "..."], "limite": 20}
+    POST /recarregar    -> força a releitura dos arquivos de inteligência
+
+Requisições simultâneas são agrupadas: cada uma entrega seus textos ao
+AgrupadorEncode, que espera alguns milissegundos por outras e chama o modelo
+uma vez só para todas (micro-batching).
+"""
+import json
+import queue
+import threading
+import time
+import traceback
+from collections import deque
+from concurrent.futures import Future
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+import numpy as np
+import config
+from modules import searcher
+from modules.query_cache import get_cache, ModeloComCache
+
+
+class AgrupadorEncode:
+    """
+    Junta os textos de várias requisições num único model.encode.
+    Quem chama `encode` fica bloqueado até o lote dele ser calculado.
+    """
+
+    def __init__(self, get_model, janela=None, lote_max=None):
+        self.get_model = get_model
+        self.janela = (config.SERVICO_JANELA_MS if janela is None else janela) / 1000
+        self.lote_max = lote_max or config.SERVICO_LOTE_MAX
+        self._fila = queue.Queue()
+        self.stats = {"chamadas_modelo": 0, "textos": 0}
+        threading.Thread(target=self._laco, daemon=True, name="agrupador-encode").start()
+
+    def encode(self, textos, **_opcoes):
+        """Mesma interface do modelo (lista de textos -> matriz normalizada)."""
+        if isinstance(textos, str):
+            return self.encode([textos])[0]
+        futuro = Future()
+        self._fila.put((list(textos), futuro))
+        return futuro.result()
+
+    def _laco(self):
+        while True:
+            pendentes = [self._fila.get()]
+            total = len(pendentes[0][0])
+            limite = time.monotonic() + self.janela
+            # Espera um pouco por outras requisições (até encher o lote)
+            while total < self.lote_max:
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    break
+                try:
+                    pedido = self._fila.get(timeout=restante)
+                except queue.Empty:
+                    break
+                pendentes.append(pedido)
+                total += len(pedido[0])
+
+            textos = [t for pedido, _ in pendentes for t in pedido]
+            try:
+                vetores = self.get_model().encode(textos, convert_to_numpy=True, normalize_embeddings=True)
+            except Exception as e:
+                for _, futuro in pendentes:
+                    futuro.set_exception(e)
+                continue
+
+            self.stats["chamadas_modelo"] += 1
+            self.stats["textos"] += len(textos)
+            inicio = 0
+            for pedido, futuro in pendentes:
+                futuro.set_result(np.asarray(vetores[inicio:inicio + len(pedido)]))
+                inicio += len(pedido)
+
+
+class ServicoBusca:
+    """Estado do serviço: índice, agrupador e estatísticas de latência."""
+
+    def __init__(self, indice=None, get_model=None):
+        self.indice = indice or searcher.INDICE
+        # Cache de vetores na frente; só as faltas entram no micro-batch do modelo
+        self.agrupador = AgrupadorEncode(get_model or searcher.get_model)
+        self.cache = get_cache()
+        self.modelo = ModeloComCache(self.cache, lambda: self.agrupador)
+        self.inicio = time.time()
+        self.requisicoes = 0
+        self.latencias = deque(maxlen=1000)  # ms das últimas requisições
+        self._lock = threading.Lock()
+
+    def registrar(self, latencia_ms):
+        with self._lock:
+            self.requisicoes += 1
+            self.latencias.append(latencia_ms)
+
+    def buscar_varios(self, consultas, limite=20, **opcoes):
+        return self.indice.buscar_varios(consultas, self.modelo, limite, **opcoes)
+
+    def status(self):
+        estado = self.indice.estado()
+        latencias = np.array(self.latencias) if self.latencias else np.zeros(1)
+        return {
+            "lotes": len(estado["dados"]),
+            "linhas": int(len(estado["embeddings"])),
+            "modelo": config.MODEL_NAME,
+            "ann": estado["ann"] is not None,
+            "no_ar_ha_s": round(time.time() - self.inicio, 1),
+            "requisicoes": self.requisicoes,
+            "latencia_ms": {
+                "p50": round(float(np.percentile(latencias, 50)), 2),
+                "p99": round(float(np.percentile(latencias, 99)), 2),
+                "media": round(float(latencias.mean()), 2),
+            },
+            "encode": dict(self.agrupador.stats),
+            "cache_consultas": self.cache.estatisticas(),
+        }
+
+
+def _inteiro(corpo, chave, padrao=None):
+    """Campo inteiro do JSON (via GET chega como texto); ValueError se não for número."""
+    valor = corpo.get(chave, padrao)
+    if valor is None:
+        return None
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        raise ValueError(f"'{chave}' deve ser um número inteiro (recebido: {valor!r}).")
+
+
+def _limite(corpo):
+    limite = _inteiro(corpo, "limite", 20)
+    if not 1 <= limite <= config.SERVICO_LIMITE_MAX:
+        raise ValueError(f"'limite' deve estar entre 1 e {config.SERVICO_LIMITE_MAX} (recebido: {limite}).")
+    return limite
+
+
+def _opcoes(corpo):
+    """Opções de busca aceitas no JSON (o resto é ignorado). Formatos errados levantam ValueError."""
+    opcoes = {chave: corpo[chave] for chave in ("modo_lexico", "nprobe", "filtros") if corpo.get(chave) is not None}
+    if "nprobe" in opcoes:
+        opcoes["nprobe"] = _inteiro(corpo, "nprobe")
+    filtros = opcoes.get("filtros")
+    if filtros is not None:
+        if not isinstance(filtros, dict) or not all(
+                isinstance(v, (str, int)) and not isinstance(v, bool) for v in filtros.values()):
+            raise ValueError("'filtros' deve ser um objeto {chave: valor} (ex: {\"cidade\": \"juatuba\", \"dias\": 7}).")
+        opcoes["filtros"] = {chave: str(valor) for chave, valor in filtros.items()}
+    return _limite(corpo), opcoes
+
+
+class ManipuladorBusca(BaseHTTPRequestHandler):
+    servico = None  # ServicoBusca, definido em criar_servidor
+
+    def log_message(self, formato, *args):
+        pass  # Sem log de cada requisição no terminal (a latência vai no /status)
+
+    def _responder(self, status, corpo, inicio=None):
+        if inicio is not None:
+            latencia = (time.perf_counter() - inicio) * 1000
+            corpo["latencia_ms"] = round(latencia, 2)
+            self.servico.registrar(latencia)
+        dados = json.dumps(corpo, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(dados)))
+        self.end_headers()
+        self.wfile.write(dados)
+
+    def _ler_json(self):
+        tamanho = int(self.headers.get("Content-Length") or 0)
+        try:
+            corpo = json.loads(self.rfile.read(tamanho) or b"{}")
+        except json.JSONDecodeError:
+            raise ValueError("Corpo da requisição não é um JSON válido.")
+        if not isinstance(corpo, dict):
+            raise ValueError("O corpo da requisição deve ser um objeto JSON.")
+        return corpo
+
+    def _atender(self, acao, medir=True):
+        """
+        Executa `acao()` (que devolve o corpo da resposta) e sempre responde em JSON:
+        entrada inválida (ValueError) -> 400; qualquer outra falha (ex: arquivos
+        de inteligência ausentes) -> 500, com o erro no terminal do serviço.
+        """
+        inicio = time.perf_counter() if medir else None
+        try:
+            status, corpo = 200, acao()
+        except ValueError as e:
+            status, corpo = 400, {"erro": str(e)}
+        except Exception as e:
+            traceback.print_exc()
+            status, corpo = 500, {"erro": f"Erro interno do serviço: {type(e).__name__}: {e}"}
+        self._responder(status, corpo, inicio)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/status":
+            self._atender(self.servico.status, medir=False)
+        elif url.path == "/buscar":
+            parametros = {chave: valores[0] for chave, valores in parse_qs(url.query).items()}
+            self._atender(lambda: self._buscar({"consulta": parametros.get("q", ""), **parametros}))
+        else:
+            self._responder(404, {"erro": f"Caminho desconhecido: {url.path}"})
+
+    def do_POST(self):
+        caminho = urlparse(self.path).path
+        acoes = {"/buscar": self._buscar, "/buscar_lote": self._buscar_lote, "/recarregar": self._recarregar}
+        if caminho not in acoes:
+            self._responder(404, {"erro": f"Caminho desconhecido: {caminho}"})
+            return
+        self._atender(lambda: acoes[caminho](self._ler_json()))
+
+    def _buscar(self, corpo):
+        consulta = corpo.get("consulta", "")
+        if not isinstance(consulta, str):
+            raise ValueError("'consulta' deve ser um texto.")
+        limite, opcoes = _opcoes(corpo)
+        resultados = self.servico.buscar_varios([consulta], limite, **opcoes)[0]
+        return {"consulta": consulta, "resultados": resultados}
+
+    def _buscar_lote(self, corpo):
+        consultas = corpo.get("consultas")
+        if not isinstance(consultas, list) or not all(isinstance(c, str) for c in consultas):
+            raise ValueError("Envie {'consultas': [...]} com as consultas em texto.")
+        limite, opcoes = _opcoes(corpo)
+        resultados = self.servico.buscar_varios(consultas, limite, **opcoes)
+        return {"resultados": [
+            {"consulta": consulta, "resultados": itens} for consulta, itens in zip(consultas, resultados)]}
+
+    def _recarregar(self, _corpo):
+        self.servico.indice.recarregar()
+        return {"ok": True, "lotes": len(self.servico.indice.estado()["dados"])}
+
+
+def criar_servidor(host=None, porta=None, servico=None):
+    """
+    Cria o servidor (ainda sem atender). Não carrega nada: modelo e índice
+    sobem na primeira busca, ou antes, por quem chama (servidor_busca.py aquece os dois).
+    """
+    servico = servico or ServicoBusca()
+    manipulador = type("Manipulador", (ManipuladorBusca,), {"servico": servico})
+    servidor = ThreadingHTTPServer((host or config.SERVICO_HOST, config.SERVICO_PORTA if porta is None else porta),
+                                  manipulador)
+    servidor.daemon_threads = True
+    return servidor, servico
+
+
+# --- CLIENTE (usado pelo menu quando BUSCA_SERVICO_URL está configurado) ---
+
+class ErroServico(Exception):
+    """O serviço respondeu, mas falhou do lado dele (5xx ou resposta inesperada)."""
+
+
+def buscar_no_servico(termo, url=None, limite=20, timeout=30):
+    """
+    Busca no serviço. Levanta OSError se ele não estiver no ar, ValueError se
+    a consulta for recusada (400, ex: filtro inválido) e ErroServico nas demais falhas.
+    """
+    import urllib.request
+    import urllib.error
+
+    url = (url or config.BUSCA_SERVICO_URL).rstrip("/") + "/buscar"
+    corpo = json.dumps({"consulta": termo, "limite": limite}).encode('utf-8')
+    pedido = urllib.request.Request(url, data=corpo, headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(pedido, timeout=timeout) as resposta:
+            return json.loads(resposta.read())["resultados"]
+    except urllib.error.HTTPError as e:
+        # O serviço manda a explicação no corpo, em JSON
+        try:
+            mensagem = json.loads(e.read()).get("erro", str(e))
+        except (ValueError, AttributeError):
+            mensagem = str(e)
+        if e.code == 400:
+            raise ValueError(mensagem)  # Erro da consulta (ex: filtro inválido)
+        raise ErroServico(f"HTTP {e.code}: {mensagem}")
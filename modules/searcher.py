@@ -1,20 +1,25 @@
-import json
-import pickle
 import os
-import unicodedata
 import re
 import csv
 import time
+import threading
+import importlib.util
 from datetime import datetime
+import numpy as np
 import config
 from colorama import Fore, Style
+from modules import embedding_store
+from modules.ann_index import IndiceANN, impressao_store
+from modules import facets
+from modules import lot_store
+from modules.campos_lote import cl_do_item
+from modules.lexical import normalizar_texto, IndiceInvertido, TabelaBM25
+from modules.query_cache import get_cache, ModeloComCache
+from modules.instrumentacao import trecho, contar
 
-try:
-    from sentence_transformers import SentenceTransformer, util
-    import torch
-    AI_AVAILABLE = True
-except ImportError:
-    AI_AVAILABLE = False
+# Só verifica se a biblioteca existe: importar o sentence-transformers puxa o
+# torch (segundos), e isso só acontece quando o modelo é realmente necessário
+AI_AVAILABLE = importlib.util.find_spec("sentence_transformers") is not None
 
 # --- OTIMIZAÇÃO DE VELOCIDADE: CACHE GLOBAL ---
 # Mantém o modelo na memória RAM para não recarregar a cada busca
@@ -28,18 +33,35 @@ def get_model():
         
     if MODELO_CACHE is None:
         print(Fore.YELLOW + "🧠 Carregando modelo de IA pela primeira vez (isso acontece só uma vez)..." + Style.RESET_ALL)
-        MODELO_CACHE = SentenceTransformer(config.MODEL_NAME)
+        with trecho("busca.carregar_modelo"):
+            from sentence_transformers import SentenceTransformer
+            MODELO_CACHE = SentenceTransformer(config.MODEL_NAME)
     return MODELO_CACHE
 
-def normalizar_texto(texto):
-    """
-    Remove acentos, coloca em minúsculas e TROCA PONTUAÇÃO POR ESPAÇO.
-    """
-    if not texto: return ""
-    nfkd = unicodedata.normalize('NFKD', texto)
-    sem_acentos = u"".join([c for c in nfkd if not unicodedata.combining(c)]).lower()
-    texto_limpo = re.sub(r'[^a-z0-9]', ' ', sem_acentos)
-    return " ".join(texto_limpo.split())
+
+def modelo_consultas():
+    """Codificador das consultas: cache de vetores na frente, modelo só nas faltas."""
+    return ModeloComCache(get_cache(), get_model)
+
+class DadosIndisponiveis(Exception):
+    """Ainda não há embeddings/dados processados (ou falta a biblioteca de IA)."""
+
+
+# Colunas do CSV (padrão Excel Brasil), usadas pelo menu e pela linha de comando
+CABECALHO_CSV = ['Relevância', 'Tipo Match', 'Lote', 'Data', 'Local', 'Descrição', 'Link']
+
+
+def linha_csv(item):
+    return [
+        f"{item['score']:.2f}",
+        item['tipo_match'],
+        item['lote'],
+        item['data'],
+        item['local'],
+        item['texto_completo'],
+        item['url']
+    ]
+
 
 def exportar_para_csv(resultados, termo):
     """Gera um arquivo CSV compatível com Excel."""
@@ -58,137 +80,464 @@ def exportar_para_csv(resultados, termo):
             writer = csv.writer(f, delimiter=';') # Ponto e vírgula é o padrão Excel Brasil
             
             # Cabeçalho
-            writer.writerow(['Relevância', 'Tipo Match', 'Lote', 'Data', 'Local', 'Descrição', 'Link'])
+            writer.writerow(CABECALHO_CSV)
             
             for item in resultados:
-                writer.writerow([
-                    f"{item['score']:.2f}",
-                    item['tipo_match'],
-                    item['lote'],
-                    item['data'],
-                    item['local'],
-                    item['texto_completo'],
-                    item['url']
-                ])
+                writer.writerow(linha_csv(item))
         
         print(Fore.GREEN + f"\n✅ Relatório salvo com sucesso em: {caminho_arquivo}")
         print(f"   (Abra com o Excel)")
     except Exception as e:
         print(Fore.RED + f"Erro ao salvar arquivo: {e}")
 
+def linhas_float32(embeddings, linhas):
+    """Só as linhas pedidas da matriz (memmap em float16), já em float32."""
+    return np.asarray(embeddings[linhas], dtype=np.float32)
+
+
+def produto_em_blocos(embeddings, consultas, bloco=None):
+    """
+    `embeddings @ consultas` percorrendo a matriz bloco a bloco: cada bloco de
+    linhas é convertido para float32, multiplicado e descartado, então a
+    memória extra é de um bloco, não de uma cópia do acervo inteiro.
+    """
+    bloco = bloco or config.BUSCA_BLOCO_LINHAS
+    consultas = np.asarray(consultas, dtype=np.float32)
+    scores = np.empty((len(embeddings),) + consultas.shape[1:], dtype=np.float32)
+    for inicio in range(0, len(embeddings), bloco):
+        scores[inicio:inicio + bloco] = np.asarray(embeddings[inicio:inicio + bloco], dtype=np.float32) @ consultas
+    return scores
+
+
+class SearchIndex:
+    """
+    Índice de busca que vive na memória entre uma busca e outra.
+    Carrega vetores, lotes e os textos já normalizados uma única vez e só
+    recarrega quando os arquivos mudam no disco (mtime/tamanho). A recarga
+    monta um estado novo completo e só então troca a referência, então uma
+    busca nunca enxerga metade do índice antigo e metade do novo.
+    """
+
+    def __init__(self, embeddings_path=None, lotes_path=None, bm25_path=None, ann_path=None, facetas_path=None):
+        self.embeddings_path = embeddings_path or config.EMBEDDINGS_FILE
+        self.lotes_path = lotes_path or config.LOTES_DIR
+        # O arquivo de estado é regravado a cada mudança do acervo: serve de assinatura dele
+        self.estado_lotes_path = os.path.join(self.lotes_path, lot_store.ARQUIVO_ESTADO)
+        self.bm25_path = bm25_path or config.BM25_FILE
+        self.ann_path = ann_path or config.ANN_FILE
+        self.facetas_path = facetas_path or config.FACETS_FILE
+        self._estado = None
+        self._lock = threading.Lock()
+
+    def _assinatura(self):
+        info = os.stat(self.estado_lotes_path)
+        assinatura = [(info.st_mtime_ns, info.st_size)]
+        # Embeddings (a busca só textual vive sem eles), tabela BM25, índice ANN
+        # e facetas são opcionais (podem não existir)
+        for caminho in (self.embeddings_path, self.bm25_path, self.ann_path, self.facetas_path):
+            if os.path.exists(caminho):
+                info = os.stat(caminho)
+                assinatura.append((info.st_mtime_ns, info.st_size))
+            else:
+                assinatura.append(None)
+        return tuple(assinatura)
+
+    def disponivel(self, semantica=True):
+        return os.path.exists(self.estado_lotes_path) and (not semantica or os.path.exists(self.embeddings_path))
+
+    def _carregar(self, assinatura):
+        # memmap: abrir é instantâneo e a matriz continua no disco (float16);
+        # só as linhas pontuadas viram float32, na hora da busca
+        # (sem o arquivo, todo lote fica só com a parte textual)
+        store = None
+        embeddings = np.zeros((0, 0), dtype=np.float32)
+        if os.path.exists(self.embeddings_path):
+            store = embedding_store.EmbeddingStore(self.embeddings_path)
+            embeddings = store.matriz
+
+        # Só os lotes ativos, já com os campos tipados (leilão, data, cidade, UF)
+        dados = []
+        for item in lot_store.LotStore(self.lotes_path).iterar(incluir_expirados=False):
+            item.update(facets.facetas_do_item(item))
+            dados.append(item)
+
+        # Cada linha da matriz é uma descrição única, compartilhada pelos lotes iguais;
+        # o arquivo de embeddings diz qual linha é de cada lote (pelo ID 'cl')
+        # (-1 = lote sem vetor, fica só com a parte textual)
+        linha_por_cl = store.linha_por_cl() if store is not None else {}
+        linha_do_lote = np.array(
+            [linha_por_cl.get(cl_do_item(item), -1) for item in dados], dtype=np.int64)
+
+        # Estruturas léxicas: normaliza e indexa uma vez aqui, não a cada busca
+        lexico = IndiceInvertido([normalizar_texto(item['texto_completo']) for item in dados])
+
+        # Tabela BM25 pré-calculada no processamento; os docs dela viram índices
+        # de 'dados' pelo 'cl' (-1 = lote que não está mais nos dados)
+        bm25, lote_do_doc_bm25 = None, None
+        if os.path.exists(self.bm25_path):
+            bm25 = TabelaBM25(self.bm25_path)
+            indice_por_cl = {cl_do_item(item): idx for idx, item in enumerate(dados)}
+            lote_do_doc_bm25 = np.array([indice_por_cl.get(cl, -1) for cl in bm25.cls], dtype=np.int64)
+
+        # Índice ANN: só é usado se foi construído para ESTES embeddings
+        ann = IndiceANN.abrir(self.ann_path) if store is not None else None
+        if ann is not None and ann.impressao != impressao_store(store):
+            print(Fore.YELLOW + "⚠️  Índice ANN desatualizado: usando a varredura exata até o próximo processamento." + Style.RESET_ALL)
+            ann = None
+
+        # Facetas: arquivos processados antes delas existirem são montados aqui mesmo
+        indice_facetas = facets.abrir_facetas(self.facetas_path)
+        if indice_facetas is None:
+            colunas, vocabularios = facets.construir_facetas(
+                dados, [cl_do_item(item) for item in dados])
+            indice_facetas = facets.IndiceFacetas(colunas, vocabularios)
+        indice_por_cl = {cl_do_item(item): idx for idx, item in enumerate(dados)}
+        lote_da_faceta = np.array(
+            [indice_por_cl.get(int(cl), -1) for cl in indice_facetas.colunas["cl"]], dtype=np.int64)
+
+        return {
+            "assinatura": assinatura,
+            "embeddings": embeddings,
+            "dados": dados,
+            "linha_do_lote": linha_do_lote,
+            "lexico": lexico,
+            "bm25": bm25,
+            "lote_do_doc_bm25": lote_do_doc_bm25,
+            "ann": ann,
+            "facetas": indice_facetas,
+            "lote_da_faceta": lote_da_faceta,
+        }
+
+    def estado(self):
+        """Devolve o estado atual, recarregando só se os arquivos mudaram."""
+        assinatura = self._assinatura()
+        estado = self._estado
+        if estado is not None and estado["assinatura"] == assinatura:
+            return estado
+
+        with self._lock:
+            if self._estado is None or self._estado["assinatura"] != assinatura:
+                if self._estado is not None:
+                    print(Fore.YELLOW + "🔄 Dados de inteligência mudaram no disco. Recarregando índice..." + Style.RESET_ALL)
+                with trecho("busca.carregar_indice"):
+                    self._estado = self._carregar(assinatura)
+            return self._estado
+
+    def recarregar(self):
+        """Força a releitura dos arquivos (mesmo sem mudança de mtime)."""
+        with self._lock, trecho("busca.carregar_indice"):
+            self._estado = self._carregar(self._assinatura())
+        return self._estado
+
+    def buscar(self, termo, model, limite=20, modo_lexico=None, nprobe=None, filtros=None):
+        """
+        Busca híbrida (IA + texto). Devolve até `limite` itens já ordenados,
+        cada um com os campos do lote mais 'score' e 'tipo_match'.
+        `modo_lexico`: 'heuristica' ou 'bm25' (padrão: config.BUSCA_MODO_LEXICO).
+        `nprobe`: listas visitadas pelo índice ANN, quando ele existe (padrão: config.ANN_NPROBE).
+        `filtros`: {chave: valor} das facetas; filtros em linha no termo
+        ('furadeira cidade:juatuba dias:7') também valem.
+        """
+        return self.buscar_varios([termo], model, limite, modo_lexico, nprobe, filtros)[0]
+
+    def buscar_varios(self, termos, model, limite=20, modo_lexico=None, nprobe=None, filtros=None):
+        """
+        Várias buscas de uma vez (mesmas opções de `buscar`, `filtros` vale para todas).
+        Todas as consultas vão para o modelo numa única chamada de encode e,
+        sem ANN/filtros, os scores de um bloco de consultas saem de um único
+        produto matriz x matriz. Devolve uma lista de resultados por termo.
+        Com `model=None` a busca é só textual (nem o modelo nem o torch são usados).
+        """
+        if limite < 1:
+            raise ValueError(f"O limite de resultados deve ser pelo menos 1 (recebido: {limite}).")
+        estado = self.estado()
+        contar("busca.consultas", len(termos))
+
+        # --- FILTROS: restringem os candidatos antes de qualquer score ---
+        consultas = []
+        with trecho("busca.filtros"):
+            for termo in termos:
+                texto, filtros_em_linha = facets.separar_filtros(termo)
+                filtros_termo = {**filtros_em_linha, **(filtros or {})}
+                permitidos = self.lotes_permitidos(estado, filtros_termo) if filtros_termo else None
+                consultas.append((texto, permitidos))
+
+        com_texto = [i for i, (texto, _) in enumerate(consultas) if texto.strip()]
+        vetores = {}
+        if com_texto and model is not None:
+            with trecho("busca.encode"):
+                matriz_consultas = model.encode([consultas[i][0] for i in com_texto], convert_to_numpy=True,
+                                                normalize_embeddings=True)
+            vetores = dict(zip(com_texto, np.asarray(matriz_consultas, dtype=np.float32)))
+
+        resultados = [None] * len(termos)
+
+        # Varredura exata sem filtro: blocos de consultas num produto de matrizes
+        if estado["ann"] is None and model is not None:
+            simples = [i for i in com_texto if consultas[i][1] is None]
+            for inicio in range(0, len(simples), config.BUSCA_BLOCO_CONSULTAS):
+                bloco = simples[inicio:inicio + config.BUSCA_BLOCO_CONSULTAS]
+                with trecho("busca.semantico"):
+                    scores_bloco = produto_em_blocos(estado["embeddings"], np.stack([vetores[i] for i in bloco]).T)
+                for coluna, i in enumerate(bloco):
+                    resultados[i] = self._ranquear(estado, consultas[i][0], vetores[i], None, limite,
+                                                   modo_lexico, nprobe, scores_bloco[:, coluna])
+
+        for i, (texto, permitidos) in enumerate(consultas):
+            if resultados[i] is None:
+                resultados[i] = self._ranquear(estado, texto, vetores.get(i), permitidos, limite,
+                                               modo_lexico, nprobe)
+        return resultados
+
+    def _ranquear(self, estado, termo, vetor, permitidos, limite, modo_lexico, nprobe, scores_linhas=None):
+        """
+        Uma consulta já com o vetor calculado: passe léxico + semântico + fusão.
+        Sem vetor (`vetor=None`) o ranking é só o bônus textual.
+        """
+        if not termo.strip():
+            # Só filtros, sem texto: lista os lotes que passaram, na ordem do site
+            resultados = []
+            for idx in np.flatnonzero(permitidos)[:limite] if permitidos is not None else ():
+                item = estado["dados"][idx].copy()
+                item['score'] = 0.0
+                item['tipo_match'] = "Filtro"
+                resultados.append(item)
+            return resultados
+
+        # --- ESTRATÉGIA 2: BUSCA TEXTUAL INTELIGENTE ---
+        # Índice invertido: só as listas dos termos da consulta são visitadas
+        # (com filtros, só os lotes que passaram são verificados)
+        with trecho("busca.lexico"):
+            bonus_por_lote, itens_com_match_textual = self.bonus_lexico(estado, termo, modo_lexico, permitidos)
+
+        if vetor is None and scores_linhas is None:
+            with trecho("busca.fusao_ordenacao"):
+                return self._fundir(estado, None, bonus_por_lote, itens_com_match_textual, limite, permitidos,
+                                    semantica=False)
+
+        # --- ESTRATÉGIA 1: BUSCA SEMÂNTICA (IA) ---
+        if scores_linhas is None:
+            with trecho("busca.semantico"):
+                scores_linhas = self.scores_semanticos(estado, vetor, bonus_por_lote, limite, nprobe, permitidos)
+
+        with trecho("busca.fusao_ordenacao"):
+            return self._fundir(estado, scores_linhas, bonus_por_lote, itens_com_match_textual, limite, permitidos)
+
+    @staticmethod
+    def lotes_permitidos(estado, filtros):
+        """Máscara (uma posição por lote de 'dados') dos lotes que passam nos filtros."""
+        mascara_facetas = estado["facetas"].filtrar(filtros)
+        lotes = estado["lote_da_faceta"][mascara_facetas]
+        permitidos = np.zeros(len(estado["dados"]), dtype=bool)
+        permitidos[lotes[lotes >= 0]] = True
+        return permitidos
+
+    @staticmethod
+    def scores_semanticos(estado, consulta, lotes_textuais, limite, nprobe=None, permitidos=None):
+        """
+        Cosseno de cada linha da matriz com a consulta (vetores já normalizados).
+        Sem índice ANN: produto matriz-vetor com TODAS as linhas.
+        Com índice ANN: só as linhas candidatas recebem score (as demais ficam
+        -inf); os lotes com match textual também são calculados na hora, para a
+        fusão não perder um lote que o ANN deixou de fora.
+        Com filtros (`permitidos`): só as linhas dos lotes que passaram.
+        """
+        embeddings = estado["embeddings"]
+        ann = estado["ann"]
+        if permitidos is not None:
+            linhas = np.unique(estado["linha_do_lote"][permitidos])
+            linhas = linhas[linhas >= 0]
+            scores = np.full(len(embeddings), -np.inf, dtype=np.float32)
+            scores[linhas] = linhas_float32(embeddings, linhas) @ consulta
+            return scores
+        if ann is None:
+            return produto_em_blocos(embeddings, consulta)
+
+        scores = np.full(len(embeddings), -np.inf, dtype=np.float32)
+        linhas, valores = ann.buscar(embeddings, consulta, max(limite, config.ANN_CANDIDATOS), nprobe)
+        scores[linhas] = valores
+        if lotes_textuais:
+            extras = estado["linha_do_lote"][list(lotes_textuais)]
+            extras = extras[extras >= 0]
+            scores[extras] = linhas_float32(embeddings, extras) @ consulta
+        return scores
+
+    @staticmethod
+    def bonus_lexico(estado, termo, modo_lexico=None, permitidos=None):
+        """
+        ({lote: bônus}, lotes_com_match) pelo modo léxico escolhido.
+        `permitidos`: máscara de 'dados' (filtros); os demais lotes nem são pontuados.
+        """
+        modo = modo_lexico or config.BUSCA_MODO_LEXICO
+        if modo == 'heuristica':
+            return estado["lexico"].bonus_texto(termo, permitidos)
+        if modo != 'bm25':
+            raise ValueError(f"Modo léxico desconhecido: '{modo}' (use 'heuristica' ou 'bm25').")
+
+        if estado["bm25"] is None:
+            # Dados processados antes da tabela existir: cai na heurística
+            return estado["lexico"].bonus_texto(termo, permitidos)
+
+        lote_do_doc = estado["lote_do_doc_bm25"]
+        docs_permitidos = lote_do_doc >= 0
+        if permitidos is not None:
+            docs_permitidos &= permitidos[np.maximum(lote_do_doc, 0)]
+        bonus_docs, _ = estado["bm25"].bonus_texto(termo, permitidos=docs_permitidos)
+        bonus = {int(lote_do_doc[doc]): valor for doc, valor in bonus_docs.items()}
+        return bonus, set(bonus)
+
+    @staticmethod
+    def _fundir(estado, scores_linhas, bonus_por_lote, itens_com_match_textual, limite, permitidos=None,
+                semantica=True):
+        """
+        Fusão vetorizada dos dois scores para o acervo inteiro:
+        score = cosseno + bônus textual, com corte de 0.10 para quem teve match
+        de palavra e 0.35 para quem só tem o conceito. O top-k sai de um
+        argpartition (O(n)) e só os k escolhidos são ordenados.
+        """
+        dados = estado["dados"]
+        linha_do_lote = estado["linha_do_lote"]
+        total = len(dados)
+
+        if semantica:
+            score = np.where(linha_do_lote >= 0, scores_linhas[linha_do_lote].astype(np.float64), 0.0)
+        else:
+            score = np.zeros(total, dtype=np.float64)  # Só textual: nem há scores de linhas
+        if permitidos is not None:
+            # Lotes filtrados podem dividir a linha do vetor com um permitido
+            score[~permitidos] = -np.inf
+        textual = np.zeros(total, dtype=bool)
+        if bonus_por_lote:
+            indices = np.fromiter(bonus_por_lote.keys(), dtype=np.int64, count=len(bonus_por_lote))
+            score[indices] += np.fromiter(bonus_por_lote.values(), dtype=np.float64, count=len(bonus_por_lote))
+        if itens_com_match_textual:
+            textual[list(itens_com_match_textual)] = True
+
+        # Só textual: qualquer bônus conta (não há cosseno para somar)
+        limite_minimo = np.where(textual, 0.10 if semantica else 0.0, 0.35)
+        candidatos = np.flatnonzero(score > limite_minimo)
+        if len(candidatos) > limite:
+            candidatos = candidatos[np.argpartition(-score[candidatos], limite - 1)[:limite]]
+
+        # Ordena só os escolhidos: score decrescente, empate pela ordem original
+        candidatos = candidatos[np.lexsort((candidatos, -score[candidatos]))]
+
+        resultados = []
+        for idx in candidatos:
+            item = dados[idx].copy()
+            item['score'] = float(score[idx])
+            item['tipo_match'] = ("Texto + IA" if semantica else "Texto") if textual[idx] else "Conceito IA"
+            resultados.append(item)
+        return resultados
+
+
+# Índice compartilhado pelas buscas do menu (fica quente entre uma busca e outra)
+INDICE = SearchIndex()
+
+
+def preparar_busca(semantica=True):
+    """
+    Garante que dá para buscar e devolve o codificador das consultas
+    (cache de vetores + modelo carregado só se alguma consulta faltar),
+    ou None na busca só textual (`semantica=False`).
+    Levanta DadosIndisponiveis com a explicação se algo estiver faltando.
+    """
+    if semantica and not AI_AVAILABLE:
+        raise DadosIndisponiveis("Biblioteca de IA faltando (sentence-transformers).")
+
+    # Migração única dos JSON antigos para o acervo de lotes
+    lot_store.abrir_lotes()
+
+    # Conversão única do formato antigo (pickle do torch) para o arquivo memmap;
+    # a busca só textual não precisa dos vetores (nem do torch para lê-los)
+    if semantica and not os.path.exists(config.EMBEDDINGS_FILE) \
+            and os.path.exists(config.LEGACY_EMBEDDINGS_FILE) and os.path.exists(config.PROCESSED_DATA_FILE):
+        embedding_store.converter_pickle_legado()
+
+    if not INDICE.disponivel(semantica):
+        raise DadosIndisponiveis("Dados de inteligência não encontrados. Rode a opção 2 (Processar) primeiro.")
+
+    # Consultas repetidas saem do cache sem tocar no modelo
+    return modelo_consultas() if semantica else None
+
+
+# --- API PROGRAMÁTICA (sem prints nem perguntas) ---
+
+def buscar(termo, limite=20, semantica=True, **opcoes):
+    """
+    Busca um termo e devolve a lista de resultados ordenados: dicionários com
+    os campos do lote mais 'score' e 'tipo_match'. `opcoes`: modo_lexico,
+    nprobe, filtros (ver SearchIndex.buscar). `semantica=False`: só textual.
+    """
+    return INDICE.buscar(termo, preparar_busca(semantica), limite, **opcoes)
+
+
+def buscar_varios(termos, limite=20, semantica=True, **opcoes):
+    """Vários termos numa passada só do modelo; uma lista de resultados por termo."""
+    return INDICE.buscar_varios(list(termos), preparar_busca(semantica), limite, **opcoes)
+
+
+def _buscar_via_servico(termo):
+    """Resultados do serviço local (BUSCA_SERVICO_URL); None se ele não estiver no ar."""
+    from modules import search_service  # Import tardio: o serviço importa este módulo
+    try:
+        return search_service.buscar_no_servico(termo)
+    except ValueError:
+        raise
+    except search_service.ErroServico as e:
+        print(Fore.YELLOW + f"⚠️  Serviço de busca falhou ({e}). Buscando aqui mesmo..." + Style.RESET_ALL)
+        return None
+    except OSError:
+        print(Fore.YELLOW + "⚠️  Serviço de busca fora do ar. Buscando aqui mesmo..." + Style.RESET_ALL)
+        return None
+
+
 def realizar_busca(termo):
-    if not AI_AVAILABLE:
-        print(Fore.RED + "❌ Biblioteca de IA faltando (sentence-transformers)." + Style.RESET_ALL)
-        return
+    _, filtros = facets.separar_filtros(termo)
+    if filtros:
+        print(Fore.CYAN + "🏷️  Filtros: " + ", ".join(f"{k}={v}" for k, v in filtros.items()) + Style.RESET_ALL)
+
+    try:
+        # Com o serviço no ar, modelo e índice já estão quentes do lado dele
+        lista_exportacao = _buscar_via_servico(termo) if config.BUSCA_SERVICO_URL else None
+
+        if lista_exportacao is None:
+            semantica = config.BUSCA_SEMANTICA
+            if semantica and not AI_AVAILABLE:
+                print(Fore.YELLOW + "⚠️  Biblioteca de IA faltando (sentence-transformers): busca só textual." + Style.RESET_ALL)
+                semantica = False
+            try:
+                with trecho("busca.preparar"):
+                    model = preparar_busca(semantica)
+            except DadosIndisponiveis as e:
+                print(Fore.RED + f"❌ {e}" + Style.RESET_ALL)
+                return
 
-    if not os.path.exists(config.EMBEDDINGS_FILE) or not os.path.exists(config.PROCESSED_DATA_FILE):
-        print(Fore.RED + "❌ Dados de inteligência não encontrados. Rode a opção 2 (Processar) primeiro." + Style.RESET_ALL)
+            print(Fore.CYAN + ("🔍 Cruzando dados (IA + Texto)..." if semantica else "🔍 Buscando no texto...") + Style.RESET_ALL)
+            with trecho("busca.total"):
+                lista_exportacao = INDICE.buscar(termo, model) # Lista para guardar dados para o Excel
+    except ValueError as e:
+        print(Fore.RED + f"❌ Filtro inválido: {e}" + Style.RESET_ALL)
         return
 
-    # Usa o Cache para velocidade instantânea nas buscas subsequentes
-    model = get_model()
-    
-    with open(config.EMBEDDINGS_FILE, 'rb') as f:
-        embeddings_banco = pickle.load(f)
-    
-    with open(config.PROCESSED_DATA_FILE, 'r', encoding='utf-8') as f:
-        dados = json.load(f)
-
-    # --- ESTRATÉGIA 1: BUSCA SEMÂNTICA (IA) ---
-    query_embedding = model.encode(termo, convert_to_tensor=True)
-    hits = util.semantic_search(query_embedding, embeddings_banco, top_k=50)[0]
-    
-    resultados_combinados = {}
-    for hit in hits:
-        idx = hit['corpus_id']
-        resultados_combinados[idx] = hit['score']
-
-    # --- ESTRATÉGIA 2: BUSCA TEXTUAL INTELIGENTE ---
-    termo_norm = normalizar_texto(termo)
-    palavras_busca = termo_norm.split() 
-    itens_com_match_textual = set()
-    
-    print(Fore.CYAN + "🔍 Cruzando dados (IA + Texto)..." + Style.RESET_ALL)
-    
-    for idx, item in enumerate(dados):
-        texto_item = normalizar_texto(item['texto_completo'])
-        palavras_item_set = set(texto_item.split())
-        bonus_texto = 0.0
-        
-        # 1. Match Exato
-        if termo_norm in texto_item:
-            bonus_texto += 0.4
-            
-        # 2. Match Palavra/Raiz
-        matches_palavras = 0
-        for palavra in palavras_busca:
-            match_encontrado = False
-            if len(palavra) < 4:
-                if palavra in palavras_item_set: match_encontrado = True
-            else:
-                if palavra in texto_item:
-                    match_encontrado = True
-                else:
-                    # Stemming simples (raízes)
-                    raiz = palavra.rstrip('s')
-                    if raiz.endswith(('o', 'a', 'e')): raiz = raiz[:-1]
-                    if len(raiz) >= 3 and raiz in palavras_item_set:
-                        match_encontrado = True
-
-            if match_encontrado: matches_palavras += 1
-        
-        if matches_palavras > 0:
-            fator_match = matches_palavras / len(palavras_busca)
-            bonus_texto += (fator_match * 0.3)
-            itens_com_match_textual.add(idx)
-
-        if bonus_texto > 0:
-            score_atual = resultados_combinados.get(idx, 0.0)
-            resultados_combinados[idx] = score_atual + bonus_texto
-
-    # --- ORDENAÇÃO E EXIBIÇÃO ---
-    ranking_final = sorted(resultados_combinados.items(), key=lambda x: x[1], reverse=True)
-    
-    lista_exportacao = [] # Lista para guardar dados para o Excel
-    encontrou = False
-    
+    # --- EXIBIÇÃO ---
     print(f"\n🔎 Resultados para: '{termo}'\n" + "="*60)
-    
-    contador = 0
-    for idx, score in ranking_final:
-        limite_minimo = 0.10 if idx in itens_com_match_textual else 0.35
-        
-        if score > limite_minimo: 
-            item = dados[idx]
-            encontrou = True
-            contador += 1
-            if contador > 20: break # Limite de exibição no terminal
-            
-            desc_curta = item['texto_completo'][:150].replace('\n', ' ') + "..."
-            
-            tipo_match = "Conceito IA"
-            if idx in itens_com_match_textual:
-                cor_score = Fore.GREEN
-                tipo_match = "Texto + IA"
-            else:
-                cor_score = Fore.MAGENTA
-            
-            print(f"{cor_score}#{contador} [Score: {score:.2f}] ({tipo_match}) {Style.RESET_ALL}Lote: {item['lote']}")
-            print(f"   📝 {desc_curta}")
-            print(f"   🔗 {item['url']}")
-            print(Fore.CYAN + "-" * 60 + Style.RESET_ALL)
-            
-            # Prepara objeto para exportação
-            item_export = item.copy()
-            item_export['score'] = score
-            item_export['tipo_match'] = tipo_match
-            lista_exportacao.append(item_export)
-    
-    if not encontrou:
+
+    for contador, item in enumerate(lista_exportacao, start=1):
+        desc_curta = item['texto_completo'][:150].replace('\n', ' ') + "..."
+        cor_score = Fore.GREEN if item['tipo_match'] in ("Texto + IA", "Texto") else Fore.MAGENTA
+
+        print(f"{cor_score}#{contador} [Score: {item['score']:.2f}] ({item['tipo_match']}) {Style.RESET_ALL}Lote: {item['lote']}")
+        print(f"   📝 {desc_curta}")
+        print(f"   📅 {item['data']} | 📍 {item['local']}")
+        print(f"   🔗 {item['url']}")
+        print(Fore.CYAN + "-" * 60 + Style.RESET_ALL)
+
+    if not lista_exportacao:
         print(Fore.RED + "😕 Nenhum item relevante encontrado." + Style.RESET_ALL)
-    elif lista_exportacao:
+    else:
         # Pergunta se quer exportar
         print(f"\nForam encontrados {len(lista_exportacao)} itens relevantes.")
         opt = input(Fore.YELLOW + "Deseja exportar estes resultados para Excel (CSV)? [S/N]: " + Style.RESET_ALL).upper()
         if opt == 'S':
-            exportar_para_csv(lista_exportacao, termo)
\ No newline at end of file
+            exportar_para_csv(lista_exportacao, termo)
@@ -0,0 +1,136 @@
+import asyncio
+import random
+import time
+import config
+
+
+class ErroHttp(Exception):
+    """Resposta HTTP de erro (4xx/5xx) vinda do site, em qualquer backend."""
+
+    def __init__(self, status, url=""):
+        super().__init__(f"HTTP {status} em {url}")
+        self.status = status
+
+
+class CircuitoAberto(Exception):
+    """O site parece fora do ar: a coleta deve parar (e pode ser retomada depois)."""
+
+
+def classificar_erro(erro):
+    """
+    Diz se vale a pena tentar o lote de novo e se a falha indica site
+    sobrecarregado (timeout, 429, 5xx, conexão) - o que derruba a taxa.
+    Devolve (retentavel, sobrecarga).
+    """
+    if isinstance(erro, ErroHttp):
+        sobrecarga = erro.status == 429 or erro.status >= 500
+        return sobrecarga, sobrecarga
+
+    # Timeouts do Playwright, do requests e do asyncio
+    if isinstance(erro, (TimeoutError, asyncio.TimeoutError)) or "Timeout" in type(erro).__name__:
+        return True, True
+
+    # Conexão recusada/resetada (requests.ConnectionError herda de OSError)
+    if isinstance(erro, OSError) or "net::ERR" in str(erro):
+        return True, True
+
+    # Erro desconhecido (ex: página fechada): tenta de novo, mas não culpa o site
+    return True, False
+
+
+class ControladorTaxa:
+    """
+    Ritmo adaptativo de acessos ao site, compartilhado por todos os trabalhadores.
+
+    - Acelera aos poucos (aditivo) enquanto as respostas chegam rápidas e sem erro,
+      até o teto SCRAP_MAX_REQ_POR_SEG.
+    - Freia pela metade (multiplicativo) em timeout / 429 / 5xx.
+    - Depois de SCRAP_CIRCUITO_FALHAS falhas seguidas, abre o circuito: ninguém
+      acessa o site durante a pausa, que dobra a cada nova abertura. Se o circuito
+      abrir SCRAP_CIRCUITO_MAX_ABERTURAS vezes sem nenhum sucesso no meio, desiste.
+    """
+
+    def __init__(self):
+        self.taxa = config.SCRAP_TAXA_INICIAL
+        self._proximo = 0.0
+        self._lock = asyncio.Lock()
+
+        self._falhas_seguidas = 0
+        self._aberturas_seguidas = 0
+        self._circuito_ate = 0.0
+        self.desistiu = False
+
+        self._inicio = time.monotonic()
+        self.stats = {
+            "requisicoes": 0, "sucessos": 0, "falhas": 0, "retentativas": 0,
+            "aberturas_circuito": 0, "latencia_total": 0.0, "latencias": [],
+        }
+
+    async def aguardar(self):
+        """Espera o próximo horário livre (respeitando a taxa e o circuito)."""
+        async with self._lock:
+            if self.desistiu:
+                raise CircuitoAberto("Circuito aberto: site instável, coleta interrompida.")
+
+            agora = time.monotonic()
+            espera = max(self._proximo, self._circuito_ate) - agora
+            if espera > 0:
+                await asyncio.sleep(espera)
+                agora = time.monotonic()
+            # Jitter: mantém o intervalo irregular (Anti-bloqueio). Só alonga o
+            # intervalo, nunca encurta: a taxa real não passa da configurada
+            self._proximo = agora + (1.0 / self.taxa) * random.uniform(1.0, 1.2)
+            self.stats["requisicoes"] += 1
+
+    def registrar_sucesso(self, latencia):
+        self.stats["sucessos"] += 1
+        self.stats["latencia_total"] += latencia
+        self.stats["latencias"].append(latencia)
+        self._falhas_seguidas = 0
+        self._aberturas_seguidas = 0
+
+        if latencia <= config.SCRAP_LATENCIA_ALVO:
+            self.taxa = min(config.SCRAP_MAX_REQ_POR_SEG, self.taxa + config.SCRAP_TAXA_PASSO)
+        else:
+            # Site respondendo devagar: freia de leve, sem esperar dar erro
+            self.taxa = max(config.SCRAP_TAXA_MIN, self.taxa * 0.9)
+
+    def registrar_falha(self, erro):
+        """Atualiza taxa e circuito. Devolve True se o lote deve ser tentado de novo."""
+        self.stats["falhas"] += 1
+        retentavel, sobrecarga = classificar_erro(erro)
+
+        if sobrecarga:
+            self.taxa = max(config.SCRAP_TAXA_MIN, self.taxa / 2)
+            self._falhas_seguidas += 1
+
+            if self._falhas_seguidas >= config.SCRAP_CIRCUITO_FALHAS:
+                self._abrir_circuito()
+
+        return retentavel and not self.desistiu
+
+    def _abrir_circuito(self):
+        self._falhas_seguidas = 0
+        self._aberturas_seguidas += 1
+        self.stats["aberturas_circuito"] += 1
+
+        if self._aberturas_seguidas > config.SCRAP_CIRCUITO_MAX_ABERTURAS:
+            self.desistiu = True
+            return
+
+        pausa = config.SCRAP_CIRCUITO_PAUSA * 2 ** (self._aberturas_seguidas - 1)
+        self._circuito_ate = time.monotonic() + pausa
+        print(f"   ⛔ Circuito aberto: site instável, pausando a coleta por {pausa:.0f}s...")
+
+    def tempo_backoff(self, tentativa):
+        """Espera antes de repetir um lote: exponencial + jitter."""
+        return config.SCRAP_BACKOFF_BASE * 2 ** (tentativa - 1) * random.uniform(0.5, 1.5)
+
+    def resumo(self):
+        decorrido = max(time.monotonic() - self._inicio, 1e-9)
+        stats = dict(self.stats)
+        stats["taxa_efetiva"] = stats["requisicoes"] / decorrido
+        stats["taxa_final"] = self.taxa
+        stats["latencia_media"] = stats["latencia_total"] / stats["sucessos"] if stats["sucessos"] else 0.0
+        stats["duracao"] = decorrido
+        return stats
@@ -1,15 +1,29 @@
 import sys
 import os
+import argparse
 
 # Adiciona o diretório atual ao path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from modules import scraper, ai_processor
+import config
+from modules import scraper, ai_processor, alerts, instrumentacao
+from modules.instrumentacao import trecho
 from colorama import init, Fore, Style
 
 init(autoreset=True)
 
 def main():
+    parser = argparse.ArgumentParser(description="Automação diária: Scraping + IA")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continua a coleta interrompida a partir do checkpoint em data/")
+    parser.add_argument("--relatorio", default=config.RELATORIO_EXECUCAO_FILE,
+                        help="Onde gravar o relatório JSON com os tempos de cada etapa")
+    args = parser.parse_args()
+
+    # Tempos por etapa e contadores de fallback: o relatório sai mesmo se a execução falhar
+    instrumentacao.ativar()
+    status = {"status": "ok"}
+
     print(Fore.CYAN + "="*60)
     print("🤖 INICIANDO AUTOMAÇÃO DE NUVEM - PALÁCIO DOS LEILÕES")
     print(Fore.CYAN + "="*60)
@@ -21,17 +35,38 @@ def main():
     try:
         # PASSO 1: Scraping
         print(Fore.YELLOW + "\n>>> Passo 1: Iniciando Scraping do Site...")
-        scraper.executar_scraping(url_completa)
+        with trecho("automacao.scraping"):
+            stats = scraper.executar_scraping(url_completa, retomar=args.resume)
+        # As latências uma a uma já estão resumidas nos trechos
+        status["ritmo_scraping"] = {chave: valor for chave, valor in (stats or {}).items() if chave != "latencias"}
 
         # PASSO 2: Inteligência Artificial
         print(Fore.MAGENTA + "\n>>> Passo 2: Processando Inteligência Artificial...")
-        ai_processor.gerar_inteligencia()
+        with trecho("automacao.processamento"):
+            ai_processor.gerar_inteligencia()
+
+        # PASSO 3: Alertas das buscas salvas (só os lotes novos/alterados)
+        # Uma falha aqui não pode custar a coleta do dia: os dados dos passos 1 e 2
+        # já estão gravados e a execução continua valendo
+        print(Fore.BLUE + "\n>>> Passo 3: Verificando Buscas Salvas...")
+        try:
+            with trecho("automacao.alertas"):
+                alerts.avaliar_alertas()
+        except Exception as e:
+            print(Fore.YELLOW + f"⚠️  Alertas não avaliados: {e.__class__.__name__}: {e}")
+            status["alertas"] = f"erro: {e.__class__.__name__}: {e}"
 
         print(Fore.GREEN + "\n✅ PROCESSO CONCLUÍDO COM SUCESSO!")
     
     except Exception as e:
         print(Fore.RED + f"\n❌ ERRO FATAL NA AUTOMAÇÃO: {e}")
+        status = {**status, "status": "erro", "erro": f"{e.__class__.__name__}: {e}"}
         sys.exit(1) # Código de erro para avisar o GitHub que falhou
+    finally:
+        relatorio = instrumentacao.salvar_relatorio(args.relatorio, **status)
+        print()
+        instrumentacao.imprimir_resumo(relatorio)
+        print(f"📊 Relatório da execução: {args.relatorio}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
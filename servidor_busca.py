@@ -0,0 +1,43 @@
+import sys
+import os
+import argparse
+
+# Adiciona o diretório atual ao path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import config
+from modules import searcher, search_service
+from colorama import init, Fore, Style
+
+init(autoreset=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serviço local de busca (HTTP + JSON) com modelo e índice sempre carregados.")
+    parser.add_argument("--host", default=config.SERVICO_HOST)
+    parser.add_argument("--porta", type=int, default=config.SERVICO_PORTA)
+    args = parser.parse_args()
+
+    # Aquece tudo antes de aceitar requisições: a primeira busca já é rápida
+    try:
+        searcher.preparar_busca()
+    except searcher.DadosIndisponiveis as e:
+        print(Fore.RED + f"❌ {e}")
+        sys.exit(1)
+    searcher.get_model()
+    estado = searcher.INDICE.estado()
+
+    servidor, _ = search_service.criar_servidor(args.host, args.porta)
+    print(Fore.GREEN + f"✅ Serviço de busca no ar: http://{args.host}:{args.porta} ({len(estado['dados'])} lotes)")
+    print(Fore.CYAN + "   GET /status | GET /buscar?q=... | POST /buscar | POST /buscar_lote | POST /recarregar")
+    print(Style.DIM + "   (Ctrl+C para parar)")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        print(Fore.YELLOW + "\nEncerrando serviço...")
+    finally:
+        servidor.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Leitura do HTML estático de 'lotem.php' (modules/http_fetcher.py) contra
+páginas salvas em tests/fixtures: cada 'nome.html' tem o resultado esperado
+em 'nome.json', escrito à mão seguindo o innerText do navegador (o que o
+caminho com Playwright devolve para os mesmos elementos).
+
+Uso:
+    python -m unittest discover tests   (ou: python -m pytest tests)
+"""
+import json
+import os
+import sys
+import unittest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.http_fetcher import extrair_de_html, renderizar_texto
+from modules.scraper import interpretar_linhas_tabela, montar_item
+from benchmarks.site_ficticio import pagina_lote
+
+PASTA_FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def ler_fixture(nome):
+    with open(os.path.join(PASTA_FIXTURES, nome + ".html"), 'r', encoding='utf-8') as f:
+        html = f.read()
+    with open(os.path.join(PASTA_FIXTURES, nome + ".json"), 'r', encoding='utf-8') as f:
+        esperado = json.load(f)
+    return html, esperado
+
+
+class TestFixtures(unittest.TestCase):
+
+    def test_paginas_salvas(self):
+        nomes = sorted(arquivo[:-5] for arquivo in os.listdir(PASTA_FIXTURES) if arquivo.endswith(".html"))
+        self.assertTrue(nomes)
+        for nome in nomes:
+            with self.subTest(fixture=nome):
+                html, esperado = ler_fixture(nome)
+                self.assertEqual(extrair_de_html(html), esperado)
+
+    def test_campos_do_item(self):
+        html, _ = ler_fixture("lote_padrao")
+        bruto = extrair_de_html(html)
+        item = montar_item("https://exemplo/site/lotem.php?cl=1474395", interpretar_linhas_tabela(bruto["linhas"]),
+                           bruto["descricao"])
+        self.assertEqual(item["lote"], "Br 262 Km375 S/N Zona Rural Juatuba-MG")
+        self.assertEqual(item["data"], "8162 - 17/12/25")
+        self.assertEqual(item["local"], "Br-262, Km 375 Juatuba-MG")
+        self.assertEqual(item["texto_completo"],
+                         "APROXIMADAMENTE 25 ITENS: 01 KIT FURADEIRA DE IMPACTO E MADEIRA 110V "
+                         "02 KIT FURADEIRA MOEDOR 110V ENTRE OUTROS : (PODENDO ESTAR EM BOM ESTADO, COM AVARIA OU SUCATA)")
+
+    def test_ida_e_volta_site_ficticio(self):
+        # Descrições no formato que o innerText devolve voltam idênticas
+        item = {"lote": "Pátio Central Belo Horizonte-MG", "data": "8101 - 02/12/25", "local": "Rua A, 1 BH-MG",
+                "texto_bruto_com_quebras": "01 MESA\n\n\n02 CADEIRA < 1,5 M & 03 ARMÁRIO\n(VOL:12/0425)"}
+        bruto = extrair_de_html(pagina_lote(item))
+        self.assertEqual(bruto["descricao"], item["texto_bruto_com_quebras"])
+        self.assertEqual(interpretar_linhas_tabela(bruto["linhas"]),
+                         {"lote": item["lote"], "data": item["data"], "local": item["local"]})
+
+
+class TestRenderizarTexto(unittest.TestCase):
+
+    def test_quebras_obrigatorias_viram_a_maior(self):
+        self.assertEqual(renderizar_texto([1, "a", 1, 1, "b", 1, 2, 1, "c", 2]), "a\nb\n\nc")
+
+    def test_br_nao_e_colapsado(self):
+        self.assertEqual(renderizar_texto(["a", "\n", "\n", "\n", "b"]), "a\n\n\nb")
+
+    def test_espacos_nas_bordas_das_linhas(self):
+        self.assertEqual(renderizar_texto([" a ", " ", "\n", " b", 1, " c "]), "a\nb\nc")
+
+    def test_nbsp_e_preservado(self):
+        self.assertEqual(renderizar_texto(["a\xa0\xa0b", " "]), "a\xa0\xa0b")
+
+
+if __name__ == "__main__":
+    unittest.main()